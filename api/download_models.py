@@ -1,42 +1,26 @@
-
 """
-Model Downloader.
-Fetches pretrained weights from remote storage (S3/HuggingFace).
+Model Installer.
+Writes inference model versions in the registry layout (models/<version>/*.npy + ACTIVE).
+No pretrained weights are published yet, so the only source is a small offline test model.
 """
 
-import sys
-import time
+import argparse
 from pathlib import Path
 
-MODEL_DIR = Path("models")
-MODELS = {
-    "encoder.pt": "https://voxlabs-models.s3.amazonaws.com/encoder-v2.pt",
-    "synthesizer.pt": "https://voxlabs-models.s3.amazonaws.com/synthesizer-v2.pt",
-    "vocoder.pt": "https://voxlabs-models.s3.amazonaws.com/vocoder-v2.pt"
-}
+from pipelines.registry import ModelRegistry, write_test_model
 
-def download_models():
-    """Download all required models."""
-    MODEL_DIR.mkdir(exist_ok=True)
-    print(f"⬇️ Downloading models to {MODEL_DIR.absolute()}...")
-    
-    for name, url in MODELS.items():
-        destination = MODEL_DIR / name
-        if destination.exists():
-            print(f"   ✅ {name} already exists.")
-            continue
-            
-        print(f"   ⏳ Downloading {name} from {url}...")
-        # Simulate network delay
-        time.sleep(1)
-        
-        # Create dummy file for now
-        with open(destination, "wb") as f:
-            f.write(b"DUMMY_MODEL_WEIGHTS")
-            
-        print(f"   ✅ {name} downloaded.")
+MODEL_DIR = Path("models")
 
-    print("\n🎉 All models ready.")
+def install_test_model(version: str = "test"):
+    """Write a small random model version (offline) and make it active."""
+    path = write_test_model(MODEL_DIR, version)
+    ModelRegistry(MODEL_DIR).activate(version)
+    print(f"✅ Test model written to {path.absolute()} and activated.")
 
 if __name__ == "__main__":
-    download_models()
+    parser = argparse.ArgumentParser(description="Install inference models into the model registry")
+    parser.add_argument("--test-model", metavar="VERSION", nargs="?", const="test", default="test",
+                        help="Version name of the generated offline test model (default: test)")
+    args = parser.parse_args()
+
+    install_test_model(args.test_model)
@@ -0,0 +1,375 @@
+"""
+Synthesis Cache Module
+Caching layers for synthesized audio and decoded base TTS renders
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+
+class SynthesisCache:
+    """
+    Two-tier content-addressed cache for synthesized audio
+    - Keys are stable digests of every synthesis parameter
+    - In-memory hot tier with byte-budget LRU eviction (per process)
+    - On-disk tier (the served artifacts) shared by every worker process: the directory
+      itself is the index. File mtimes record the last access, and the byte budget and
+      optional TTL are enforced from a scan of the directory under a file lock, so
+      several workers share one budget and never act on a stale private index
+    - Entries returned inline can stay memory-only and are persisted on demand
+    """
+
+    LOCK_FILE = ".cache.lock"
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        memory_budget: int = 64 * 1024 * 1024,
+        disk_budget: int = 1024 * 1024 * 1024,
+        prefix: str = "tts_",
+        suffix: str = ".mp3",
+        ttl: Optional[float] = None,
+        rescan_interval: float = 10.0,
+        low_water: float = 0.9
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.prefix = prefix
+        self.suffix = suffix
+        self.ttl = ttl
+        # Writes are checked against the budget from an estimate; the directory is
+        # rescanned when the estimate is over budget or older than rescan_interval
+        self.rescan_interval = rescan_interval
+        # Eviction frees down to this share of the budget, so a full cache is not
+        # rescanned on every write
+        self.low_water = low_water
+
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        # Keys this process wrote or read from disk (memory hits refresh their mtime)
+        self._persisted: Set[str] = set()
+        self._disk_entries = 0
+        self._disk_bytes = 0
+        self._scanned_at = 0.0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._sweep()
+
+    @staticmethod
+    def make_key(**params) -> str:
+        """Stable digest of synthesis parameters (independent of PYTHONHASHSEED)"""
+        payload = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+    def filename(self, key: str) -> str:
+        """File name of a cache entry inside the cache directory"""
+        return f"{self.prefix}{key}{self.suffix}"
+
+    def path(self, key: str) -> Path:
+        """Absolute path of a cache entry on disk"""
+        return self.cache_dir / self.filename(key)
+
+    def _key(self, filename: str) -> str:
+        return filename[len(self.prefix):len(filename) - len(self.suffix)]
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Look up audio by key, promoting disk hits into memory"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+            persisted = key in self._persisted
+
+        if data is not None:
+            # A persisted entry is only valid while its file exists (another worker may
+            # have evicted it); touching it also records the access for every worker
+            if not persisted or self._touch(key):
+                with self._lock:
+                    self.memory_hits += 1
+                return data
+            with self._lock:
+                self._forget(key)
+
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+            self._stamp(path)
+        except OSError:
+            data = None
+
+        with self._lock:
+            if data is None:
+                self._forget(key)
+                self.misses += 1
+                return None
+            self._persisted.add(key)
+            self._store_memory(key, data)
+            self.disk_hits += 1
+            return data
+
+    def put(self, key: str, data: bytes, persist: bool = True):
+        """Store audio in the hot tier and, unless persist is False, on disk"""
+        if persist:
+            self._write(key, data)
+        with self._lock:
+            if persist:
+                self._index_disk(key, len(data))
+            self._store_memory(key, data)
+            sweep = persist and self._sweep_due()
+        if sweep:
+            self._sweep()
+
+    def persist(self, key: str) -> bool:
+        """Write a memory-only entry to disk; False if the key is no longer cached"""
+        with self._lock:
+            persisted = key in self._persisted
+            data = self._memory.get(key)
+        if persisted and self._touch(key):
+            return True
+        if data is None:
+            return False
+        self._write(key, data)
+        with self._lock:
+            self._index_disk(key, len(data))
+            sweep = self._sweep_due()
+        if sweep:
+            self._sweep()
+        with self._lock:
+            return key in self._persisted
+
+    def _write(self, key: str, data: bytes):
+        """Atomic temp-file-and-rename write"""
+        path = self.path(key)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        self._stamp(tmp_path)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _stamp(path: Path):
+        """Set the access mark from the wall clock (file system mtimes can be coarse)"""
+        now = time.time_ns()
+        os.utime(path, ns=(now, now))
+
+    def _touch(self, key: str) -> bool:
+        """Mark a disk entry as accessed now; False if its file is gone"""
+        try:
+            self._stamp(self.path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _index_disk(self, key: str, size: int):
+        """Record a file this process wrote (lock must be held)"""
+        self._persisted.add(key)
+        self._disk_entries += 1
+        self._disk_bytes += size
+
+    def _store_memory(self, key: str, data: bytes):
+        """Insert into the hot tier (lock must be held)"""
+        if len(data) > self.memory_budget:
+            return
+        if key in self._memory:
+            self._memory_bytes -= len(self._memory[key])
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        self._memory_bytes += len(data)
+
+        while self._memory_bytes > self.memory_budget:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.evictions += 1
+
+    def _forget(self, key: str):
+        """Drop a key whose file is gone, including its hot copy (lock must be held)"""
+        self._persisted.discard(key)
+        data = self._memory.pop(key, None)
+        if data is not None:
+            self._memory_bytes -= len(data)
+
+    def _sweep_due(self) -> bool:
+        """Whether the disk estimate calls for a directory scan (lock must be held)"""
+        return self._disk_bytes > self.disk_budget or time.monotonic() - self._scanned_at >= self.rescan_interval
+
+    @contextmanager
+    def _dir_lock(self):
+        """Serialize sweeps of the shared directory across worker processes"""
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(self.cache_dir / self.LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _scan(self) -> List[Tuple[int, str, int]]:
+        """(mtime_ns, filename, size) of every entry on disk, least recently used first"""
+        entries = []
+        with os.scandir(self.cache_dir) as listing:
+            for entry in listing:
+                name = entry.name
+                if not name.startswith(self.prefix) or not name.endswith(self.suffix):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, name, stat.st_size))
+        return sorted(entries)
+
+    def _sweep(self, now: Optional[float] = None) -> int:
+        """
+        Expire and evict from the directory itself (the state every worker shares)
+        Deletes files past the TTL, then least recently used ones while over budget
+        (down to the low-water mark). Returns the number of files removed.
+        """
+        now = time.time() if now is None else now
+        cutoff = None if self.ttl is None else int((now - self.ttl) * 1e9)
+        removed: List[str] = []
+        expired = 0
+        with self._sweep_lock, self._dir_lock():
+            entries = self._scan()
+            total = sum(size for _, _, size in entries)
+            target = self.disk_budget * self.low_water if total > self.disk_budget else self.disk_budget
+            for mtime, name, size in entries:
+                is_expired = cutoff is not None and mtime <= cutoff
+                if not is_expired and total <= target:
+                    break
+                try:
+                    os.unlink(self.cache_dir / name)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed.append(self._key(name))
+                expired += is_expired
+
+        with self._lock:
+            for key in removed:
+                self._forget(key)
+            self._disk_entries = len(entries) - len(removed)
+            self._disk_bytes = total
+            self._scanned_at = time.monotonic()
+            self.expirations += expired
+            self.evictions += len(removed) - expired
+        return len(removed)
+
+    def collect_garbage(self, now: Optional[float] = None) -> int:
+        """
+        Delete files not accessed within the TTL and re-apply the disk quota
+        Returns the number of files removed
+        """
+        return self._sweep(now)
+
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters and tier sizes (disk figures as of the last scan plus own writes)"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": self._disk_entries,
+                "disk_bytes": self._disk_bytes
+            }
+
+
+class BaseAudioCache:
+    """
+    Memory-bounded LRU cache of decoded base TTS waveforms
+    - Keyed by (backend, text, language) so emotion/DSP changes reuse one render
+    - Stores float32 arrays marked read-only and hands out the same buffer
+      (no copies); downstream DSP always produces new arrays
+    """
+
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[np.ndarray, int]]" = OrderedDict()
+        self._nbytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of waveform data currently held"""
+        return self._nbytes
+
+    def get(self, text: str, language: str, backend: str = "") -> Optional[Tuple[np.ndarray, int]]:
+        """Return (waveform, sample_rate) or None"""
+        key = (backend, text, language)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, text: str, language: str, y: np.ndarray, sr: int, backend: str = "") -> np.ndarray:
+        """Store a waveform and return the shared read-only buffer"""
+        y = np.ascontiguousarray(y, dtype=np.float32)
+        y.flags.writeable = False
+        if y.nbytes > self.max_bytes:
+            return y
+
+        key = (backend, text, language)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nbytes -= previous[0].nbytes
+            self._entries[key] = (y, sr)
+            self._nbytes += y.nbytes
+
+            while self._nbytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+                self.evictions += 1
+        return y
+
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters and memory held"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "nbytes": self._nbytes,
+                "max_bytes": self.max_bytes
+            }
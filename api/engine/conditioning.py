@@ -0,0 +1,66 @@
+"""
+Voice Conditioning Module
+Synthesis parameters derived once per voice from its speaker embedding
+"""
+
+from typing import Dict
+import numpy as np
+
+
+# Reference speaker the base synthesizers approximate (female default voice)
+REFERENCE_F0 = 220.0
+REFERENCE_CENTROID = 1800.0
+
+# Keep derived DSP factors inside the range the pitch/tempo stage handles cleanly
+PITCH_RATIO_RANGE = (0.5, 2.0)
+FORMANT_WARP_RANGE = (0.8, 1.25)
+
+# Embedding layout (see engine/features.py)
+F0_MEAN_INDEX = 0
+CENTROID_MEAN_INDEX = 128
+LOG_MEL_SLICE = slice(178, 242)
+
+
+class VoiceConditioning:
+    """
+    Precomputed conditioning for one voice
+    - pitch_ratio: mean f0 relative to the reference speaker (drives the clone pitch shift)
+    - formant_warp: spectral centroid relative to the reference (vocal tract length proxy)
+    - envelope: long-term log-mel spectrum in dB relative to its own mean (spectral envelope)
+    - embedding: L2-normalized speaker embedding (neural model conditioning)
+    Arrays are private copies, so they stay valid when the embedding store is compacted.
+    """
+
+    def __init__(self, voice_id: str, features: np.ndarray):
+        features = np.asarray(features, dtype=np.float32)
+        self.voice_id = voice_id
+        self.f0 = float(features[F0_MEAN_INDEX]) if len(features) > F0_MEAN_INDEX else 0.0
+        self.pitch_ratio = _ratio(self.f0, REFERENCE_F0, PITCH_RATIO_RANGE)
+
+        centroid = float(features[CENTROID_MEAN_INDEX]) if len(features) > CENTROID_MEAN_INDEX else 0.0
+        self.formant_warp = _ratio(centroid, REFERENCE_CENTROID, FORMANT_WARP_RANGE)
+
+        log_mel = features[LOG_MEL_SLICE]
+        self.envelope = (log_mel - log_mel.mean()) if log_mel.size else log_mel.copy()
+
+        norm = np.linalg.norm(features)
+        self.embedding = features / norm if norm > 0 else features.copy()
+        for array in (self.envelope, self.embedding):
+            array.setflags(write=False)
+
+    def to_dict(self) -> Dict:
+        """Scalar parameters (for status and debugging)"""
+        return {
+            "voice_id": self.voice_id,
+            "f0": round(self.f0, 2),
+            "pitch_ratio": round(self.pitch_ratio, 4),
+            "formant_warp": round(self.formant_warp, 4)
+        }
+
+
+def _ratio(value: float, reference: float, bounds: tuple) -> float:
+    """value / reference clamped to bounds; 1.0 if value is unusable"""
+    if not np.isfinite(value) or value <= 0:
+        return 1.0
+    low, high = bounds
+    return float(min(max(value / reference, low), high))
@@ -0,0 +1,175 @@
+"""
+Consent Log Module
+Append-only JSON-lines audit trail for voice consent actions
+"""
+
+import os
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+
+class ConsentLog:
+    """
+    Append-only consent audit log
+    - One JSON object per line, appended and fsync'd (never rewritten)
+    - Rotates to a new segment file once the current one reaches max_segment_bytes
+    - Readers stream segments in order and can filter by voice_id, action and time range
+    """
+
+    SEGMENT_PREFIX = "consent-"
+    SEGMENT_SUFFIX = ".jsonl"
+
+    def __init__(self, log_dir: Path, max_segment_bytes: int = 16 * 1024 * 1024):
+        self.log_dir = Path(log_dir)
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self._lock = threading.Lock()
+
+    def segments(self) -> List[Path]:
+        """Segment files, oldest first"""
+        return sorted(self.log_dir.glob(f"{self.SEGMENT_PREFIX}*{self.SEGMENT_SUFFIX}"))
+
+    def _segment_path(self, index: int) -> Path:
+        return self.log_dir / f"{self.SEGMENT_PREFIX}{index:06d}{self.SEGMENT_SUFFIX}"
+
+    def _segment_index(self, path: Path) -> int:
+        return int(path.name[len(self.SEGMENT_PREFIX):-len(self.SEGMENT_SUFFIX)])
+
+    def _active_segment(self) -> Path:
+        """Current segment, rotating when it is full"""
+        segments = self.segments()
+        if not segments:
+            return self._segment_path(1)
+        current = segments[-1]
+        if current.stat().st_size >= self.max_segment_bytes:
+            return self._segment_path(self._segment_index(current) + 1)
+        return current
+
+    def append(self, entries: List[Dict]):
+        """Durably append entries (one write + fsync for the whole batch)"""
+        if not entries:
+            return
+        payload = "".join(
+            json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries
+        ).encode("utf-8")
+
+        with self._lock:
+            lock_fd = self._acquire_file_lock()
+            try:
+                path = self._active_segment()
+                fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    # An interrupted write can leave a torn last line without its newline;
+                    # terminate it so this batch does not get glued onto it and skipped
+                    torn = False
+                    if os.lseek(fd, 0, os.SEEK_END) > 0:
+                        os.lseek(fd, -1, os.SEEK_END)
+                        torn = os.read(fd, 1) != b"\n"
+                    view = memoryview(b"\n" + payload if torn else payload)
+                    while view:
+                        view = view[os.write(fd, view):]
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            finally:
+                self._release_file_lock(lock_fd)
+
+    def _acquire_file_lock(self) -> Optional[int]:
+        """Serialize rotation/appends across worker processes"""
+        if fcntl is None:
+            return None
+        fd = os.open(self.log_dir / ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return fd
+
+    def _release_file_lock(self, fd: Optional[int]):
+        if fd is None:
+            return
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def read(
+        self,
+        voice_id: Optional[str] = None,
+        action: Optional[str] = None,
+        since: Optional[Union[str, datetime]] = None,
+        until: Optional[Union[str, datetime]] = None
+    ) -> Iterator[Dict]:
+        """
+        Stream entries in write order, optionally filtered
+        since/until bound the ISO timestamp (inclusive/exclusive)
+        """
+        since = since.isoformat() if isinstance(since, datetime) else since
+        until = until.isoformat() if isinstance(until, datetime) else until
+
+        for path in self.segments():
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    # Cheap substring check before parsing
+                    if voice_id and voice_id not in line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn tail from an interrupted write
+                        continue
+                    if voice_id and entry.get("voice_id") != voice_id:
+                        continue
+                    if action and entry.get("action") != action:
+                        continue
+                    timestamp = entry.get("timestamp", "")
+                    if since and timestamp < since:
+                        continue
+                    if until and timestamp >= until:
+                        continue
+                    yield entry
+
+    def migrate_legacy(self, legacy_path: Path) -> int:
+        """
+        One-time import of the old consent_log.json array
+        The legacy file is renamed to *.migrated afterwards; returns entries imported
+        Holds the log's file lock, so only one of several starting workers imports it.
+        """
+        legacy_path = Path(legacy_path)
+        if not legacy_path.exists():
+            return 0
+
+        with self._lock:
+            lock_fd = self._acquire_file_lock()
+            try:
+                try:
+                    with open(legacy_path, "r") as f:
+                        entries = json.load(f)
+                except FileNotFoundError:
+                    # Another worker finished the migration while we waited for the lock
+                    return 0
+
+                # If segments already exist, a previous migration got as far as publishing
+                # segment 1 and only the rename below is left to do
+                imported = 0
+                if not self.segments():
+                    staged = self.log_dir / f".legacy{self.SEGMENT_SUFFIX}"
+                    with open(staged, "w", encoding="utf-8") as f:
+                        for entry in entries:
+                            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(staged, self._segment_path(1))
+                    imported = len(entries)
+
+                try:
+                    legacy_path.rename(legacy_path.with_name(legacy_path.name + ".migrated"))
+                except FileNotFoundError:
+                    # Renamed by a worker on a platform without file locks
+                    pass
+                return imported
+            finally:
+                self._release_file_lock(lock_fd)
@@ -0,0 +1,148 @@
+"""
+DSP Module
+Single-pass pitch and tempo modification for the emotional TTS engine
+"""
+
+from functools import lru_cache
+from typing import Optional
+import numpy as np
+
+# scipy.signal and librosa are imported inside the functions that need them: they dominate app import time
+
+# Tempo rates within this distance of 1.0 take the time-domain WSOLA path
+WSOLA_MAX_DEVIATION = 0.15
+
+
+@lru_cache(maxsize=8)
+def _hann(length: int) -> np.ndarray:
+    """Periodic Hann window (constant overlap-add at 50% and 75% overlap)"""
+    from scipy.signal import get_window
+    window = get_window("hann", length, fftbins=True).astype(np.float32)
+    window.setflags(write=False)
+    return window
+
+
+@lru_cache(maxsize=8)
+def _phase_advance(n_fft: int, hop_length: int) -> np.ndarray:
+    """Expected per-bin phase advance over one hop"""
+    advance = np.linspace(0, np.pi * hop_length, 1 + n_fft // 2)[:, np.newaxis]
+    advance.setflags(write=False)
+    return advance
+
+
+def phase_vocoder_stretch(
+    y: np.ndarray,
+    rate: float,
+    n_fft: int = 2048,
+    hop_length: int = 512
+) -> np.ndarray:
+    """
+    Time-stretch by rate (> 1.0 = faster) with a phase vocoder
+    Phase accumulation is vectorized over all output frames (one STFT, one ISTFT)
+    """
+    import librosa
+    window = _hann(n_fft)
+    stft = librosa.stft(y, n_fft=n_fft, hop_length=hop_length, window=window)
+    # Two silent frames so the interpolation below never reads past the end
+    stft = np.pad(stft, [(0, 0), (0, 2)])
+
+    steps = np.arange(0, stft.shape[1] - 2, rate)
+    index = steps.astype(int)
+    alpha = (steps - index)[np.newaxis, :]
+    left, right = stft[:, index], stft[:, index + 1]
+
+    magnitude = (1.0 - alpha) * np.abs(left) + alpha * np.abs(right)
+
+    advance = _phase_advance(n_fft, hop_length)
+    delta = np.angle(right) - np.angle(left) - advance
+    delta -= 2.0 * np.pi * np.round(delta / (2.0 * np.pi))
+    # Phase of output frame k: initial phase plus the increments of frames 0..k-1
+    increments = np.cumsum(advance + delta, axis=1)
+    phase = np.angle(stft[:, :1]) + np.concatenate(
+        [np.zeros_like(increments[:, :1]), increments[:, :-1]], axis=1
+    )
+
+    stretched = magnitude * np.exp(1j * phase)
+    length = int(round(len(y) / rate))
+    return librosa.istft(stretched, hop_length=hop_length, window=window, length=length)
+
+
+def wsola_stretch(
+    y: np.ndarray,
+    sr: int,
+    rate: float,
+    frame_ms: float = 40.0,
+    tolerance_ms: float = 10.0
+) -> np.ndarray:
+    """
+    Time-stretch by rate (> 1.0 = faster) with WSOLA in the time domain
+    Each frame is taken from within +-tolerance of its nominal position, at the
+    offset that best continues the previous frame, so no FFT round trip is needed
+    """
+    from scipy.signal import correlate
+
+    frame = max(2, int(sr * frame_ms / 1000) // 2 * 2)
+    tolerance = max(1, int(sr * tolerance_ms / 1000))
+    synthesis_hop = frame // 2
+    analysis_hop = synthesis_hop * rate
+    window = _hann(frame)
+
+    out_length = int(round(len(y) / rate))
+    n_frames = out_length // synthesis_hop + 1
+    padded = np.pad(y, (tolerance, 2 * (frame + tolerance)))
+
+    out = np.zeros(n_frames * synthesis_hop + frame, dtype=np.float32)
+    norm = np.zeros_like(out)
+    previous = tolerance
+    for k in range(n_frames):
+        nominal = tolerance + int(round(k * analysis_hop))
+        if nominal + tolerance + frame > len(padded):
+            break
+        if k == 0:
+            position = nominal
+        else:
+            natural = padded[previous + synthesis_hop:previous + synthesis_hop + frame]
+            region = padded[nominal - tolerance:nominal + tolerance + frame]
+            position = nominal - tolerance + int(np.argmax(correlate(region, natural, mode="valid")))
+
+        start = k * synthesis_hop
+        out[start:start + frame] += padded[position:position + frame] * window
+        norm[start:start + frame] += window
+        previous = position
+
+    out /= np.where(norm > 1e-3, norm, 1.0)
+    return out[:out_length]
+
+
+def shift_pitch_tempo(
+    y: np.ndarray,
+    sr: int,
+    pitch: float = 1.0,
+    speed: float = 1.0,
+    wsola_max_deviation: Optional[float] = None,
+    target_sr: Optional[int] = None
+) -> np.ndarray:
+    """
+    Apply a pitch ratio and a tempo rate in one pass
+    - Stretch by speed / pitch (phase vocoder, or WSOLA for small rates)
+    - One resample from sr * pitch to target_sr (default sr), which scales pitch
+      by `pitch`, brings the duration to len(y) / speed and converts to the output rate
+    """
+    import librosa
+    pitch = pitch if pitch > 0 else 1.0
+    speed = speed if speed > 0 else 1.0
+    target_sr = target_sr or sr
+    if pitch == 1.0 and speed == 1.0 and target_sr == sr:
+        return y
+
+    max_deviation = WSOLA_MAX_DEVIATION if wsola_max_deviation is None else wsola_max_deviation
+    rate = speed / pitch
+    if abs(rate - 1.0) > 1e-6:
+        if abs(rate - 1.0) <= max_deviation:
+            y = wsola_stretch(y, sr, rate)
+        else:
+            y = phase_vocoder_stretch(y, rate)
+
+    if pitch != 1.0 or target_sr != sr:
+        y = librosa.resample(y, orig_sr=sr * pitch, target_sr=target_sr)
+    return y
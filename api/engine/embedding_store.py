@@ -0,0 +1,326 @@
+"""
+Embedding Store Module
+One contiguous memory-mapped float32 matrix holding every voice embedding
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process use only
+    fcntl = None
+
+
+class EmbeddingStore:
+    """
+    Consolidated, memory-mapped voice embedding matrix
+    - embeddings-<gen>.f32: raw float32 rows, appended on registration
+    - embeddings-<gen>.ids: fixed-width voice_id per row (all zero = tombstone)
+    - embeddings.current: name of the live generation, swapped atomically on compaction
+    Rows are exposed as read-only views into a shared read-only mapping, so
+    several workers mapping the same file share page-cache pages.
+    Mutations hold an exclusive lock on embeddings.lock and first catch up with rows
+    other processes appended; refresh() does the same catch-up for readers.
+    """
+
+    ID_BYTES = 32
+    POINTER = "embeddings.current"
+    LOCK = "embeddings.lock"
+
+    def __init__(
+        self,
+        store_dir: Path,
+        dim: int = 256,
+        compact_min_tombstones: int = 64,
+        compact_ratio: float = 0.25
+    ):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.compact_min_tombstones = compact_min_tombstones
+        self.compact_ratio = compact_ratio
+
+        self._lock = threading.RLock()
+        self._rows: Dict[str, int] = {}
+        self._tombstones = 0
+        self._count = 0
+        self._matrix: Optional[np.memmap] = None
+        self._file_lock_depth = 0
+        with self._file_lock():
+            self._generation = self._read_pointer()
+            self._open()
+
+    # Files
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive inter-process lock for appends, tombstones and compaction (re-entrant)"""
+        if fcntl is None or self._file_lock_depth:
+            self._file_lock_depth += 1
+            try:
+                yield
+            finally:
+                self._file_lock_depth -= 1
+            return
+        with open(self.store_dir / self.LOCK, "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            self._file_lock_depth = 1
+            try:
+                yield
+            finally:
+                self._file_lock_depth = 0
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _read_pointer(self) -> int:
+        pointer = self.store_dir / self.POINTER
+        if pointer.exists():
+            return int(pointer.read_text().strip() or 0)
+        return 0
+
+    def _write_pointer(self, generation: int):
+        pointer = self.store_dir / self.POINTER
+        tmp_path = pointer.with_name(f".{pointer.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            f.write(str(generation))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, pointer)
+
+    def _vectors_path(self, generation: Optional[int] = None) -> Path:
+        generation = self._generation if generation is None else generation
+        return self.store_dir / f"embeddings-{generation}.f32"
+
+    def _ids_path(self, generation: Optional[int] = None) -> Path:
+        generation = self._generation if generation is None else generation
+        return self.store_dir / f"embeddings-{generation}.ids"
+
+    def _open(self, repair: bool = True):
+        """Build the id -> row index and map the matrix (repair only under the file lock)"""
+        vectors_path, ids_path = self._vectors_path(), self._ids_path()
+        row_bytes = self.dim * 4
+        vector_rows = vectors_path.stat().st_size // row_bytes if vectors_path.exists() else 0
+        id_rows = ids_path.stat().st_size // self.ID_BYTES if ids_path.exists() else 0
+
+        # A crash between the two appends leaves one file longer; drop the partial row
+        count = min(vector_rows, id_rows)
+        if repair and vectors_path.exists() and vectors_path.stat().st_size != count * row_bytes:
+            os.truncate(vectors_path, count * row_bytes)
+        if repair and ids_path.exists() and ids_path.stat().st_size != count * self.ID_BYTES:
+            os.truncate(ids_path, count * self.ID_BYTES)
+
+        self._rows = {}
+        self._tombstones = 0
+        if count:
+            raw_ids = np.fromfile(ids_path, dtype=f"S{self.ID_BYTES}", count=count)
+            for row, raw_id in enumerate(raw_ids):
+                if raw_id:
+                    self._rows[raw_id.decode("ascii")] = row
+                else:
+                    self._tombstones += 1
+        self._count = count
+        self._remap()
+
+    def refresh(self) -> bool:
+        """
+        Pick up rows appended (or a compaction done) by other processes
+        Returns True if the index changed; views fetched before a compaction must be re-fetched
+        """
+        with self._lock:
+            generation = self._read_pointer()
+            if generation != self._generation:
+                self._generation = generation
+                # Another process may be appending right now; never truncate from here
+                self._open(repair=False)
+                return True
+
+            ids_path = self._ids_path()
+            id_rows = ids_path.stat().st_size // self.ID_BYTES if ids_path.exists() else 0
+            vectors_path = self._vectors_path()
+            vector_rows = vectors_path.stat().st_size // (self.dim * 4) if vectors_path.exists() else 0
+            # Rows whose id has not been written yet are still being appended
+            count = min(id_rows, vector_rows)
+            if count <= self._count:
+                return False
+
+            with open(ids_path, "rb") as f:
+                f.seek(self._count * self.ID_BYTES)
+                raw_ids = np.frombuffer(f.read((count - self._count) * self.ID_BYTES), dtype=f"S{self.ID_BYTES}")
+            for offset, raw_id in enumerate(raw_ids):
+                if raw_id:
+                    self._rows[raw_id.decode("ascii")] = self._count + offset
+                else:
+                    self._tombstones += 1
+            self._count = count
+            self._remap()
+            return True
+
+    def discard(self, voice_ids: Iterable[str]):
+        """Drop ids another process already tombstoned (index only, no disk writes)"""
+        with self._lock:
+            for voice_id in voice_ids:
+                if self._rows.pop(voice_id, None) is not None:
+                    self._tombstones += 1
+
+    def _remap(self):
+        if self._count:
+            self._matrix = np.memmap(
+                self._vectors_path(), dtype=np.float32, mode="r", shape=(self._count, self.dim)
+            )
+        else:
+            self._matrix = None
+
+    # Access
+
+    def __contains__(self, voice_id: str) -> bool:
+        return voice_id in self._rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def get(self, voice_id: str) -> Optional[np.ndarray]:
+        """Zero-copy read-only view of one embedding"""
+        with self._lock:
+            row = self._rows.get(voice_id)
+            if row is None:
+                return None
+            return self._matrix[row]
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._rows)
+
+    # Mutation
+
+    def add(self, embeddings: Dict[str, np.ndarray]):
+        """Append embeddings (replacing any existing rows for the same ids)"""
+        if not embeddings:
+            return
+        with self._lock, self._file_lock():
+            self.refresh()
+            replaced = [voice_id for voice_id in embeddings if voice_id in self._rows]
+            if replaced:
+                self._tombstone(replaced)
+
+            vectors = np.zeros((len(embeddings), self.dim), dtype=np.float32)
+            raw_ids = np.zeros(len(embeddings), dtype=f"S{self.ID_BYTES}")
+            for i, (voice_id, vector) in enumerate(embeddings.items()):
+                encoded = voice_id.encode("ascii")
+                if len(encoded) > self.ID_BYTES:
+                    raise ValueError(f"Voice ID too long for embedding store: {voice_id}")
+                vector = np.asarray(vector, dtype=np.float32).ravel()
+                vectors[i, :min(len(vector), self.dim)] = vector[:self.dim]
+                raw_ids[i] = encoded
+
+            # Vectors first, ids second: an id row only ever points at a complete vector
+            self._append(self._vectors_path(), vectors.tobytes())
+            self._append(self._ids_path(), raw_ids.tobytes())
+
+            for i, voice_id in enumerate(embeddings):
+                self._rows[voice_id] = self._count + i
+            self._count += len(embeddings)
+            self._remap()
+
+    def remove(self, voice_ids: Iterable[str]) -> bool:
+        """
+        Tombstone embeddings and zero their data on disk
+        Returns True if the store was compacted (views must be re-fetched)
+        """
+        with self._lock, self._file_lock():
+            self.refresh()
+            removed = [voice_id for voice_id in voice_ids if voice_id in self._rows]
+            if not removed:
+                return False
+            self._tombstone(removed)
+            if self._needs_compaction():
+                self.compact()
+                return True
+            return False
+
+    def _tombstone(self, voice_ids: List[str]):
+        """Zero rows and ids in place (lock must be held)"""
+        row_bytes = self.dim * 4
+        zero_row = bytes(row_bytes)
+        zero_id = bytes(self.ID_BYTES)
+        with open(self._vectors_path(), "r+b") as vectors, open(self._ids_path(), "r+b") as ids:
+            for voice_id in voice_ids:
+                row = self._rows.pop(voice_id)
+                vectors.seek(row * row_bytes)
+                vectors.write(zero_row)
+                ids.seek(row * self.ID_BYTES)
+                ids.write(zero_id)
+                self._tombstones += 1
+            vectors.flush()
+            os.fsync(vectors.fileno())
+            ids.flush()
+            os.fsync(ids.fileno())
+
+    def _needs_compaction(self) -> bool:
+        return (
+            self._tombstones >= self.compact_min_tombstones
+            and self._tombstones >= self.compact_ratio * self._count
+        )
+
+    def compact(self):
+        """Rewrite live rows into a new generation and switch to it atomically"""
+        with self._lock, self._file_lock():
+            self.refresh()
+            # Rows other processes tombstoned are zero on disk even if still indexed here
+            disk_ids = np.fromfile(self._ids_path(), dtype=f"S{self.ID_BYTES}", count=self._count) if self._count else []
+            live = sorted(
+                ((voice_id, row) for voice_id, row in self._rows.items() if disk_ids[row] == voice_id.encode("ascii")),
+                key=lambda item: item[1]
+            )
+            generation = self._generation + 1
+            vectors = (
+                np.asarray(self._matrix[[row for _, row in live]], dtype=np.float32)
+                if live else np.empty((0, self.dim), dtype=np.float32)
+            )
+            raw_ids = np.array([voice_id.encode("ascii") for voice_id, _ in live], dtype=f"S{self.ID_BYTES}")
+
+            self._write_file(self._vectors_path(generation), vectors.tobytes())
+            self._write_file(self._ids_path(generation), raw_ids.tobytes())
+            self._write_pointer(generation)
+
+            old_vectors, old_ids = self._vectors_path(), self._ids_path()
+            self._generation = generation
+            self._rows = {voice_id: row for row, (voice_id, _) in enumerate(live)}
+            self._count = len(live)
+            self._tombstones = 0
+            self._remap()
+
+            # Existing views keep the old mapping alive until released
+            old_vectors.unlink(missing_ok=True)
+            old_ids.unlink(missing_ok=True)
+
+    @staticmethod
+    def _append(path: Path, payload: bytes):
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    @staticmethod
+    def _write_file(path: Path, payload: bytes):
+        with open(path, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "voices": len(self._rows),
+                "rows": self._count,
+                "tombstones": self._tombstones,
+                "generation": self._generation,
+                "bytes": self._count * self.dim * 4
+            }
@@ -3,13 +3,50 @@ Emotional TTS Engine Module
 Provides emotional control for text-to-speech synthesis
 """
 
-from gtts import gTTS
-from pydub import AudioSegment
 import numpy as np
-import io
-import librosa
-import soundfile as sf
-from typing import Optional
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+from .cache import BaseAudioCache
+from .dsp import shift_pitch_tempo
+from .encoder import encode_audio, output_sample_rate
+from .metrics import timed
+from .synthesizers import BaseSynthesizer, create_synthesizer
+
+
+# Emotion presets (default speed, pitch and energy per emotion)
+EMOTIONS: Dict[str, Dict[str, float]] = {
+    'neutral': {'speed': 1.0, 'pitch': 1.0, 'energy': 1.0},
+    'happy': {'speed': 1.2, 'pitch': 1.1, 'energy': 1.2},
+    'sad': {'speed': 0.8, 'pitch': 0.9, 'energy': 0.7},
+    'angry': {'speed': 1.3, 'pitch': 1.2, 'energy': 1.5},
+    'calm': {'speed': 0.9, 'pitch': 0.95, 'energy': 0.8},
+    'excited': {'speed': 1.4, 'pitch': 1.15, 'energy': 1.4},
+    'fearful': {'speed': 1.1, 'pitch': 1.3, 'energy': 0.9},
+    'confident': {'speed': 1.0, 'pitch': 0.95, 'energy': 1.1}
+}
+
+# Sentence boundaries: terminal punctuation followed by whitespace, or line breaks
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?\u2026\u3002])\s+|\n+')
+
+
+def split_sentences(text: str, max_chars: int = 200) -> List[str]:
+    """
+    Split text into sentence-sized chunks for incremental synthesis
+    Overlong sentences are broken at the last comma or space before max_chars
+    """
+    chunks = []
+    for sentence in _SENTENCE_BOUNDARY.split(text):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            cut = max(sentence.rfind(',', 0, max_chars), sentence.rfind(' ', 0, max_chars))
+            if cut <= 0:
+                cut = max_chars - 1
+            chunks.append(sentence[:cut + 1].strip())
+            sentence = sentence[cut + 1:].strip()
+        if sentence:
+            chunks.append(sentence)
+    return chunks
 
 
 class EmotionalTTSEngine:
@@ -18,17 +55,14 @@ class EmotionalTTSEngine:
     Supports speed, pitch, energy, and emotional tone control
     """
     
-    def __init__(self):
-        self.emotions = {
-            'neutral': {'speed': 1.0, 'pitch': 1.0, 'energy': 1.0},
-            'happy': {'speed': 1.2, 'pitch': 1.1, 'energy': 1.2},
-            'sad': {'speed': 0.8, 'pitch': 0.9, 'energy': 0.7},
-            'angry': {'speed': 1.3, 'pitch': 1.2, 'energy': 1.5},
-            'calm': {'speed': 0.9, 'pitch': 0.95, 'energy': 0.8},
-            'excited': {'speed': 1.4, 'pitch': 1.15, 'energy': 1.4},
-            'fearful': {'speed': 1.1, 'pitch': 1.3, 'energy': 0.9},
-            'confident': {'speed': 1.0, 'pitch': 0.95, 'energy': 1.1}
-        }
+    def __init__(self, base_cache_bytes: int = 128 * 1024 * 1024, backend: Optional[str] = None):
+        # Base synthesizer backend ("gtts" or the offline "formant"), overridable per request
+        self.default_backend = backend or os.getenv("VOXLABS_TTS_BACKEND", "gtts")
+        self._synthesizers: Dict[str, BaseSynthesizer] = {}
+        
+        # Decoded base renders, shared across emotion/DSP variations of a line
+        self.base_cache = BaseAudioCache(max_bytes=base_cache_bytes)
+        self.emotions = {name: dict(preset) for name, preset in EMOTIONS.items()}
     
     def synthesize(
         self,
@@ -37,9 +71,47 @@ class EmotionalTTSEngine:
         emotion: str = 'neutral',
         speed: Optional[float] = None,
         pitch: Optional[float] = None,
-        energy: Optional[float] = None
+        energy: Optional[float] = None,
+        backend: Optional[str] = None,
+        format: str = 'mp3',
+        sample_rate: Optional[int] = None,
+        channels: int = 1,
+        bitrate: Optional[int] = None,
+        bit_depth: Optional[int] = None,
+        stream: bool = False
     ) -> bytes:
-        """Synthesize speech with emotional control"""
+        """
+        Synthesize speech with emotional control
+        Output options are applied at the end: one resample (fused with the
+        pitch stage) to the output rate, then a single encode
+        stream=True encodes one chunk of a sentence stream (see encode_audio)
+        Stages are timed into voxlabs_stage_seconds (see engine/metrics.py)
+        """
+        final_speed, final_pitch, final_energy = self._resolve_params(emotion, speed, pitch, energy)
+        
+        try:
+            # Base TTS waveform (cached per backend/text/language)
+            with timed("base_tts"):
+                y, sr = self.render_base(text, language, backend)
+            out_sr = output_sample_rate(format, sr, sample_rate)
+            y = self.modulate(y, sr, final_speed, final_pitch, final_energy, target_sr=out_sr)
+            with timed("encode"):
+                return self._encode(
+                    y, out_sr, format, channels=channels, bitrate=bitrate, bit_depth=bit_depth, stream=stream
+                )
+            
+        except Exception as e:
+            print(f"TTS Error: {str(e)}")
+            raise e
+    
+    def _resolve_params(
+        self,
+        emotion: str,
+        speed: Optional[float],
+        pitch: Optional[float],
+        energy: Optional[float]
+    ) -> Tuple[float, float, float]:
+        """Merge emotion presets with explicit overrides"""
         # Get emotion parameters
         emotion_params = self.emotions.get(emotion, self.emotions['neutral'])
         
@@ -47,60 +119,69 @@ class EmotionalTTSEngine:
         final_speed = speed if speed is not None else emotion_params['speed']
         final_pitch = pitch if pitch is not None else emotion_params['pitch']
         final_energy = energy if energy is not None else emotion_params['energy']
-        
-        try:
-            # Generate base TTS using gTTS
-            tts = gTTS(text=text, lang=language, slow=False)
-            audio_fp = io.BytesIO()
-            tts.write_to_fp(audio_fp)
-            audio_fp.seek(0)
-            
-            # Load into librosa (resample to 22050Hz handled by default, or keep native if flexible)
-            # librosa.load returns (y, sr)
-            y, sr = librosa.load(audio_fp, sr=None)
-            
-            # Apply modulations
-            
-            # 1. Pitch Shift
-            # librosa.effects.pitch_shift takes semitones (n_steps)
-            # pitch ratio 1.0 -> 0 steps
-            # pitch ratio 2.0 -> 12 steps
-            # formula: n_steps = 12 * log2(pitch_ratio)
-            if final_pitch != 1.0 and final_pitch > 0:
-                n_steps = 12 * np.log2(final_pitch)
-                y = librosa.effects.pitch_shift(y, sr=sr, n_steps=n_steps)
-
-            # 2. Speed Shift (Time Stretch)
-            # librosa.effects.time_stretch(y, rate)
-            # rate > 1.0 = faster
-            if final_speed != 1.0 and final_speed > 0:
-                y = librosa.effects.time_stretch(y, rate=final_speed)
+        return final_speed, final_pitch, final_energy
+    
+    def modulate(
+        self,
+        y: np.ndarray,
+        sr: int,
+        speed: float = 1.0,
+        pitch: float = 1.0,
+        energy: float = 1.0,
+        target_sr: Optional[int] = None
+    ) -> np.ndarray:
+        """Apply pitch, speed and energy modulation, returning audio at target_sr (default sr)"""
+        # 1-2. Pitch and Speed in one pass
+        # pitch is a frequency ratio (2.0 = one octave up), speed a tempo rate (> 1.0 = faster)
+        # One stretch by speed/pitch plus one resample replaces librosa's
+        # pitch_shift (stretch + resample) followed by a second time_stretch
+        with timed("pitch_tempo"):
+            y = shift_pitch_tempo(y, sr, pitch=pitch, speed=speed, target_sr=target_sr)
 
-            # 3. Energy (Volume Gain)
-            # Simple amplitude scaling
-            if final_energy != 1.0 and final_energy > 0:
-                y = y * final_energy
+        # 3. Energy (Volume Gain)
+        # Simple amplitude scaling
+        if energy != 1.0 and energy > 0:
+            with timed("gain"):
+                y = y * energy
                 # Clip to avoid distortion
                 max_val = np.abs(y).max()
                 if max_val > 1.0:
                     y = y / max_val
-            
-            # Convert back to MP3
-            # Current pipeline: numpy -> wav buffer -> pydub -> mp3 buffer
-            
-            wav_buffer = io.BytesIO()
-            sf.write(wav_buffer, y, sr, format='WAV')
-            wav_buffer.seek(0)
-            
-            audio_segment = AudioSegment.from_wav(wav_buffer)
-            
-            output = io.BytesIO()
-            audio_segment.export(output, format="mp3")
-            return output.getvalue()
-            
-        except Exception as e:
-            print(f"TTS Error: {str(e)}")
-            raise e
+        
+        return y
+    
+    def _encode(self, y: np.ndarray, sr: int, format: str = 'mp3', **options) -> bytes:
+        """Encode a waveform in-process (libsndfile, no ffmpeg subprocess)"""
+        return encode_audio(y, sr, format, **options)
+    
+    def render_base(
+        self,
+        text: str,
+        language: str = 'en',
+        backend: Optional[str] = None
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Get the decoded base TTS waveform, rendering only on a cache miss
+        The returned array is read-only and shared between callers
+        """
+        backend = backend or self.default_backend
+        cached = self.base_cache.get(text, language, backend)
+        if cached is not None:
+            return cached
+        
+        with timed(f"base_render_{backend}"):
+            y, sr = self.get_synthesizer(backend).synthesize(text, language)
+        y = self.base_cache.put(text, language, y, sr, backend)
+        return y, sr
+    
+    def get_synthesizer(self, backend: Optional[str] = None) -> BaseSynthesizer:
+        """Get (or create) the base synthesizer for a backend name"""
+        backend = backend or self.default_backend
+        synthesizer = self._synthesizers.get(backend)
+        if synthesizer is None:
+            synthesizer = create_synthesizer(backend)
+            self._synthesizers[backend] = synthesizer
+        return synthesizer
     
     def get_emotions(self) -> dict:
         """Get dict of available emotions with their default parameters"""
@@ -0,0 +1,317 @@
+"""
+Audio Encoder Module
+In-process encoding of float32 waveforms through libsndfile (no ffmpeg subprocess)
+"""
+
+import io
+from typing import Dict, Optional
+import numpy as np
+import soundfile as sf
+
+
+WATERMARK = "AI-Generated by Voice-Synth Engine"
+
+MP3_SAMPLE_RATES = (8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000)
+# MPEG audio frame header tables (Layer III): kbps by version and index, Hz by version
+MP3_BITRATES = {
+    "1": (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    "2": (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+}
+MP3_FRAME_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+MIN_SAMPLE_RATE = 8000
+MAX_SAMPLE_RATE = 48000
+
+# Output formats
+# - format/subtype: libsndfile container and codec
+# - media_type/extension: HTTP content type and file suffix
+# - sample_rates: rates the codec accepts (None = any within MIN/MAX_SAMPLE_RATE)
+# - default_sample_rate: used when the client does not ask for one (None = native rate)
+# - bit_depths: selectable PCM sample widths (lossless formats only)
+# - streamable: whether per-sentence chunks concatenate into one valid stream
+AUDIO_FORMATS: Dict[str, Dict] = {
+    "mp3": {
+        "format": "MP3", "subtype": "MPEG_LAYER_III", "media_type": "audio/mpeg", "extension": ".mp3",
+        "sample_rates": MP3_SAMPLE_RATES, "default_sample_rate": None, "bit_depths": (), "streamable": True
+    },
+    "opus": {
+        "format": "OGG", "subtype": "OPUS", "media_type": "audio/ogg", "extension": ".opus",
+        "sample_rates": OPUS_SAMPLE_RATES, "default_sample_rate": None, "bit_depths": (), "streamable": False
+    },
+    "ogg": {
+        "format": "OGG", "subtype": "VORBIS", "media_type": "audio/ogg", "extension": ".ogg",
+        "sample_rates": None, "default_sample_rate": None, "bit_depths": (), "streamable": False
+    },
+    "flac": {
+        "format": "FLAC", "subtype": "PCM_16", "media_type": "audio/flac", "extension": ".flac",
+        "sample_rates": None, "default_sample_rate": None, "bit_depths": (16, 24), "streamable": False
+    },
+    "wav": {
+        "format": "WAV", "subtype": "PCM_16", "media_type": "audio/wav", "extension": ".wav",
+        "sample_rates": None, "default_sample_rate": None, "bit_depths": (16, 24, 32), "streamable": False
+    },
+    # Headerless little-endian linear PCM (audio/L16 and friends)
+    "pcm": {
+        "format": "RAW", "subtype": "PCM_16", "media_type": "audio/L16", "extension": ".pcm",
+        "sample_rates": None, "default_sample_rate": 16000, "bit_depths": (16, 24, 32), "streamable": True
+    },
+    # Headerless G.711 mu-law, the usual telephony payload
+    "mulaw": {
+        "format": "RAW", "subtype": "ULAW", "media_type": "audio/basic", "extension": ".ulaw",
+        "sample_rates": None, "default_sample_rate": 8000, "bit_depths": (), "streamable": True
+    }
+}
+
+# Accept-header media types (lower case, without parameters) -> format name
+MEDIA_TYPES = {
+    "audio/mpeg": "mp3", "audio/mp3": "mp3",
+    "audio/opus": "opus", "audio/ogg": "ogg", "audio/vorbis": "ogg",
+    "audio/flac": "flac", "audio/x-flac": "flac",
+    "audio/wav": "wav", "audio/wave": "wav", "audio/x-wav": "wav", "audio/vnd.wave": "wav",
+    "audio/l16": "pcm", "audio/pcm": "pcm",
+    "audio/basic": "mulaw", "audio/pcmu": "mulaw", "audio/x-mulaw": "mulaw"
+}
+
+# Approximate (max, min) kbps per channel that libsndfile's compression level spans
+BITRATE_RANGES = {
+    "opus": (256, 6)
+}
+
+
+def get_format(name: str) -> Dict:
+    """Look up an output format by name"""
+    spec = AUDIO_FORMATS.get(name.lower()) if name else None
+    if spec is None:
+        raise ValueError(f"Unsupported audio format: {name}. Available: {', '.join(AUDIO_FORMATS)}")
+    return spec
+
+
+def resolve_output(
+    format: str = "mp3",
+    sample_rate: Optional[int] = None,
+    channels: int = 1,
+    bitrate: Optional[int] = None,
+    bit_depth: Optional[int] = None
+) -> Dict:
+    """
+    Validate and normalize output options
+    Returns the options that become part of the synthesis parameters (and cache key)
+    """
+    format = (format or "mp3").lower()
+    spec = get_format(format)
+
+    sample_rate = sample_rate or spec["default_sample_rate"]
+    if sample_rate is not None:
+        sample_rate = int(sample_rate)
+        allowed = spec["sample_rates"]
+        if allowed is not None and sample_rate not in allowed:
+            raise ValueError(
+                f"{format} does not support {sample_rate} Hz. Use one of: {', '.join(map(str, allowed))}"
+            )
+        if not MIN_SAMPLE_RATE <= sample_rate <= MAX_SAMPLE_RATE:
+            raise ValueError(f"sample_rate must be between {MIN_SAMPLE_RATE} and {MAX_SAMPLE_RATE} Hz")
+
+    channels = int(channels or 1)
+    if channels not in (1, 2):
+        raise ValueError("channels must be 1 or 2")
+
+    if bitrate is not None:
+        if format not in ("mp3", "opus"):
+            raise ValueError("bitrate only applies to mp3 and opus")
+        bitrate = int(bitrate)
+        if bitrate <= 0:
+            raise ValueError("bitrate must be positive (kbps)")
+
+    if bit_depth is not None:
+        bit_depth = int(bit_depth)
+        if bit_depth not in spec["bit_depths"]:
+            supported = ", ".join(map(str, spec["bit_depths"])) or "none"
+            raise ValueError(f"{format} does not support {bit_depth}-bit output (supported: {supported})")
+
+    return {
+        "format": format,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "bitrate": bitrate,
+        "bit_depth": bit_depth
+    }
+
+
+def output_sample_rate(format: str, sr: int, sample_rate: Optional[int] = None) -> int:
+    """
+    Final sample rate for a waveform rendered at sr
+    Falls back to the closest higher rate the codec supports
+    """
+    if sample_rate:
+        return int(sample_rate)
+    allowed = get_format(format)["sample_rates"]
+    if allowed is None or sr in allowed:
+        return sr
+    return next((rate for rate in allowed if rate >= sr), allowed[-1])
+
+
+def media_type(format: str, sample_rate: Optional[int] = None, channels: int = 1) -> str:
+    """HTTP content type, with rate/channels parameters for headerless formats"""
+    spec = get_format(format)
+    if spec["format"] == "RAW" and sample_rate:
+        return f"{spec['media_type']};rate={sample_rate};channels={channels}"
+    return spec["media_type"]
+
+
+def negotiate_format(accept: Optional[str]) -> Optional[Dict]:
+    """
+    Pick an output format from an Accept header
+    Returns None when the header expresses no audio preference (missing, */*, audio/*
+    or non-audio types only); raises ValueError when it lists only unsupported audio types
+    """
+    if not accept:
+        return None
+
+    candidates = []
+    wildcard = False
+    for position, item in enumerate(accept.split(",")):
+        parts = [part.strip() for part in item.split(";")]
+        kind = parts[0].lower()
+        params = {}
+        for part in parts[1:]:
+            if "=" in part:
+                key, value = part.split("=", 1)
+                params[key.strip().lower()] = value.strip().strip('"')
+        try:
+            quality = float(params.pop("q", 1.0))
+        except ValueError:
+            quality = 1.0
+        if quality <= 0:
+            continue
+        if kind in ("*/*", "audio/*"):
+            wildcard = True
+            continue
+        if not kind.startswith("audio/"):
+            continue
+
+        name = MEDIA_TYPES.get(kind)
+        if kind == "audio/ogg" and "opus" in params.get("codecs", "").lower():
+            name = "opus"
+        candidates.append((-quality, position, kind, name, params))
+
+    if not candidates:
+        return None
+    for _, _, _, name, params in sorted(candidates):
+        if name is None:
+            continue
+        negotiated = {"format": name}
+        if params.get("rate", "").isdigit():
+            negotiated["sample_rate"] = int(params["rate"])
+        if params.get("channels", "").isdigit():
+            negotiated["channels"] = int(params["channels"])
+        return negotiated
+    if wildcard:
+        return None
+    raise ValueError(f"None of the requested audio types are supported: {accept}")
+
+
+def _compression_level(format: str, bitrate: int, sr: int, channels: int) -> float:
+    """Map a target bitrate (kbps) onto libsndfile's 0..1 compression level"""
+    if format == "mp3":
+        # MPEG-1 above 32 kHz, MPEG-2 at 16-24 kHz, MPEG-2.5 below
+        high, low = (320, 32) if sr >= 32000 else (160, 8) if sr >= 16000 else (64, 8)
+    else:
+        high, low = BITRATE_RANGES[format]
+        high, low = high * channels, low * channels
+    level = (high - bitrate) / (high - low)
+    return float(min(max(level, 0.0), 0.99))
+
+
+def encode_audio(
+    y: np.ndarray,
+    sr: int,
+    format: str = "mp3",
+    channels: int = 1,
+    bitrate: Optional[int] = None,
+    bit_depth: Optional[int] = None,
+    comment: Optional[str] = WATERMARK,
+    stream: bool = False
+) -> bytes:
+    """
+    Encode a mono float32 waveform in one pass
+    The comment (ID3 for MP3, Vorbis comment for Ogg/FLAC, INFO chunk for WAV)
+    carries the AI-generated watermark, so no second transcode is needed to tag it.
+    Callers should render at output_sample_rate(); other rates are resampled here.
+    stream=True encodes one chunk of a longer stream: no comment and, for MP3, no
+    Xing/LAME info frame (its frame count and duration would describe only this chunk).
+    """
+    format = format.lower()
+    spec = get_format(format)
+    y = np.asarray(y, dtype=np.float32)
+
+    target_sr = output_sample_rate(format, sr)
+    if target_sr != sr:
+        import librosa
+        y = librosa.resample(y, orig_sr=sr, target_sr=target_sr)
+        sr = target_sr
+
+    y = np.clip(y, -1.0, 1.0)
+    if channels == 2:
+        y = np.column_stack([y, y])
+
+    subtype = f"PCM_{bit_depth}" if bit_depth else spec["subtype"]
+    options = {}
+    if bitrate:
+        options["compression_level"] = _compression_level(format, bitrate, sr, channels)
+        options["bitrate_mode"] = "CONSTANT" if format == "mp3" else None
+    raw = spec["format"] == "RAW"
+
+    output = io.BytesIO()
+    with sf.SoundFile(
+        output, "w", samplerate=sr, channels=channels, format=spec["format"], subtype=subtype,
+        endian="LITTLE" if raw else None, **options
+    ) as f:
+        # Headerless formats have nowhere to put metadata
+        if comment and not raw and not stream:
+            f.comment = comment
+        f.write(y)
+    data = output.getvalue()
+    if stream and format == "mp3":
+        data = strip_mp3_info_frame(data)
+    return data
+
+
+def _mp3_frame_length(header: bytes) -> Optional[int]:
+    """Byte length of the Layer III frame starting with header (None if not a frame header)"""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    kbps = MP3_BITRATES["1" if version == 3 else "2"][bitrate_index]
+    sr = MP3_FRAME_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 0x01
+    return (144 if version == 3 else 72) * kbps * 1000 // sr + padding
+
+
+def strip_mp3_info_frame(data: bytes) -> bytes:
+    """
+    Drop the leading Xing/Info (LAME) frame of an MP3 file
+    That frame is silent and only describes the file it starts; inside a stream of
+    concatenated chunks it would be decoded as a gap and confuse duration/seek logic.
+    """
+    length = _mp3_frame_length(data[:4])
+    if length is None:
+        return data
+    frame = data[:length]
+    if b"Xing" in frame or b"Info" in frame:
+        return data[length:]
+    return data
+
+
+def id3_comment_tag(comment: str) -> bytes:
+    """ID3v2.3 tag holding a single COMM frame (prepended to MP3 data as-is)"""
+    body = b"\x00" + b"eng" + b"\x00" + comment.encode("latin-1", "replace")
+    frame = b"COMM" + len(body).to_bytes(4, "big") + b"\x00\x00" + body
+    size = len(frame)
+    # Tag size is a 28-bit "syncsafe" integer (7 bits per byte)
+    syncsafe = bytes((size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    return b"ID3\x03\x00\x00" + syncsafe + frame
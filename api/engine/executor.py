@@ -0,0 +1,188 @@
+"""
+Worker Pool Module
+Runs blocking synthesis and feature extraction off the asyncio event loop
+"""
+
+import os
+import asyncio
+import functools
+import threading
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import call_with_stages, record_stages
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when the pool already holds its maximum number of pending tasks"""
+
+
+class WorkerPool:
+    """
+    Bounded executor for CPU-heavy and blocking work
+    - "thread" mode shares in-process caches (librosa/numpy release the GIL for most DSP)
+    - "process" mode isolates numba/librosa work per core; tasks must be picklable
+      module-level functions
+    - At most max_workers + max_queue tasks are admitted; beyond that submissions
+      fail fast with PoolSaturatedError so callers can answer 429
+    - Each task is awaited with a timeout
+    - Stage timings recorded inside a task are handed back to the caller's context,
+      so they reach this process's metrics and the request's Server-Timing header
+    """
+
+    def __init__(
+        self,
+        mode: str = "thread",
+        max_workers: Optional[int] = None,
+        max_queue: int = 16,
+        timeout: Optional[float] = 60.0
+    ):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown worker mode: {mode}")
+
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._executor: Executor
+        if mode == "process":
+            # spawn avoids forking a process that already runs numba/BLAS threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="voxlabs-worker"
+            )
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of running plus queued tasks"""
+        return self.max_workers + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        """Tasks currently running or queued"""
+        return self._in_flight
+
+    def _admit(self):
+        """Take one slot or fail fast with PoolSaturatedError"""
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.rejected += 1
+                raise PoolSaturatedError("Server is busy, please retry shortly")
+            self._in_flight += 1
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) in the pool and await its result"""
+        self._admit()
+        return await self._execute(fn, args, kwargs, self._task_done)
+
+    def reserve(self) -> "PoolSlot":
+        """
+        Hold one slot for a sequence of tasks (e.g. the sentences of a stream)
+        Admission is checked once here; tasks run through the slot never fail with
+        PoolSaturatedError. Raises PoolSaturatedError if the pool is full.
+        """
+        self._admit()
+        return PoolSlot(self)
+
+    async def _execute(self, fn: Callable, args: tuple, kwargs: dict, on_done: Callable) -> Any:
+        """Submit to the executor (slot already taken) and await the result"""
+        try:
+            future = self._executor.submit(call_with_stages, functools.partial(fn, *args, **kwargs))
+        except Exception:
+            on_done(None)
+            raise
+        # Release the slot when the work really finishes, not when the caller gives up,
+        # so timed-out tasks still count against capacity while they occupy a worker
+        future.add_done_callback(on_done)
+
+        try:
+            result, stages = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise
+        record_stages(stages)
+        return result
+
+    def _task_done(self, future):
+        with self._lock:
+            self._in_flight -= 1
+            if future is not None and not future.cancelled():
+                self.completed += 1
+
+    def _task_done_in_slot(self, future):
+        with self._lock:
+            if future is not None and not future.cancelled():
+                self.completed += 1
+
+    def stats(self) -> Dict:
+        """Pool configuration and counters"""
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.max_workers),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timeouts": self.timeouts
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and release workers"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class PoolSlot:
+    """
+    One admitted WorkerPool slot held across several tasks
+    The slot is returned once release() was called and its last task has finished.
+    """
+
+    def __init__(self, pool: WorkerPool):
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._released = False
+        self._freed = False
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on this slot and await its result"""
+        with self._lock:
+            if self._released:
+                raise RuntimeError("Pool slot already released")
+            self._pending += 1
+        return await self._pool._execute(fn, args, kwargs, self._task_done)
+
+    def _task_done(self, future):
+        self._pool._task_done_in_slot(future)
+        with self._lock:
+            self._pending -= 1
+        self._maybe_free()
+
+    def release(self):
+        """Give the slot back (idempotent)"""
+        with self._lock:
+            self._released = True
+        self._maybe_free()
+
+    def _maybe_free(self):
+        with self._lock:
+            if not self._released or self._pending or self._freed:
+                return
+            self._freed = True
+        self._pool._task_done(None)
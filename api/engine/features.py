@@ -0,0 +1,383 @@
+"""
+Voice Feature Extraction Module
+Fixed-size speaker embeddings from reference audio
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+import numpy as np
+import soundfile as sf
+
+from .metrics import timed
+
+# librosa (numba) and soxr are imported inside the functions that need them, so
+# importing the API does not load them; warm-up or the first extraction does
+
+
+# Embedding layout (256 dims, float32; pooled stats interleave mean, std per row)
+#   [0:8]     f0 stats: mean, std, min, max, median, p10, p90, voiced ratio
+#   [8:128]   MFCC(20) mean/std, delta mean/std, delta-delta mean/std
+#   [128:140] spectral centroid/bandwidth/rolloff/flatness, zcr, rms (mean, std)
+#   [140:154] spectral contrast (7 bands, mean, std)
+#   [154:178] f0 histogram (24 log-spaced bins, normalized)
+#   [178:242] long-term average log-mel spectrum (64 bands)
+#   [242:256] reserved (zero)
+# Index 0 (mean f0 in Hz) matches the convention used by the default voices.
+FEATURE_DIM = 256
+SAMPLE_RATE = 22050
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MFCC = 20
+N_MELS = 64
+F0_MIN = 50.0
+F0_MAX = 500.0
+F0_BINS = 24
+F0_EDGES = np.geomspace(F0_MIN, F0_MAX, F0_BINS + 1)
+
+# Fine f0 histogram for running quantiles; nests exactly inside the 24 output bins
+F0_FINE_PER_BIN = 50
+F0_FINE_EDGES = np.geomspace(F0_MIN, F0_MAX, F0_BINS * F0_FINE_PER_BIN + 1)
+
+# Embedding groups compared for early stopping (relative change per group)
+EMBEDDING_GROUPS = [(0, 8), (8, 128), (128, 140), (140, 154), (154, 178), (178, 242)]
+
+# Layout of legacy {voice_id}_features.npy files: [0:13] MFCC(13) means, [13] mean f0
+# (piptrack), zero padding. Voices migrated from it are flagged with this metadata value.
+LEGACY_F0_INDEX = 13
+LEGACY_LAYOUT = "legacy"
+
+# Streaming extraction defaults
+BLOCK_SECONDS = 10.0
+CONVERGE_MIN_SECONDS = 60.0
+CONVERGE_TOL = 0.005
+CONVERGE_PATIENCE = 3
+
+
+@timed("voice_features")
+def extract_voice_features(
+    audio_path: str,
+    early_stop: bool = True,
+    block_seconds: float = BLOCK_SECONDS,
+    min_seconds: float = CONVERGE_MIN_SECONDS,
+    tolerance: float = CONVERGE_TOL,
+    patience: int = CONVERGE_PATIENCE
+) -> np.ndarray:
+    """
+    Extract voice features from audio file
+    Uses MFCC + pitch + spectral features for voice characterization
+    The file is decoded and resampled block by block into running statistics, so
+    memory does not grow with recording length. With early_stop, reading ends once
+    every embedding group has changed by less than `tolerance` (relative) for
+    `patience` consecutive blocks, after at least min_seconds of audio.
+    """
+    try:
+        source = sf.SoundFile(audio_path)
+    except sf.LibsndfileError:
+        # Containers libsndfile cannot read: decode in one go (audioread fallback)
+        import librosa
+        y, sr = librosa.load(audio_path, sr=SAMPLE_RATE)
+        return embed_signal(y, sr)
+
+    accumulator = FeatureAccumulator()
+    framer = _BlockFramer()
+    previous = None
+    stable = 0
+    with source:
+        for block in _resampled_blocks(source, block_seconds):
+            for chunk in framer.push(block):
+                accumulator.add_signal(chunk)
+            if not early_stop or accumulator.seconds < min_seconds:
+                continue
+
+            current = accumulator.embedding()
+            if previous is not None and _relative_change(previous, current) < tolerance:
+                stable += 1
+                if stable >= patience:
+                    return current
+            else:
+                stable = 0
+            previous = current
+
+    tail = framer.flush()
+    if tail is not None:
+        accumulator.add_signal(tail)
+    return accumulator.embedding()
+
+
+def extract_features_batch(audio_paths: List[str], max_workers: Optional[int] = None) -> List[np.ndarray]:
+    """Extract features for many files in parallel across cores (order preserved)"""
+    if len(audio_paths) <= 1 or max_workers == 1:
+        return [extract_voice_features(path) for path in audio_paths]
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        return list(pool.map(extract_voice_features, audio_paths))
+
+
+def from_legacy_layout(vector: np.ndarray) -> np.ndarray:
+    """
+    Carry a legacy feature vector over into the current layout
+    Only mean f0 maps across (the old MFCCs used 13 coefficients of a different
+    filterbank), so every other group is left at zero.
+    """
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    embedding = np.zeros(FEATURE_DIM, dtype=np.float32)
+    if len(vector) > LEGACY_F0_INDEX and np.isfinite(vector[LEGACY_F0_INDEX]):
+        embedding[0] = vector[LEGACY_F0_INDEX]
+    return embedding
+
+
+def embed_signal(y: np.ndarray, sr: int = SAMPLE_RATE) -> np.ndarray:
+    """Compute the fixed-size embedding of an in-memory mono signal"""
+    import librosa
+    if sr != SAMPLE_RATE:
+        y = librosa.resample(y, orig_sr=sr, target_sr=SAMPLE_RATE)
+    accumulator = FeatureAccumulator()
+    framer = _BlockFramer()
+    for chunk in framer.push(np.asarray(y, dtype=np.float32)):
+        accumulator.add_signal(chunk)
+    tail = framer.flush()
+    if tail is not None:
+        accumulator.add_signal(tail)
+    return accumulator.embedding()
+
+
+class FeatureAccumulator:
+    """
+    Running sufficient statistics for the embedding
+    - Per-row frame count, sum and sum of squares for MFCC, spectral, contrast and log-mel
+    - f0: voiced count/sum/sum of squares, min/max and a fine log-spaced histogram
+      that the quantiles and the 24-bin histogram are read from
+    Memory does not depend on how much audio has been added.
+    """
+
+    ROWS = {"mfcc": 3 * N_MFCC, "spectral": 6, "contrast": 7, "log_mel": N_MELS}
+
+    def __init__(self):
+        self.frames = 0
+        self._sum = {name: np.zeros(rows) for name, rows in self.ROWS.items()}
+        self._sum_sq = {name: np.zeros(rows) for name, rows in self.ROWS.items()}
+        self.voiced = 0
+        self._f0_sum = 0.0
+        self._f0_sum_sq = 0.0
+        self._f0_min = np.inf
+        self._f0_max = -np.inf
+        self._f0_counts = np.zeros(len(F0_FINE_EDGES) - 1)
+
+    @property
+    def seconds(self) -> float:
+        """Audio covered by the frames added so far"""
+        return self.frames * HOP_LENGTH / SAMPLE_RATE
+
+    def add_signal(self, y: np.ndarray):
+        """Frame a block (whole frames, no centering) and add its statistics"""
+        import librosa
+        S = np.abs(librosa.stft(y, n_fft=N_FFT, hop_length=HOP_LENGTH, center=False))
+        log_mel = _frame_log_mel(S, SAMPLE_RATE)
+        self.add_frames(
+            f0=_frame_f0(S, SAMPLE_RATE),
+            mfcc=_frame_mfcc(log_mel),
+            spectral=_frame_spectral(y, S, SAMPLE_RATE),
+            contrast=librosa.feature.spectral_contrast(S=S, sr=SAMPLE_RATE),
+            log_mel=log_mel
+        )
+
+    def add_frames(
+        self,
+        f0: np.ndarray,
+        mfcc: np.ndarray,
+        spectral: np.ndarray,
+        contrast: np.ndarray,
+        log_mel: np.ndarray
+    ):
+        """Add frame-level feature matrices of shape (rows, frames)"""
+        self.frames += len(f0)
+        for name, frames in (("mfcc", mfcc), ("spectral", spectral), ("contrast", contrast), ("log_mel", log_mel)):
+            frames = frames.astype(np.float64)
+            self._sum[name] += frames.sum(axis=1)
+            self._sum_sq[name] += (frames ** 2).sum(axis=1)
+
+        voiced = f0[f0 > 0].astype(np.float64)
+        if voiced.size:
+            self.voiced += voiced.size
+            self._f0_sum += voiced.sum()
+            self._f0_sum_sq += (voiced ** 2).sum()
+            self._f0_min = min(self._f0_min, voiced.min())
+            self._f0_max = max(self._f0_max, voiced.max())
+            counts, _ = np.histogram(np.clip(voiced, F0_MIN, F0_MAX), bins=F0_FINE_EDGES)
+            self._f0_counts += counts
+
+    def _mean_std(self, name: str) -> np.ndarray:
+        """Interleaved per-row mean and std"""
+        n = max(self.frames, 1)
+        mean = self._sum[name] / n
+        std = np.sqrt(np.maximum(self._sum_sq[name] / n - mean ** 2, 0.0))
+        return np.stack([mean, std], axis=1).ravel()
+
+    def _f0_quantile(self, q: float) -> float:
+        """Quantile of voiced f0 from the fine histogram (bin geometric center)"""
+        cumulative = np.cumsum(self._f0_counts)
+        index = int(np.searchsorted(cumulative, q * cumulative[-1]))
+        index = min(index, len(self._f0_counts) - 1)
+        return float(np.sqrt(F0_FINE_EDGES[index] * F0_FINE_EDGES[index + 1]))
+
+    def _f0_stats(self) -> np.ndarray:
+        """Summary statistics over voiced frames"""
+        if not self.voiced:
+            return np.zeros(8)
+        mean = self._f0_sum / self.voiced
+        std = np.sqrt(max(self._f0_sum_sq / self.voiced - mean ** 2, 0.0))
+        return np.array([
+            mean, std, self._f0_min, self._f0_max,
+            self._f0_quantile(0.5), self._f0_quantile(0.1), self._f0_quantile(0.9),
+            self.voiced / self.frames
+        ])
+
+    def _f0_histogram(self) -> np.ndarray:
+        """Normalized log-spaced histogram of voiced f0"""
+        counts = self._f0_counts.reshape(F0_BINS, F0_FINE_PER_BIN).sum(axis=1)
+        total = counts.sum()
+        return counts / total if total else counts
+
+    def embedding(self) -> np.ndarray:
+        """Pool the statistics into the fixed embedding layout"""
+        features = np.concatenate([
+            self._f0_stats(),
+            self._mean_std("mfcc"),
+            self._mean_std("spectral"),
+            self._mean_std("contrast"),
+            self._f0_histogram(),
+            self._sum["log_mel"] / max(self.frames, 1)
+        ]).astype(np.float32)
+
+        # Pad to fixed size (256 dimensions)
+        embedding = np.zeros(FEATURE_DIM, dtype=np.float32)
+        embedding[:min(len(features), FEATURE_DIM)] = features[:FEATURE_DIM]
+        return embedding
+
+
+class _BlockFramer:
+    """
+    Re-blocks a sample stream into chunks that hold whole STFT frames
+    Consecutive chunks overlap by N_FFT - HOP_LENGTH samples, so framing each
+    chunk without centering yields exactly the frames of the whole stream
+    """
+
+    def __init__(self):
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._emitted = False
+
+    def push(self, samples: np.ndarray) -> Iterator[np.ndarray]:
+        self._buffer = np.concatenate([self._buffer, samples.astype(np.float32)])
+        if len(self._buffer) < N_FFT:
+            return
+        n_frames = (len(self._buffer) - N_FFT) // HOP_LENGTH + 1
+        yield self._buffer[:(n_frames - 1) * HOP_LENGTH + N_FFT]
+        self._buffer = self._buffer[n_frames * HOP_LENGTH:]
+        self._emitted = True
+
+    def flush(self) -> Optional[np.ndarray]:
+        """Zero-padded final frame holding samples no frame has covered yet"""
+        covered = N_FFT - HOP_LENGTH if self._emitted else 0
+        if len(self._buffer) <= covered:
+            return None
+        tail = np.pad(self._buffer, (0, N_FFT - len(self._buffer)))
+        self._buffer = np.zeros(0, dtype=np.float32)
+        return tail
+
+
+def _resampled_blocks(source: sf.SoundFile, block_seconds: float) -> Iterator[np.ndarray]:
+    """Mono float32 blocks at SAMPLE_RATE, decoded and resampled incrementally"""
+    import soxr
+    resampler = None
+    if source.samplerate != SAMPLE_RATE:
+        resampler = soxr.ResampleStream(source.samplerate, SAMPLE_RATE, 1, dtype="float32")
+    blocksize = max(1, int(block_seconds * source.samplerate))
+    for block in source.blocks(blocksize=blocksize, dtype="float32", always_2d=True):
+        mono = block.mean(axis=1)
+        yield resampler.resample_chunk(mono) if resampler else mono
+    if resampler:
+        yield resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+
+
+def _relative_change(previous: np.ndarray, current: np.ndarray) -> float:
+    """Largest relative L2 change over the embedding groups"""
+    change = 0.0
+    for start, end in EMBEDDING_GROUPS:
+        scale = np.linalg.norm(previous[start:end])
+        if scale > 0:
+            change = max(change, float(np.linalg.norm(current[start:end] - previous[start:end]) / scale))
+    return change
+
+
+def _frame_f0(S: np.ndarray, sr: int) -> np.ndarray:
+    """Per-frame f0 (0 where unvoiced), vectorized over piptrack output"""
+    import librosa
+    pitches, magnitudes = librosa.piptrack(S=S, sr=sr, fmin=F0_MIN, fmax=F0_MAX)
+    # One argmax over the whole matrix, then gather both pitch and magnitude
+    peak = magnitudes.argmax(axis=0)[np.newaxis, :]
+    f0 = np.take_along_axis(pitches, peak, axis=0)[0]
+    voiced = np.take_along_axis(magnitudes, peak, axis=0)[0] > 0
+    return np.where(voiced, f0, 0.0)
+
+
+def _frame_log_mel(S: np.ndarray, sr: int) -> np.ndarray:
+    """Log-power mel spectrogram from a magnitude STFT"""
+    import librosa
+    mel = librosa.feature.melspectrogram(S=S ** 2, sr=sr, n_mels=N_MELS)
+    return librosa.power_to_db(mel)
+
+
+def _frame_mfcc(log_mel: np.ndarray) -> np.ndarray:
+    """
+    MFCCs stacked with their first and second deltas
+    Deltas are computed per block, so they differ from whole-signal deltas only
+    in the few frames at each block edge
+    """
+    import librosa
+    mfcc = librosa.feature.mfcc(S=log_mel, n_mfcc=N_MFCC)
+    width = min(9, mfcc.shape[1] - (1 - mfcc.shape[1] % 2))
+    if width < 3:
+        deltas = np.zeros((2 * N_MFCC, mfcc.shape[1]), dtype=mfcc.dtype)
+    else:
+        deltas = np.vstack([
+            librosa.feature.delta(mfcc, width=width, order=1),
+            librosa.feature.delta(mfcc, width=width, order=2)
+        ])
+    return np.vstack([mfcc, deltas])
+
+
+def _frame_spectral(y: np.ndarray, S: np.ndarray, sr: int) -> np.ndarray:
+    """
+    Frame-level spectral shape descriptors
+    Centroid/bandwidth are two matrix-vector products over the shared STFT,
+    and zero crossings are counted once over the whole block
+    """
+    import librosa
+    freqs = librosa.fft_frequencies(sr=sr, n_fft=N_FFT)
+    total = S.sum(axis=0) + 1e-10
+    centroid = freqs @ S / total
+    bandwidth = np.sqrt(np.maximum((freqs ** 2) @ S / total - centroid ** 2, 0.0))
+
+    cumulative = np.cumsum(S, axis=0)
+    rolloff = freqs[(cumulative >= 0.85 * cumulative[-1]).argmax(axis=0)]
+
+    return np.vstack([
+        centroid,
+        bandwidth,
+        rolloff,
+        librosa.feature.spectral_flatness(S=S)[0],
+        _frame_zcr(y, S.shape[1]),
+        librosa.feature.rms(S=S, frame_length=N_FFT)[0]
+    ])
+
+
+def _frame_zcr(y: np.ndarray, n_frames: int) -> np.ndarray:
+    """Zero-crossing rate per (uncentered) frame via a cumulative crossing count"""
+    crossings = np.concatenate([[0], np.cumsum(np.signbit(y[1:]) != np.signbit(y[:-1]))])
+    start = np.arange(n_frames) * HOP_LENGTH
+    end = np.minimum(start + N_FFT - 1, len(crossings) - 1)
+    return (crossings[end] - crossings[start]) / N_FFT
@@ -0,0 +1,228 @@
+"""
+Metrics Module
+Per-stage latency histograms and Prometheus text exposition (no client library needed)
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+
+# Seconds; spans cached lookups (~1 ms) to cold network TTS renders
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# A gauge/counter callback returns one value or [(labels, value), ...]
+Samples = Union[float, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with labels (Prometheus semantics)
+    - observe() is thread-safe and O(buckets)
+    - snapshot() gives count/sum per label set (for tests and /api/status)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        """Count one value for the given label values"""
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict[str, float]]:
+        """{label values: {"count", "sum"}}"""
+        with self._lock:
+            return {key: {"count": series[-2], "sum": series[-1]} for key, series in self._series.items()}
+
+    def render(self) -> List[str]:
+        """Exposition lines: cumulative buckets, count and sum per label set"""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            labels = dict(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets + (math.inf,), values[:-1]):
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {count}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {values[-2]}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(values[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Histograms plus gauges/counters read from callbacks at scrape time
+    Callbacks let existing stats() counters (caches, worker pool, batcher) be
+    exported without double bookkeeping.
+    """
+
+    def __init__(self):
+        self._histograms: List[Histogram] = []
+        self._callbacks: List[Tuple[str, str, str, Callable[[], Samples]]] = []
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Create and register a histogram"""
+        histogram = Histogram(name, help, labelnames, buckets)
+        self._histograms.append(histogram)
+        return histogram
+
+    def gauge(self, name: str, help: str, callback: Callable[[], Samples]):
+        """Export a value read at scrape time"""
+        self._callbacks.append((name, "gauge", help, callback))
+
+    def counter(self, name: str, help: str, callback: Callable[[], Samples]):
+        """Export a monotonically increasing total read at scrape time"""
+        self._callbacks.append((name, "counter", help, callback))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for histogram in self._histograms:
+            lines.extend(histogram.render())
+        for name, kind, help, callback in self._callbacks:
+            try:
+                samples = callback()
+            except Exception as e:
+                print(f"Metric {name} failed: {e}")
+                continue
+            if samples is None:
+                continue
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            if not isinstance(samples, list):
+                samples = [({}, samples)]
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "voxlabs_stage_seconds",
+    "Time spent in each synthesis and feature extraction stage",
+    ("stage",)
+)
+
+
+class StageTimings:
+    """Stage durations collected for one request (or one worker pool task)"""
+
+    def __init__(self):
+        self.stages: List[Tuple[str, float]] = []
+
+    def add(self, stage: str, seconds: float):
+        self.stages.append((stage, seconds))
+
+    def totals(self) -> Dict[str, float]:
+        """Seconds per stage name (repeated stages are summed), in first-seen order"""
+        totals: Dict[str, float] = {}
+        for stage, seconds in self.stages:
+            totals[stage] = totals.get(stage, 0.0) + seconds
+        return totals
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        """Server-Timing header value (durations in milliseconds)"""
+        entries = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.totals().items()]
+        if total is not None:
+            entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current_timings: ContextVar[Optional[StageTimings]] = ContextVar("voxlabs_stage_timings", default=None)
+
+
+def record_stage(stage: str, seconds: float):
+    """Attach a stage duration to the active collector, or observe it right away"""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+    else:
+        STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def record_stages(stages: Iterable[Tuple[str, float]]):
+    """record_stage for each (stage, seconds) pair, e.g. ones a worker process returned"""
+    for stage, seconds in stages:
+        record_stage(stage, seconds)
+
+
+@contextmanager
+def timed(stage: str):
+    """Time a block (or, as a decorator, a function) as one stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+@contextmanager
+def collect_stages(observe: bool = True):
+    """
+    Collect the stages timed in this context (threads started with asyncio.to_thread included)
+    On exit they are observed into STAGE_SECONDS, unless observe=False because the
+    caller hands them on (worker pool tasks report back to the requesting process).
+    """
+    timings = StageTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+        if observe:
+            for stage, seconds in timings.stages:
+                STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+def call_with_stages(fn: Callable, *args, **kwargs) -> Tuple[object, List[Tuple[str, float]]]:
+    """Worker-side wrapper: run fn and return (result, stages it timed)"""
+    with collect_stages(observe=False) as timings:
+        result = fn(*args, **kwargs)
+    return result, timings.stages
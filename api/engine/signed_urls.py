@@ -0,0 +1,29 @@
+"""
+Signed URL Module
+Expiring HMAC-signed links to stored audio artifacts
+"""
+
+import hmac
+import time
+import hashlib
+from typing import Optional
+from urllib.parse import urlencode
+
+
+def sign(name: str, expires: int, secret: str) -> str:
+    """HMAC-SHA256 over the artifact name and expiry timestamp"""
+    message = f"{name}:{expires}".encode("utf-8")
+    return hmac.new(secret.encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def signed_query(name: str, secret: str, ttl: int, now: Optional[float] = None) -> str:
+    """Query string (expires, signature) granting access to name for ttl seconds"""
+    expires = int((time.time() if now is None else now) + ttl)
+    return urlencode({"expires": expires, "signature": sign(name, expires, secret)})
+
+
+def verify(name: str, expires: int, signature: str, secret: str, now: Optional[float] = None) -> bool:
+    """True if the signature matches and has not expired"""
+    if (time.time() if now is None else now) > expires:
+        return False
+    return hmac.compare_digest(sign(name, expires, secret), signature or "")
@@ -0,0 +1,165 @@
+"""
+Speaker Similarity Module
+Cosine top-k search over registered voice embeddings
+"""
+
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+
+# Embedding layout (see engine/features.py)
+FEATURE_DIM = 256
+F0_LEVEL_INDICES = [0, 2, 3, 4, 5, 6]       # mean, min, max, median, p10, p90 (Hz)
+F0_STD_INDEX = 1
+VOICED_RATIO_INDEX = 7
+MFCC_MEAN = slice(8, 128, 2)
+MFCC_STD = slice(9, 128, 2)
+SPECTRAL = slice(128, 140)
+CONTRAST = slice(140, 154)
+F0_HISTOGRAM = slice(154, 178)
+LOG_MEL = slice(178, 242)
+
+# Fixed reference speaker for the absolute-valued groups
+REFERENCE_F0 = 165.0        # Hz, between typical male and female voices
+REFERENCE_F0_STD = 20.0     # Hz
+# centroid, bandwidth, rolloff (Hz), flatness, zcr, rms; mean then std per row
+REFERENCE_SPECTRAL = np.array([
+    1800.0, 900.0, 1800.0, 600.0, 3500.0, 1500.0,
+    0.05, 0.05, 0.08, 0.05, 0.05, 0.03
+], dtype=np.float32)
+
+
+def _shape(values: np.ndarray) -> np.ndarray:
+    """Per-vector standardization of a block whose shape, not level, carries identity"""
+    centered = values - values.mean(axis=1, keepdims=True)
+    std = centered.std(axis=1, keepdims=True)
+    return centered / np.where(std > 1e-6, std, 1.0)
+
+
+def layout_normalize(vectors: np.ndarray) -> np.ndarray:
+    """
+    Map speaker embeddings to comparable units without reference to any other voice
+    Each feature group becomes a block of roughly unit-scale values (pitch in half
+    octaves from the reference, log spectral ratios, standardized MFCC/mel/contrast
+    shapes, Hellinger f0 histogram) and blocks are weighted equally, so the same
+    voice scores 1.0 however few voices are indexed. Vectors that do not follow
+    the layout are only L2-normalized.
+    """
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    if vectors.shape[1] != FEATURE_DIM:
+        return vectors
+
+    f0 = vectors[:, F0_LEVEL_INDICES]
+    blocks = [
+        np.concatenate([
+            2.0 * np.log2(np.maximum(f0, 50.0) / REFERENCE_F0),
+            np.log2(np.maximum(vectors[:, [F0_STD_INDEX]], 1.0) / REFERENCE_F0_STD),
+            (vectors[:, [VOICED_RATIO_INDEX]] - 0.5) * 4.0
+        ], axis=1),
+        _shape(vectors[:, MFCC_MEAN]),
+        _shape(np.log(np.maximum(vectors[:, MFCC_STD], 1e-3))),
+        np.log(np.maximum(vectors[:, SPECTRAL], 1e-6) / REFERENCE_SPECTRAL),
+        _shape(vectors[:, CONTRAST]),
+        np.sqrt(np.maximum(vectors[:, F0_HISTOGRAM], 0.0)) - np.sqrt(1.0 / 24),
+        _shape(vectors[:, LOG_MEL])
+    ]
+    return np.concatenate([block / np.sqrt(block.shape[1]) for block in blocks], axis=1)
+
+
+class SimilarityIndex:
+    """
+    In-process nearest-neighbour index over voice embeddings
+    - Embedding dimensions have very different units (Hz, dB, MFCC), so vectors are
+      mapped group by group to fixed units (layout_normalize), then L2-normalized;
+      scores do not depend on which other voices are indexed
+    - Small sets (or project-filtered queries) use an exact batched matrix-vector scan
+    - Large sets use an IVF index: spherical k-means coarse centroids, probing the
+      nprobe closest inverted lists per query
+    """
+
+    def __init__(
+        self,
+        voice_ids: Sequence[str],
+        project_ids: Sequence[str],
+        vectors: np.ndarray,
+        ivf_threshold: int = 5000,
+        nprobe: int = 8,
+        seed: int = 0
+    ):
+        self.voice_ids = list(voice_ids)
+        self.project_ids = np.asarray(project_ids, dtype=object)
+        self.nprobe = nprobe
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.vectors = self._normalize(vectors) if len(vectors) else vectors
+
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[np.ndarray] = []
+        if len(self.voice_ids) >= ivf_threshold:
+            self._build_ivf(seed)
+
+    def __len__(self) -> int:
+        return len(self.voice_ids)
+
+    @property
+    def is_approximate(self) -> bool:
+        return self.centroids is not None
+
+    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
+        z = layout_normalize(vectors)
+        norms = np.linalg.norm(z, axis=1, keepdims=True)
+        return (z / np.where(norms > 0, norms, 1.0)).astype(np.float32)
+
+    def _build_ivf(self, seed: int, iterations: int = 10):
+        """Spherical k-means with sqrt(n) lists"""
+        n = len(self.vectors)
+        n_lists = max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        centroids = self.vectors[rng.choice(n, size=n_lists, replace=False)]
+
+        for _ in range(iterations):
+            assignment = (self.vectors @ centroids.T).argmax(axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, self.vectors)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty lists keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.where(norms > 0, norms, 1.0), centroids)
+
+        assignment = (self.vectors @ centroids.T).argmax(axis=1)
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.searchsorted(assignment[order], np.arange(n_lists + 1))
+        self.centroids = centroids.astype(np.float32)
+        self.lists = [order[bounds[i]:bounds[i + 1]] for i in range(n_lists)]
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_k: int = 5,
+        project_id: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """Return up to top_k (voice_id, cosine similarity) pairs, best first"""
+        if not len(self.voice_ids) or top_k <= 0:
+            return []
+        q = self._normalize(query)[0]
+
+        if project_id is not None:
+            candidates = np.flatnonzero(self.project_ids == project_id)
+        elif self.centroids is not None:
+            probes = np.argsort(-(self.centroids @ q))[:self.nprobe]
+            candidates = np.concatenate([self.lists[i] for i in probes])
+        else:
+            candidates = None
+
+        if candidates is None:
+            scores = self.vectors @ q
+            rows = np.arange(len(scores))
+        else:
+            if not len(candidates):
+                return []
+            scores = self.vectors[candidates] @ q
+            rows = candidates
+
+        k = min(top_k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(self.voice_ids[rows[i]], float(scores[i])) for i in best]
@@ -0,0 +1,171 @@
+"""
+Base Synthesizer Module
+Pluggable text -> waveform backends used by EmotionalTTSEngine
+"""
+
+import io
+from typing import List, Tuple
+import numpy as np
+
+from .metrics import timed
+
+
+class BaseSynthesizer:
+    """
+    Interface for base (pre-DSP) speech renderers
+    Returns a mono float32 waveform and its sample rate
+    """
+
+    name = "base"
+
+    def synthesize(self, text: str, language: str = "en") -> Tuple[np.ndarray, int]:
+        raise NotImplementedError
+
+
+class GTTSSynthesizer(BaseSynthesizer):
+    """
+    Google Translate TTS backend
+    Makes a blocking HTTPS request per call
+    """
+
+    name = "gtts"
+
+    def synthesize(self, text: str, language: str = "en") -> Tuple[np.ndarray, int]:
+        from gtts import gTTS
+        import librosa
+
+        with timed("base_fetch"):
+            tts = gTTS(text=text, lang=language, slow=False)
+            audio_fp = io.BytesIO()
+            tts.write_to_fp(audio_fp)
+            audio_fp.seek(0)
+
+        # Load into librosa at native rate
+        # librosa.load returns (y, sr)
+        with timed("base_decode"):
+            y, sr = librosa.load(audio_fp, sr=None)
+        return y, sr
+
+
+class FormantSynthesizer(BaseSynthesizer):
+    """
+    Fully local rule-based formant synthesizer
+    - Letters map to vowel, sonorant, fricative or plosive segments
+    - Voiced segments: glottal sawtooth source through cascaded formant resonators
+    - Unvoiced segments: band-shaped noise
+    Output is deterministic for a given text (fixed noise seed), which makes it
+    suitable for offline use and tests. Pronunciation is letter-based; the
+    language parameter is accepted but does not change the output.
+    """
+
+    name = "formant"
+
+    SAMPLE_RATE = 22050
+
+    # (F1, F2, F3) in Hz
+    VOWELS = {
+        "a": (730, 1090, 2440), "e": (530, 1840, 2480), "i": (270, 2290, 3010),
+        "o": (570, 840, 2410), "u": (300, 870, 2240), "y": (270, 2290, 3010)
+    }
+    SONORANTS = {
+        "l": (360, 1300, 2700), "r": (420, 1300, 1600), "w": (300, 610, 2200),
+        "m": (250, 1200, 2200), "n": (250, 1400, 2300), "j": (280, 2250, 2900),
+        "v": (300, 1400, 2400), "z": (300, 1700, 2600), "b": (300, 900, 2200),
+        "d": (300, 1700, 2600), "g": (300, 1990, 2850)
+    }
+    # (low, high) noise band in Hz
+    FRICATIVES = {
+        "s": (4000, 8000), "f": (1500, 7000), "h": (500, 4000), "c": (3000, 7000),
+        "x": (2000, 6000), "q": (1500, 4000)
+    }
+    PLOSIVES = {"p": (500, 2000), "t": (2500, 6000), "k": (1500, 4000)}
+
+    PAUSES = {" ": 0.06, ",": 0.18, ";": 0.22, ":": 0.22, ".": 0.3, "!": 0.3, "?": 0.3, "\n": 0.3}
+
+    def __init__(self, f0: float = 120.0):
+        self.f0 = f0
+
+    def synthesize(self, text: str, language: str = "en") -> Tuple[np.ndarray, int]:
+        sr = self.SAMPLE_RATE
+        rng = np.random.default_rng(0)
+        segments: List[np.ndarray] = []
+        letters = [ch for ch in text.lower() if ch.isalpha() or ch in self.PAUSES]
+        voiced_total = max(1, sum(ch in self.VOWELS or ch in self.SONORANTS for ch in letters))
+        voiced_index = 0
+
+        for ch in letters:
+            if ch in self.PAUSES:
+                segments.append(np.zeros(int(self.PAUSES[ch] * sr), dtype=np.float32))
+            elif ch in self.VOWELS or ch in self.SONORANTS:
+                # Gentle pitch declination across the utterance
+                f0 = self.f0 * (1.1 - 0.2 * voiced_index / voiced_total)
+                voiced_index += 1
+                if ch in self.VOWELS:
+                    segments.append(self._voiced(self.VOWELS[ch], f0, 0.11, 1.0))
+                else:
+                    segments.append(self._voiced(self.SONORANTS[ch], f0, 0.07, 0.5))
+            elif ch in self.FRICATIVES:
+                segments.append(self._noise(self.FRICATIVES[ch], 0.09, 0.25, rng))
+            elif ch in self.PLOSIVES:
+                segments.append(np.zeros(int(0.04 * sr), dtype=np.float32))
+                segments.append(self._noise(self.PLOSIVES[ch], 0.02, 0.4, rng))
+            else:
+                # Remaining letters (non-English alphabets) as a neutral vowel
+                segments.append(self._voiced((500, 1500, 2500), self.f0, 0.09, 0.8))
+
+        if not segments:
+            return np.zeros(int(0.1 * sr), dtype=np.float32), sr
+
+        y = np.concatenate(segments)
+        peak = np.abs(y).max()
+        if peak > 0:
+            y = y * (0.8 / peak)
+        return y.astype(np.float32), sr
+
+    def _voiced(self, formants: Tuple[int, int, int], f0: float, duration: float, gain: float) -> np.ndarray:
+        sr = self.SAMPLE_RATE
+        n = int(duration * sr)
+        phase = np.cumsum(np.full(n, f0 / sr))
+        source = 2.0 * (phase - np.floor(phase)) - 1.0
+        y = source
+        for formant, bandwidth in zip(formants, (80, 100, 120)):
+            y = self._resonate(y, formant, bandwidth)
+        return self._fade(y * gain)
+
+    def _noise(self, band: Tuple[int, int], duration: float, gain: float, rng) -> np.ndarray:
+        sr = self.SAMPLE_RATE
+        n = int(duration * sr)
+        low, high = band
+        y = self._resonate(rng.standard_normal(n), (low + high) / 2, high - low)
+        return self._fade(y * gain / (np.abs(y).max() or 1.0))
+
+    def _resonate(self, x: np.ndarray, frequency: float, bandwidth: float) -> np.ndarray:
+        """Two-pole resonator with unity gain at DC"""
+        # Deferred import: scipy.signal is slow to load and only this backend needs it here
+        from scipy.signal import lfilter
+        sr = self.SAMPLE_RATE
+        r = np.exp(-np.pi * bandwidth / sr)
+        theta = 2 * np.pi * frequency / sr
+        a = [1.0, -2 * r * np.cos(theta), r * r]
+        return lfilter([sum(a)], a, x)
+
+    def _fade(self, y: np.ndarray, seconds: float = 0.005) -> np.ndarray:
+        n = min(len(y) // 2, int(seconds * self.SAMPLE_RATE))
+        if n:
+            ramp = np.linspace(0.0, 1.0, n)
+            y[:n] *= ramp
+            y[-n:] *= ramp[::-1]
+        return y.astype(np.float32)
+
+
+SYNTHESIZERS = {
+    GTTSSynthesizer.name: GTTSSynthesizer,
+    FormantSynthesizer.name: FormantSynthesizer
+}
+
+
+def create_synthesizer(name: str) -> BaseSynthesizer:
+    """Instantiate a registered base synthesizer by name"""
+    if name not in SYNTHESIZERS:
+        raise ValueError(f"Unknown TTS backend: {name}. Available: {', '.join(SYNTHESIZERS)}")
+    return SYNTHESIZERS[name]()
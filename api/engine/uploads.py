@@ -0,0 +1,120 @@
+"""
+Upload Ingest Module
+Chunked upload-to-disk copy with early size, format and duration checks
+"""
+
+import asyncio
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import soundfile as sf
+
+
+# Containers libsndfile cannot read; probed and decoded through audioread
+# (ffmpeg, GStreamer or Core Audio), like librosa.load does
+AUDIOREAD_CONTAINERS = ("m4a", "aac", "webm")
+
+
+class UploadRejectedError(ValueError):
+    """Upload refused before feature extraction; carries the HTTP status to return"""
+
+    def __init__(self, message: str, status_code: int = 422):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def sniff_audio(head: bytes) -> Optional[str]:
+    """Container name from the leading bytes, for formats libsndfile or audioread decode"""
+    if head[:4] in (b"RIFF", b"RF64") and head[8:12] == b"WAVE":
+        return "wav"
+    if head[:4] == b"fLaC":
+        return "flac"
+    if head[:4] == b"OggS":
+        return "ogg"
+    if head[:4] == b"FORM" and head[8:12] in (b"AIFF", b"AIFC"):
+        return "aiff"
+    if head[4:8] == b"ftyp":
+        return "m4a"
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        # Matroska/WebM (browser MediaRecorder output)
+        return "webm"
+    if len(head) > 1 and head[0] == 0xFF and head[1] & 0xF6 == 0xF0:
+        # ADTS sync word with layer bits 00 (MPEG audio frames never use layer 00)
+        return "aac"
+    if head[:3] == b"ID3" or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+
+def probe_audio(path: Path, container: str) -> Tuple[float, int, int]:
+    """(duration, sample_rate, channels) from the header, without decoding the audio"""
+    if container in AUDIOREAD_CONTAINERS:
+        import audioread
+        with audioread.audio_open(str(path)) as f:
+            return float(f.duration), int(f.samplerate), int(f.channels)
+    info = sf.info(str(path))
+    duration = info.frames / info.samplerate if info.samplerate else 0.0
+    return duration, info.samplerate, info.channels
+
+
+async def ingest_upload(
+    upload,
+    dest: Path,
+    max_bytes: int,
+    max_seconds: float,
+    min_seconds: float = 0.0,
+    chunk_size: int = 1024 * 1024
+) -> Dict:
+    """
+    Copy an upload (a Starlette UploadFile, already spooled by the server) to dest
+    - Never holds more than one chunk in memory
+    - Rejects oversized bodies as soon as the limit is crossed (413)
+    - Rejects unknown containers from the first chunk (415)
+    - Reads the duration from the header (no full decode) and enforces limits (422)
+    Returns {"bytes", "format", "duration", "sample_rate", "channels"}; dest is removed on rejection
+    """
+    dest = Path(dest)
+    size = getattr(upload, "size", None)
+    if size is not None and size > max_bytes:
+        raise UploadRejectedError(f"Upload exceeds {max_bytes // (1024 * 1024)} MB limit", 413)
+
+    written = 0
+    container = None
+    try:
+        with open(dest, "wb") as f:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                if container is None:
+                    container = sniff_audio(chunk[:16])
+                    if container is None:
+                        raise UploadRejectedError(
+                            "Unsupported audio file (use WAV, FLAC, OGG, AIFF, MP3, M4A, AAC or WebM)", 415
+                        )
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadRejectedError(f"Upload exceeds {max_bytes // (1024 * 1024)} MB limit", 413)
+                f.write(chunk)
+
+        if not written:
+            raise UploadRejectedError("Empty audio file", 422)
+
+        try:
+            duration, sample_rate, channels = await asyncio.to_thread(probe_audio, dest, container)
+        except Exception:
+            raise UploadRejectedError("Unreadable or corrupt audio file", 415)
+        if duration > max_seconds:
+            raise UploadRejectedError(f"Audio is {duration:.0f}s long; the limit is {max_seconds:.0f}s", 422)
+        if duration < min_seconds:
+            raise UploadRejectedError(f"Audio is {duration:.1f}s long; at least {min_seconds:.1f}s is required", 422)
+
+        return {
+            "bytes": written,
+            "format": container,
+            "duration": duration,
+            "sample_rate": sample_rate,
+            "channels": channels
+        }
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,339 @@
+"""
+Voice Metadata Store Module
+Pluggable persistence for voice identity metadata (JSON file or SQLite)
+"""
+
+import os
+import json
+import base64
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def encode_cursor(created_at: str, voice_id: str) -> str:
+    """Opaque pagination cursor for the (created_at, voice_id) sort key"""
+    raw = json.dumps([created_at, voice_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Inverse of encode_cursor"""
+    try:
+        created_at, voice_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return created_at, voice_id
+
+
+class VoiceStore:
+    """
+    Voice metadata backend interface
+    Records are VoiceIdentity.to_dict() dictionaries; pages are ordered by
+    (created_at, voice_id) and exclude revoked voices
+    """
+
+    def load_all(self) -> Dict[str, Dict]:
+        """All records keyed by voice_id"""
+        raise NotImplementedError
+
+    def upsert(self, records: Iterable[Dict]):
+        """Insert or replace records in one transaction"""
+        raise NotImplementedError
+
+    def delete(self, voice_ids: Iterable[str]):
+        """Remove records in one transaction"""
+        raise NotImplementedError
+
+    def list(
+        self,
+        project_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """One page of active voices and the cursor for the next page (None at the end)"""
+        raise NotImplementedError
+
+    # Change tracking, for stores several processes can share (None = not supported)
+
+    def version(self) -> Optional[int]:
+        """Sequence number of the latest committed change"""
+        return None
+
+    def changed(self) -> bool:
+        """Cheap check whether another process committed since the last call"""
+        return False
+
+    def changes_since(self, version: int) -> Tuple[int, Optional[Dict[str, Optional[Dict]]]]:
+        """
+        (latest version, {voice_id: current record or None if deleted}) after version
+        The mapping is None when the change history no longer reaches back that far
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release resources"""
+
+
+class JSONVoiceStore(VoiceStore):
+    """
+    Single JSON file backend (original format)
+    Every mutation rewrites the whole file atomically
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._records: Dict[str, Dict] = {}
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                self._records = json.load(f)
+
+    def load_all(self) -> Dict[str, Dict]:
+        with self._lock:
+            return dict(self._records)
+
+    def upsert(self, records: Iterable[Dict]):
+        with self._lock:
+            for record in records:
+                self._records[record["voice_id"]] = record
+            self._write()
+
+    def delete(self, voice_ids: Iterable[str]):
+        with self._lock:
+            for voice_id in voice_ids:
+                self._records.pop(voice_id, None)
+            self._write()
+
+    def list(
+        self,
+        project_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        with self._lock:
+            records = [
+                record for record in self._records.values()
+                if not record.get("revoked")
+                and (not project_id or record.get("project_id") == project_id)
+            ]
+        records.sort(key=lambda r: (r["created_at"], r["voice_id"]))
+        if cursor:
+            after = decode_cursor(cursor)
+            records = [r for r in records if (r["created_at"], r["voice_id"]) > after]
+        return _paginate(records, limit)
+
+    def _write(self):
+        """Atomic temp-file-and-rename write (lock must be held)"""
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._records, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class SQLiteVoiceStore(VoiceStore):
+    """
+    SQLite backend with indexes on project_id, revoked and created_at
+    Mutations are incremental upserts; listing uses keyset pagination
+    Every mutation also appends the touched voice_ids to voice_changes in the same
+    transaction, so processes sharing the database (WAL mode) can catch up incrementally
+    """
+
+    # Change history kept for lagging readers (older entries force a full reload)
+    CHANGE_HISTORY = 10000
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS voices (
+            voice_id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            consent INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            project_id TEXT NOT NULL,
+            revoked INTEGER NOT NULL DEFAULT 0,
+            metadata TEXT NOT NULL DEFAULT '{}'
+        );
+        CREATE INDEX IF NOT EXISTS idx_voices_project
+            ON voices (project_id, revoked, created_at, voice_id);
+        CREATE INDEX IF NOT EXISTS idx_voices_revoked ON voices (revoked);
+        CREATE INDEX IF NOT EXISTS idx_voices_created ON voices (created_at, voice_id);
+        CREATE TABLE IF NOT EXISTS voice_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            voice_id TEXT NOT NULL
+        );
+    """
+
+    COLUMNS = "voice_id, name, consent, created_at, project_id, revoked, metadata"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._conn.commit()
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM voices LIMIT 1").fetchone() is None
+
+    def load_all(self) -> Dict[str, Dict]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {self.COLUMNS} FROM voices").fetchall()
+        return {row[0]: self._row_to_record(row) for row in rows}
+
+    def upsert(self, records: Iterable[Dict]):
+        rows = [
+            (
+                record["voice_id"],
+                record["name"],
+                int(bool(record["consent"])),
+                record["created_at"],
+                record["project_id"],
+                int(bool(record.get("revoked", False))),
+                json.dumps(record.get("metadata") or {})
+            )
+            for record in records
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO voices ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(voice_id) DO UPDATE SET "
+                "name = excluded.name, consent = excluded.consent, "
+                "created_at = excluded.created_at, project_id = excluded.project_id, "
+                "revoked = excluded.revoked, metadata = excluded.metadata",
+                rows
+            )
+            self._log_changes([row[0] for row in rows])
+
+    def delete(self, voice_ids: Iterable[str]):
+        with self._lock, self._conn:
+            voice_ids = list(voice_ids)
+            self._conn.executemany(
+                "DELETE FROM voices WHERE voice_id = ?",
+                [(voice_id,) for voice_id in voice_ids]
+            )
+            self._log_changes(voice_ids)
+
+    def _log_changes(self, voice_ids: List[str]):
+        """Record touched voices and trim old history (lock and transaction must be held)"""
+        self._conn.executemany(
+            "INSERT INTO voice_changes (voice_id) VALUES (?)",
+            [(voice_id,) for voice_id in voice_ids]
+        )
+        self._conn.execute(
+            "DELETE FROM voice_changes WHERE seq <= (SELECT MAX(seq) FROM voice_changes) - ?",
+            (self.CHANGE_HISTORY,)
+        )
+
+    def version(self) -> Optional[int]:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM voice_changes").fetchone()[0]
+
+    def changed(self) -> bool:
+        # data_version only moves when another connection commits
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            changed = data_version != self._data_version
+            self._data_version = data_version
+            return changed
+
+    def changes_since(self, version: int) -> Tuple[int, Optional[Dict[str, Optional[Dict]]]]:
+        with self._lock:
+            oldest, latest = self._conn.execute("SELECT MIN(seq), MAX(seq) FROM voice_changes").fetchone()
+            if latest is None or latest <= version:
+                return max(version, latest or 0), {}
+            if oldest > version + 1:
+                return latest, None
+            voice_ids = [
+                row[0] for row in self._conn.execute(
+                    "SELECT DISTINCT voice_id FROM voice_changes WHERE seq > ? AND seq <= ?", (version, latest)
+                )
+            ]
+            records = {}
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(voice_ids), 500):
+                chunk = voice_ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT {self.COLUMNS} FROM voices WHERE voice_id IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                records.update((row[0], self._row_to_record(row)) for row in rows)
+        return latest, {voice_id: records.get(voice_id) for voice_id in voice_ids}
+
+    def list(
+        self,
+        project_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        clauses = ["revoked = 0"]
+        params: List = []
+        if project_id:
+            clauses.append("project_id = ?")
+            params.append(project_id)
+        if cursor:
+            clauses.append("(created_at, voice_id) > (?, ?)")
+            params.extend(decode_cursor(cursor))
+        query = (
+            f"SELECT {self.COLUMNS} FROM voices WHERE {' AND '.join(clauses)} "
+            "ORDER BY created_at, voice_id"
+        )
+        if limit is not None:
+            # Fetch one extra row to know whether another page exists
+            query += " LIMIT ?"
+            params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return _paginate([self._row_to_record(row) for row in rows], limit)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row_to_record(row) -> Dict:
+        return {
+            "voice_id": row[0],
+            "name": row[1],
+            "consent": bool(row[2]),
+            "created_at": row[3],
+            "project_id": row[4],
+            "revoked": bool(row[5]),
+            "metadata": json.loads(row[6])
+        }
+
+
+def _paginate(records: List[Dict], limit: Optional[int]) -> Tuple[List[Dict], Optional[str]]:
+    """Trim sorted records to limit and compute the next cursor"""
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be a positive integer")
+    if limit is None or len(records) <= limit:
+        return records, None
+    page = records[:limit]
+    last = page[-1]
+    return page, encode_cursor(last["created_at"], last["voice_id"])
+
+
+def create_voice_store(backend: str, project_path: Path) -> VoiceStore:
+    """
+    Build a metadata store for a project directory
+    The SQLite backend imports an existing voices_metadata.json on first use
+    """
+    project_path = Path(project_path)
+    json_path = project_path / "voices_metadata.json"
+
+    if backend == "json":
+        return JSONVoiceStore(json_path)
+    if backend == "sqlite":
+        store = SQLiteVoiceStore(project_path / "voices.db")
+        if json_path.exists() and store.is_empty():
+            store.upsert(JSONVoiceStore(json_path).load_all().values())
+            print(f"Imported voice metadata from {json_path.name} into SQLite")
+        return store
+    raise ValueError(f"Unknown voice store backend: {backend}")
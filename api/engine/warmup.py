@@ -0,0 +1,106 @@
+"""
+DSP Warm-up Module
+Runs every librosa/numba-backed path once on synthetic audio, before real traffic
+"""
+
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+import numpy as np
+
+
+def configure_numba_cache(cache_dir: Optional[str]) -> Optional[str]:
+    """
+    Point numba's on-disk compilation cache at cache_dir (e.g. a volume shared by replicas)
+    librosa compiles its kernels with cache=True, so once one process has compiled them
+    the others load machine code instead of recompiling. Must run before numba is imported.
+    Returns the effective cache directory (None = numba's default next to the sources).
+    """
+    if cache_dir and "NUMBA_CACHE_DIR" not in os.environ:
+        if "numba" in sys.modules:
+            print(f"numba is already imported; NUMBA_CACHE_DIR={cache_dir} will not take effect")
+        else:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            os.environ["NUMBA_CACHE_DIR"] = str(cache_dir)
+    return os.environ.get("NUMBA_CACHE_DIR")
+
+
+def _voiced_signal(sr: int, seconds: float) -> np.ndarray:
+    """Harmonic tone with a gliding f0 and a little noise (voiced and unvoiced frames)"""
+    t = np.arange(int(sr * seconds)) / sr
+    f0 = 140 + 40 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    y = 0.4 * np.sin(phase) + 0.2 * np.sin(2 * phase) + 0.1 * np.sin(3 * phase)
+    y += 0.01 * np.random.default_rng(0).standard_normal(len(t))
+    return y.astype(np.float32)
+
+
+def warm_up_dsp(tts_engine=None) -> Dict[str, float]:
+    """
+    Exercise the DSP paths used by EmotionalTTSEngine and VoiceEngine
+    - synthesis: formant base render, WSOLA and phase-vocoder stretches, output
+      resampling and MP3/PCM encoding (through tts_engine when given)
+    - decode: compressed base audio back to float32 (the gTTS backend path)
+    - features: in-memory embedding (STFT, piptrack, mel, MFCC/deltas, contrast)
+    - streaming_features: block reader with soxr resampling from a file at 44.1 kHz
+    Returns seconds spent per stage.
+    Nothing is recorded in the stage metrics or stored in the engine's base cache.
+    """
+    from .metrics import collect_stages
+
+    # Stages timed here are collected and dropped instead of observed
+    with collect_stages(observe=False):
+        return _warm_up_dsp(tts_engine)
+
+
+def _warm_up_dsp(tts_engine=None) -> Dict[str, float]:
+    import librosa
+    from .dsp import shift_pitch_tempo
+    from .encoder import encode_audio, output_sample_rate
+    from .features import SAMPLE_RATE, embed_signal, extract_voice_features
+
+    timings = {}
+    y = _voiced_signal(SAMPLE_RATE, 2.0)
+
+    started = time.perf_counter()
+    if tts_engine is not None:
+        # The synthesize() stages, minus the base cache: render, modulate, encode.
+        # happy: small tempo change (WSOLA); excited: large one (phase vocoder); pcm: 16 kHz output
+        base, base_sr = tts_engine.get_synthesizer("formant").synthesize("Warm up.", "en")
+        for emotion, format, rate in (("happy", "mp3", None), ("excited", "mp3", None), ("neutral", "pcm", 16000)):
+            preset = tts_engine.emotions[emotion]
+            out_sr = output_sample_rate(format, base_sr, rate)
+            modulated = tts_engine.modulate(
+                base, base_sr, preset["speed"], preset["pitch"], preset["energy"], target_sr=out_sr
+            )
+            encode_audio(modulated, out_sr, format)
+    else:
+        for pitch, speed in ((1.1, 1.2), (1.15, 1.4)):
+            shift_pitch_tempo(y, SAMPLE_RATE, pitch, speed)
+        shift_pitch_tempo(y, SAMPLE_RATE, target_sr=16000)
+    timings["synthesis"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    mp3 = encode_audio(y, SAMPLE_RATE, "mp3")
+    with tempfile.NamedTemporaryFile(suffix=".mp3") as f:
+        f.write(mp3)
+        f.flush()
+        librosa.load(f.name, sr=None)
+    timings["decode"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    embed_signal(y, SAMPLE_RATE)
+    timings["features"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "warmup.wav"
+        encoded = encode_audio(_voiced_signal(44100, 2.0), 44100, "wav", comment="")
+        path.write_bytes(encoded)
+        extract_voice_features(str(path), early_stop=False)
+    timings["streaming_features"] = time.perf_counter() - started
+
+    return {stage: round(seconds, 3) for stage, seconds in timings.items()}
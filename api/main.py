@@ -3,11 +3,20 @@ VoxLabs - FastAPI Backend with Advanced Voice Engine
 Professional voice cloning and TTS platform
 """
 
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import FileResponse, JSONResponse
+import time
+
+# Import timing starts here and is reported by /api/status
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from starlette.background import BackgroundTask
+from contextlib import asynccontextmanager
 from pathlib import Path
+import asyncio
+import importlib
 import os
 import sys
 
@@ -15,14 +24,51 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent))
 
 from engine import get_voice_engine
-from typing import Optional, Any
+from engine.emotional_tts import EMOTIONS
+from engine.cache import SynthesisCache
+from engine.emotional_tts import split_sentences
+from engine.encoder import AUDIO_FORMATS, WATERMARK, get_format, id3_comment_tag, media_type, negotiate_format
+from engine.executor import PoolSlot, WorkerPool, PoolSaturatedError
+from engine import metrics
+from engine import signed_urls
+from engine.uploads import UploadRejectedError, ingest_upload
+from engine.warmup import configure_numba_cache, warm_up_dsp
+from pipelines.batcher import InferenceBatcher
+from pipelines.inference import encode_waveform
+from pipelines.registry import ModelRegistry
+from voice_engine import extract_voice_features, render_synthesis, voice_engine_loaded
+from typing import Optional, Any, Dict, List
+import uuid
 import uvicorn
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown"""
+    gc_task = asyncio.create_task(collect_garbage_periodically())
+    if STARTUP_MODE == "eager":
+        # Serve nothing until engines and models are warm
+        await warm_up()
+        warmup_task = None
+    elif STARTUP_MODE == "background":
+        # Answer /api/status immediately; requests arriving earlier build what they need
+        warmup_task = asyncio.create_task(warm_up())
+    else:
+        startup["ready"] = True
+        warmup_task = None
+    yield
+    gc_task.cancel()
+    if warmup_task:
+        warmup_task.cancel()
+    worker_pool.shutdown(wait=False)
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="VoxLabs API",
     description="Professional AI Voice Cloning Platform with Advanced Engine",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -42,8 +88,134 @@ AUDIO_DIR.mkdir(parents=True, exist_ok=True)
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Initialize voice engine
-voice_engine = get_voice_engine()
+# Startup mode
+# - background (default): engines are built and heavy modules loaded by a lifespan task
+# - eager: the same warm-up, finished before the app accepts requests
+# - lazy: everything is built on first use
+STARTUP_MODE = os.getenv("VOXLABS_STARTUP", "background").lower()
+if STARTUP_MODE not in ("background", "eager", "lazy"):
+    raise ValueError(f"VOXLABS_STARTUP must be background, eager or lazy (got {STARTUP_MODE})")
+
+# numba compilation cache shared across workers/replicas (set before anything imports numba)
+NUMBA_CACHE_DIR = configure_numba_cache(os.getenv("VOXLABS_NUMBA_CACHE_DIR") or None)
+
+# Modules that load lazily (scipy.signal, librosa's numba-backed kernels) and are preloaded by warm-up
+WARMUP_MODULES = ("scipy.signal", "librosa.core", "librosa.feature", "librosa.effects")
+
+# Startup timings (seconds) and state, reported by /api/status
+startup = {
+    "mode": STARTUP_MODE,
+    "import_seconds": None,
+    "engine_seconds": None,
+    "modules_seconds": None,
+    "dsp_seconds": None,
+    "models_seconds": None,
+    "dsp": None,
+    "numba_cache_dir": NUMBA_CACHE_DIR,
+    "ready": False
+}
+
+# Signed, expiring audio links (served by /api/audio) instead of public static files
+URL_SECRET = os.getenv("VOXLABS_URL_SECRET") or None
+URL_TTL = int(os.getenv("VOXLABS_URL_TTL", "900"))
+
+# Audio artifact store: public under /static/audio, or private when links are signed
+ARTIFACT_DIR = Path(os.getenv("VOXLABS_ARTIFACT_DIR") or ("artifacts" if URL_SECRET else str(AUDIO_DIR)))
+
+# Upload limits, checked while the upload is copied to disk (before feature extraction)
+MAX_UPLOAD_BYTES = int(os.getenv("VOXLABS_MAX_UPLOAD_MB", "100")) * 1024 * 1024
+MAX_UPLOAD_SECONDS = float(os.getenv("VOXLABS_MAX_UPLOAD_SECONDS", "3600"))
+MIN_UPLOAD_SECONDS = float(os.getenv("VOXLABS_MIN_UPLOAD_SECONDS", "1"))
+
+# Single-file upload routes whose Content-Length can be checked before the body is parsed
+SINGLE_UPLOAD_PATHS = {"/api/voices/register", "/api/voices/search"}
+
+# Background cleanup of expired artifacts and abandoned uploads
+GC_INTERVAL = float(os.getenv("VOXLABS_GC_INTERVAL", "300"))
+UPLOAD_TTL = float(os.getenv("VOXLABS_UPLOAD_TTL", "3600"))
+
+# Content-addressed cache for synthesized audio (the disk tier is the artifact store)
+# Keys end in the file extension, so one cache holds every output format
+synthesis_cache = SynthesisCache(
+    ARTIFACT_DIR,
+    suffix="",
+    memory_budget=int(os.getenv("VOXLABS_CACHE_MEMORY_MB", "64")) * 1024 * 1024,
+    disk_budget=int(os.getenv("VOXLABS_CACHE_DISK_MB", "1024")) * 1024 * 1024,
+    ttl=float(os.getenv("VOXLABS_ARTIFACT_TTL", "86400")) or None
+)
+
+# Bounded pool for blocking synthesis/feature extraction (keeps the event loop responsive)
+worker_pool = WorkerPool(
+    mode=os.getenv("VOXLABS_WORKER_MODE", "thread"),
+    max_workers=int(os.getenv("VOXLABS_WORKERS", "0")) or None,
+    max_queue=int(os.getenv("VOXLABS_QUEUE_SIZE", "16")),
+    timeout=float(os.getenv("VOXLABS_TASK_TIMEOUT", "60"))
+)
+
+# Neural inference models: versioned, memory-mapped, loaded on first use
+MODEL_WARMUP_TEXT = os.getenv("VOXLABS_MODEL_WARMUP_TEXT", "Hello from VoxLabs.")
+model_registry = ModelRegistry(
+    os.getenv("VOXLABS_MODEL_DIR", "models"),
+    version=os.getenv("VOXLABS_MODEL_VERSION") or None,
+    check_interval=float(os.getenv("VOXLABS_MODEL_CHECK_INTERVAL", "5"))
+)
+
+# Concurrent neural requests are batched: up to MAX_SIZE per forward pass, waiting at most MAX_WAIT_MS
+inference_batcher = InferenceBatcher(
+    model_registry,
+    max_batch_size=int(os.getenv("VOXLABS_BATCH_MAX_SIZE", "8")),
+    max_wait_ms=float(os.getenv("VOXLABS_BATCH_MAX_WAIT_MS", "10")),
+    bucket_width=int(os.getenv("VOXLABS_BATCH_BUCKET_WIDTH", "64"))
+)
+
+# Instrumentation: stage and request histograms plus live counters, scraped from /metrics
+# With VOXLABS_SERVER_TIMING=1 every response also carries its stage timings in Server-Timing
+SERVER_TIMING = os.getenv("VOXLABS_SERVER_TIMING", "0") == "1"
+REQUEST_SECONDS = metrics.REGISTRY.histogram(
+    "voxlabs_request_seconds",
+    "HTTP request latency until the response starts",
+    ("method", "route", "status")
+)
+http_requests = {"in_flight": 0}
+
+def register_metrics():
+    """Export the counters the pool, caches and batcher already keep"""
+    registry = metrics.REGISTRY
+    registry.gauge("voxlabs_http_requests_in_flight", "HTTP requests being handled", lambda: http_requests["in_flight"])
+    registry.gauge("voxlabs_ready", "1 once the startup warm-up has finished", lambda: int(startup["ready"]))
+    
+    registry.gauge("voxlabs_worker_pool_in_flight", "Worker pool tasks running or queued", lambda: worker_pool.stats()["in_flight"])
+    registry.gauge("voxlabs_worker_pool_queue_depth", "Worker pool tasks waiting for a worker", lambda: worker_pool.stats()["queued"])
+    registry.counter("voxlabs_worker_pool_completed_total", "Worker pool tasks finished", lambda: worker_pool.stats()["completed"])
+    registry.counter("voxlabs_worker_pool_rejected_total", "Tasks refused because the pool was full (429)", lambda: worker_pool.stats()["rejected"])
+    registry.counter("voxlabs_worker_pool_timeouts_total", "Tasks the caller stopped waiting for", lambda: worker_pool.stats()["timeouts"])
+    
+    def synthesis_lookups():
+        stats = synthesis_cache.stats()
+        return [({"result": result}, stats[key]) for result, key in (
+            ("memory_hit", "memory_hits"), ("disk_hit", "disk_hits"), ("miss", "misses")
+        )]
+    registry.counter("voxlabs_synthesis_cache_lookups_total", "Synthesis cache lookups by outcome", synthesis_lookups)
+    registry.gauge("voxlabs_synthesis_cache_hit_ratio", "Synthesis cache hits / lookups", lambda: synthesis_cache.stats()["hit_rate"])
+    
+    # The base cache lives in the voice engine; nothing is exported until it is built
+    def base_cache_stats():
+        return get_voice_engine().emotional_engine.base_cache.stats() if voice_engine_loaded() else None
+    def base_lookups():
+        stats = base_cache_stats()
+        return stats and [({"result": "hit"}, stats["hits"]), ({"result": "miss"}, stats["misses"])]
+    def base_hit_ratio():
+        stats = base_cache_stats()
+        return stats and stats["hit_rate"]
+    registry.counter("voxlabs_base_cache_lookups_total", "Base TTS waveform cache lookups by outcome", base_lookups)
+    registry.gauge("voxlabs_base_cache_hit_ratio", "Base TTS waveform cache hits / lookups", base_hit_ratio)
+    
+    registry.gauge("voxlabs_batcher_queue_depth", "Neural requests waiting for a batch", lambda: inference_batcher.stats()["queued"])
+    registry.gauge("voxlabs_batcher_running_batches", "Neural forward passes in progress", lambda: inference_batcher.stats()["running_batches"])
+    registry.counter("voxlabs_batcher_requests_total", "Neural requests submitted", lambda: inference_batcher.stats()["requests"])
+    registry.counter("voxlabs_batcher_batches_total", "Neural forward passes run", lambda: inference_batcher.stats()["batches"])
+
+register_metrics()
 
 from pydantic import BaseModel
 from typing import Optional, Any, Generic, TypeVar
@@ -64,6 +236,205 @@ def api_response(data: Any = None, error: Optional[str] = None) -> APIResponse:
         error=error
     )
 
+def error_response(status_code: int, error: str, headers: Optional[dict] = None) -> JSONResponse:
+    """Helper to create an error APIResponse with a non-200 HTTP status"""
+    return JSONResponse(
+        status_code=status_code,
+        content=api_response(error=error).model_dump(),
+        headers=headers
+    )
+
+def busy_response(e: PoolSaturatedError) -> JSONResponse:
+    """429 response when the worker pool is saturated"""
+    return error_response(429, str(e), headers={"Retry-After": "1"})
+
+def timeout_response() -> JSONResponse:
+    """504 response when a worker task exceeds its timeout"""
+    return error_response(504, "Request timed out")
+
+def artifact_url(filename: str) -> str:
+    """Client URL for a stored artifact (signed and expiring when a secret is configured)"""
+    if URL_SECRET:
+        return f"/api/audio/{filename}?{signed_urls.signed_query(filename, URL_SECRET, URL_TTL)}"
+    return f"/static/audio/{filename}"
+
+def remove_stale_uploads(max_age: float) -> int:
+    """Delete temp_ upload files older than max_age seconds (left behind by crashes)"""
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in AUDIO_DIR.glob("temp_*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+def collect_garbage() -> int:
+    """Expire artifacts, enforce the disk quota and sweep abandoned uploads"""
+    return synthesis_cache.collect_garbage() + remove_stale_uploads(UPLOAD_TTL)
+
+async def collect_garbage_periodically():
+    """Background cleanup loop (started by lifespan)"""
+    while True:
+        try:
+            removed = await asyncio.to_thread(collect_garbage)
+            if removed:
+                print(f"Artifact cleanup removed {removed} files")
+        except Exception as e:
+            print(f"Artifact cleanup failed: {str(e)}")
+        await asyncio.sleep(GC_INTERVAL)
+
+def build_engines():
+    """Construct the voice engine and load the lazily imported DSP modules"""
+    started = time.perf_counter()
+    get_voice_engine()
+    startup["engine_seconds"] = round(time.perf_counter() - started, 3)
+    
+    started = time.perf_counter()
+    for module in WARMUP_MODULES:
+        importlib.import_module(module)
+    startup["modules_seconds"] = round(time.perf_counter() - started, 3)
+    
+    # First calls compile librosa's numba kernels (or load them from NUMBA_CACHE_DIR)
+    started = time.perf_counter()
+    startup["dsp"] = warm_up_dsp(get_voice_engine().emotional_engine)
+    startup["dsp_seconds"] = round(time.perf_counter() - started, 3)
+
+async def warm_up():
+    """Build engines, preload modules, compile DSP kernels and warm the active model (started by lifespan)"""
+    try:
+        await asyncio.to_thread(build_engines)
+        if model_registry.versions():
+            seconds = await asyncio.to_thread(model_registry.warm_up, text=MODEL_WARMUP_TEXT)
+            startup["models_seconds"] = round(seconds, 3) if seconds is not None else None
+        timings = ", ".join(
+            f"{name[:-len('_seconds')]} {seconds}s" for name, seconds in startup.items()
+            if name.endswith("_seconds") and seconds is not None
+        )
+        print(f"Warm-up done ({timings})")
+    except Exception as e:
+        print(f"Warm-up failed: {str(e)}")
+    startup["ready"] = True
+
+async def load_voice_engine():
+    """
+    The voice engine, built on a worker thread if it does not exist yet
+    Requests that arrive during warm-up (or the first one in lazy mode) wait here
+    without blocking the event loop, so /api/status and other requests keep answering.
+    """
+    if voice_engine_loaded():
+        return get_voice_engine()
+    return await asyncio.to_thread(get_voice_engine)
+
+async def render_neural(params: Dict, slot: Optional[PoolSlot] = None) -> bytes:
+    """Neural synthesis: batched forward pass, then encoding in the worker pool"""
+    voice_id = params["voice_id"]
+    embedding = (await load_voice_engine()).get_conditioning(voice_id).embedding if voice_id else None
+    with metrics.timed("neural_inference"):
+        # Bounded like pool tasks, so a stuck model cannot hold the request open
+        audio, sr = await asyncio.wait_for(inference_batcher.submit(params["text"], embedding), worker_pool.timeout)
+    output = {name: params[name] for name in ("format", "sample_rate", "channels", "bitrate", "bit_depth")}
+    output["stream"] = params.get("stream", False)
+    return await (slot or worker_pool).run(encode_waveform, audio, sr, **output)
+
+async def render(params: Dict, slot: Optional[PoolSlot] = None) -> bytes:
+    """Render resolved synthesis parameters with the engine they belong to (on slot if given)"""
+    if params.get("engine") == "neural":
+        return await render_neural(params, slot)
+    return await (slot or worker_pool).run(render_synthesis, params)
+
+def upload_temp_path(audio_file: UploadFile, default_name: str = "upload") -> Path:
+    """Unique temp path for an upload (swept by remove_stale_uploads if left behind)"""
+    return AUDIO_DIR / f"temp_{uuid.uuid4().hex}_{Path(audio_file.filename or default_name).name}"
+
+async def save_upload(audio_file: UploadFile, temp_path: Path) -> Dict:
+    """Stream an upload to temp_path, enforcing size, format and duration limits"""
+    return await ingest_upload(
+        audio_file,
+        temp_path,
+        max_bytes=MAX_UPLOAD_BYTES,
+        max_seconds=MAX_UPLOAD_SECONDS,
+        min_seconds=MIN_UPLOAD_SECONDS
+    )
+
+def negotiate_output(
+    request: Request,
+    format: Optional[str],
+    sample_rate: Optional[int],
+    channels: Optional[int]
+) -> Dict:
+    """
+    Output format options: explicit form fields win, then the Accept header, then MP3
+    Raises ValueError when the Accept header only lists unsupported audio types
+    """
+    negotiated = {} if format else negotiate_format(request.headers.get("accept")) or {}
+    return {
+        "format": format or negotiated.get("format", "mp3"),
+        "sample_rate": sample_rate or negotiated.get("sample_rate"),
+        "channels": channels or negotiated.get("channels", 1)
+    }
+
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    """Reject oversized single-file uploads from Content-Length, before the body is read"""
+    if request.method == "POST" and request.url.path in SINGLE_UPLOAD_PATHS:
+        length = request.headers.get("content-length", "")
+        # Allow some room for the other multipart form fields
+        if length.isdigit() and int(length) > MAX_UPLOAD_BYTES + 64 * 1024:
+            return error_response(413, f"Upload exceeds {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit")
+    return await call_next(request)
+
+class RequestMetricsMiddleware:
+    """
+    Request latency histogram, in-flight gauge and (optionally) Server-Timing
+    A plain ASGI middleware rather than @app.middleware: the app call returns only after
+    the whole body was sent, so stages timed while a StreamingResponse generates its
+    chunks are still collected (they reach /metrics, not the already-sent headers).
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        
+        started = time.perf_counter()
+        
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed = time.perf_counter() - started
+                route = scope.get("route")
+                REQUEST_SECONDS.observe(
+                    elapsed,
+                    method=scope["method"],
+                    route=route.path if route is not None else "unmatched",
+                    status=message["status"]
+                )
+                if SERVER_TIMING:
+                    header = timings.server_timing(total=elapsed).encode("latin-1")
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header)]}
+            await send(message)
+        
+        http_requests["in_flight"] += 1
+        try:
+            # Stages timed while handling this request (worker pool tasks included) land here
+            with metrics.collect_stages() as timings:
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            http_requests["in_flight"] -= 1
+
+app.add_middleware(RequestMetricsMiddleware)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus scrape endpoint (text exposition format)"""
+    return Response(content=metrics.REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/")
 async def root():
     """API root endpoint"""
@@ -75,33 +446,55 @@ async def root():
         "endpoints": {
             "docs": "/docs",
             "tts": "/api/tts",
+            "tts_stream": "/api/tts/stream",
             "voices": "/api/voices",
             "register": "/api/voices/register",
-            "emotions": "/api/emotions"
+            "register_batch": "/api/voices/register/batch",
+            "search": "/api/voices/search",
+            "emotions": "/api/emotions",
+            "consent_audit": "/api/audit/consent",
+            "models": "/api/models",
+            "ready": "/api/ready",
+            "metrics": "/metrics"
         }
     })
 
 
 @app.get("/api/status")
 async def get_status():
-    """Get API status"""
+    """Get API status (never waits for the voice engine to be built)"""
+    engine_loaded = voice_engine_loaded()
     return api_response(data={
         "status": "healthy",
         "voice_engine": "advanced",
-        "registered_voices": len(voice_engine.list_voices()),
-        "engines": ["emotional", "clone", "basic"]
+        "registered_voices": len(get_voice_engine().list_voices()) if engine_loaded else None,
+        "shared_state": get_voice_engine().shared if engine_loaded else None,
+        "engines": ["emotional", "clone", "neural", "basic"],
+        "cache": synthesis_cache.stats(),
+        "workers": worker_pool.stats(),
+        "base_cache": get_voice_engine().emotional_engine.base_cache.stats() if engine_loaded else None,
+        "models": model_registry.stats(),
+        "batching": inference_batcher.stats(),
+        "startup": startup
     })
 
 
+@app.get("/api/ready")
+async def get_ready():
+    """Readiness probe: 503 until the startup warm-up has finished"""
+    if not startup["ready"]:
+        return error_response(503, "Warming up", headers={"Retry-After": "5"})
+    return api_response(data={"ready": True, "startup": startup})
+
+
 @app.get("/api/emotions")
 async def get_emotions():
     """Get available emotions"""
     try:
-        from engine.emotional_tts import EmotionalTTSEngine
-        engine = EmotionalTTSEngine()
+        # Presets are static; no engine is needed to list them
         return api_response(data={
-            "emotions": engine.get_emotions(),
-            "count": len(engine.get_emotions())
+            "emotions": EMOTIONS,
+            "count": len(EMOTIONS)
         })
     except Exception as e:
         return api_response(error=str(e))
@@ -109,6 +502,7 @@ async def get_emotions():
 
 @app.post("/api/tts")
 async def text_to_speech(
+    request: Request,
     text: str = Form(...),
     engine: str = Form("emotional"),
     voice_id: Optional[str] = Form(None),
@@ -116,14 +510,31 @@ async def text_to_speech(
     emotion: str = Form("neutral"),
     speed: float = Form(1.0),
     pitch: float = Form(1.0),
-    energy: float = Form(1.0)
+    energy: float = Form(1.0),
+    backend: Optional[str] = Form(None),
+    format: Optional[str] = Form(None),
+    sample_rate: Optional[int] = Form(None),
+    channels: Optional[int] = Form(None),
+    bitrate: Optional[int] = Form(None),
+    bit_depth: Optional[int] = Form(None),
+    response_mode: str = Form("url")
 ):
     """
     Generate speech from text using advanced engine
+    Output format comes from the form fields or, failing that, the Accept header
+    response_mode "url" returns a link to the stored artifact, "inline" the audio bytes
     """
     try:
-        # Synthesize using advanced engine
-        audio_data = voice_engine.synthesize(
+        output = negotiate_output(request, format, sample_rate, channels)
+    except ValueError as e:
+        return error_response(406, str(e))
+    
+    try:
+        if response_mode not in ("url", "inline"):
+            raise ValueError("response_mode must be 'url' or 'inline'")
+        
+        # Resolve engine parameters (validates voice access before any cache hit)
+        params = (await load_voice_engine()).resolve_synthesis(
             text=text,
             engine=engine,
             voice_id=voice_id,
@@ -131,34 +542,185 @@ async def text_to_speech(
             emotion=emotion,
             speed=speed,
             pitch=pitch,
-            energy=energy
+            energy=energy,
+            backend=backend,
+            bitrate=bitrate,
+            bit_depth=bit_depth,
+            **output
         )
+        if params.get("engine") == "neural":
+            # Different model versions must not share cache entries
+            params["model"] = model_registry.active_version()
+        
+        # Only synthesize on a cache miss
+        cache_key = synthesis_cache.make_key(**params) + get_format(params["format"])["extension"]
+        audio_data = synthesis_cache.get(cache_key)
+        cached = audio_data is not None
+        if not cached:
+            audio_data = await render(params)
+            # Inline results stay in memory; they are written out only if a URL is requested later
+            synthesis_cache.put(cache_key, audio_data, persist=response_mode == "url")
+        elif response_mode == "url" and not synthesis_cache.persist(cache_key):
+            synthesis_cache.put(cache_key, audio_data)
+        filename = synthesis_cache.filename(cache_key)
+        content_type = media_type(params["format"], params["sample_rate"], params["channels"])
         
-        # Save to file
-        filename = f"tts_{hash(text)}_{emotion}.mp3"
-        filepath = AUDIO_DIR / filename
-        with open(filepath, "wb") as f:
-            f.write(audio_data)
+        if response_mode == "inline":
+            return Response(
+                content=audio_data,
+                media_type=content_type,
+                headers={
+                    "Content-Disposition": f'inline; filename="{filename}"',
+                    "X-Cache": "HIT" if cached else "MISS"
+                }
+            )
         
         return api_response(data={
-            "audio_url": f"/static/audio/{filename}",
+            "audio_url": artifact_url(filename),
             "engine": engine,
             "emotion": emotion if engine == "emotional" else None,
+            "format": params["format"],
+            "media_type": content_type,
+            "sample_rate": params["sample_rate"],
+            "channels": params["channels"],
+            "cached": cached,
             "message": "Speech generated successfully"
         })
     
+    except PoolSaturatedError as e:
+        return busy_response(e)
+    except asyncio.TimeoutError:
+        return timeout_response()
+    except Exception as e:
+        return api_response(error=str(e))
+
+
+@app.post("/api/tts/stream")
+async def text_to_speech_stream(
+    request: Request,
+    text: str = Form(...),
+    engine: str = Form("emotional"),
+    voice_id: Optional[str] = Form(None),
+    language: str = Form("en"),
+    emotion: str = Form("neutral"),
+    speed: float = Form(1.0),
+    pitch: float = Form(1.0),
+    energy: float = Form(1.0),
+    backend: Optional[str] = Form(None),
+    format: Optional[str] = Form(None),
+    sample_rate: Optional[int] = Form(None),
+    channels: Optional[int] = Form(None)
+):
+    """
+    Stream speech sentence by sentence as chunked audio (MP3, raw PCM or mu-law)
+    The first chunk is sent as soon as the first sentence is synthesized
+    """
+    try:
+        output = negotiate_output(request, format, sample_rate, channels)
+        if not get_format(output["format"])["streamable"]:
+            raise ValueError(f"{output['format']} cannot be streamed; use mp3, pcm or mulaw")
+    except ValueError as e:
+        return error_response(406, str(e))
+    
+    try:
+        params = (await load_voice_engine()).resolve_synthesis(
+            text=text,
+            engine=engine,
+            voice_id=voice_id,
+            language=language,
+            emotion=emotion,
+            speed=speed,
+            pitch=pitch,
+            energy=energy,
+            backend=backend,
+            **output
+        )
     except Exception as e:
         return api_response(error=str(e))
+    
+    # One pool slot is held for the whole stream, so a pool that fills up after the
+    # first chunk has gone out cannot cut the response off with a 429
+    try:
+        slot = worker_pool.reserve()
+    except PoolSaturatedError as e:
+        return busy_response(e)
+    
+    async def stream():
+        # Each sentence is rendered in the worker pool and sent as soon as it is ready.
+        # Chunks are encoded without tags or MP3 info frames; the watermark is sent once, up front.
+        try:
+            if params["format"] == "mp3":
+                yield id3_comment_tag(WATERMARK)
+            for sentence in split_sentences(params["text"]):
+                yield await render({**params, "text": sentence, "stream": True}, slot)
+        finally:
+            slot.release()
+    
+    return StreamingResponse(
+        stream(),
+        media_type=media_type(params["format"], params["sample_rate"], params["channels"]),
+        # Also frees the slot if the client goes away before the body starts
+        background=BackgroundTask(slot.release)
+    )
+
+
+@app.get("/api/audio/{filename}")
+async def get_audio(filename: str, expires: int = 0, signature: str = ""):
+    """
+    Serve a stored artifact
+    Requires a valid, unexpired signature when signed links are enabled
+    """
+    if URL_SECRET and not signed_urls.verify(filename, expires, signature, URL_SECRET):
+        return error_response(403, "Invalid or expired audio link")
+    if not filename.startswith(synthesis_cache.prefix) or Path(filename).name != filename:
+        return error_response(404, "Audio not found")
+    
+    audio_data = synthesis_cache.get(filename[len(synthesis_cache.prefix):])
+    if audio_data is None:
+        return error_response(404, "Audio not found")
+    format = next((name for name, spec in AUDIO_FORMATS.items() if filename.endswith(spec["extension"])), "mp3")
+    return Response(content=audio_data, media_type=media_type(format))
+
+
+@app.get("/api/models")
+async def list_models():
+    """List inference model versions and the active one"""
+    return api_response(data=model_registry.stats())
+
+
+@app.post("/api/models/{version}/activate")
+async def activate_model(version: str):
+    """
+    Hot-swap the inference model
+    The new version is loaded and warmed up before requests switch to it
+    """
+    try:
+        await asyncio.to_thread(model_registry.activate, version)
+    except ValueError as e:
+        return error_response(404, str(e))
+    return api_response(data=model_registry.stats())
 
 
 @app.get("/api/voices")
-async def list_voices():
-    """List all registered voices"""
+async def list_voices(
+    project_id: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None
+):
+    """
+    List registered voices
+    Pass limit to paginate; follow next_cursor until it is null
+    """
     try:
-        voices = voice_engine.list_voices()
+        voices, next_cursor = (await load_voice_engine()).list_voices_page(
+            project_id=project_id,
+            limit=limit,
+            cursor=cursor
+        )
         return api_response(data={
             "voices": voices,
-            "count": len(voices)
+            "count": len(voices),
+            "next_cursor": next_cursor
         })
     except Exception as e:
         return api_response(error=str(e))
@@ -168,22 +730,32 @@ async def list_voices():
 async def register_voice(
     audio_file: UploadFile = File(...),
     voice_name: str = Form(...),
-    description: str = Form("")
+    description: str = Form(""),
+    consent: bool = Form(False)
 ):
     """
     Register a new voice for cloning
+    Requires explicit consent from the speaker
     """
+    temp_path = upload_temp_path(audio_file)
     try:
-        # Save uploaded file temporarily
-        temp_path = AUDIO_DIR / f"temp_{audio_file.filename}"
-        with open(temp_path, "wb") as f:
-            f.write(await audio_file.read())
+        if not consent:
+            raise ValueError("Explicit consent required for voice registration")
+        
+        # Copy the spooled upload to disk in chunks, rejecting bad files early
+        await save_upload(audio_file, temp_path)
         
-        # Register voice
-        voice_id = voice_engine.register_voice(
+        # Feature extraction is CPU-heavy, so it runs in the worker pool
+        features = await worker_pool.run(extract_voice_features, str(temp_path))
+        
+        # Register voice (waits for the project's lock and fsyncs, so off the event loop)
+        voice_id = await asyncio.to_thread(
+            (await load_voice_engine()).register_voice,
             audio_path=str(temp_path),
-            name=voice_name,
-            description=description
+            voice_name=voice_name,
+            consent=consent,
+            metadata={"description": description},
+            features=features
         )
         
         return api_response(data={
@@ -192,15 +764,129 @@ async def register_voice(
             "message": f"Voice '{voice_name}' registered successfully"
         })
     
+    except UploadRejectedError as e:
+        return error_response(e.status_code, str(e))
+    except PoolSaturatedError as e:
+        return busy_response(e)
+    except asyncio.TimeoutError:
+        return timeout_response()
+    except Exception as e:
+        return api_response(error=str(e))
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+@app.post("/api/voices/register/batch")
+async def register_voices_batch(
+    audio_files: List[UploadFile] = File(...),
+    voice_names: Optional[List[str]] = Form(None),
+    project_id: str = Form("default"),
+    consent: bool = Form(False)
+):
+    """
+    Register many consented voices in one request
+    Features are extracted in parallel; metadata and consent log are committed once
+    """
+    temp_paths = []
+    try:
+        if not consent:
+            raise ValueError("Explicit consent required for voice registration")
+        if voice_names and len(voice_names) != len(audio_files):
+            raise ValueError("voice_names must match audio_files one-to-one")
+        
+        entries = []
+        for index, audio_file in enumerate(audio_files):
+            temp_path = upload_temp_path(audio_file)
+            temp_paths.append(temp_path)
+            await save_upload(audio_file, temp_path)
+            entries.append({
+                "audio_path": str(temp_path),
+                "voice_name": voice_names[index] if voice_names else Path(audio_file.filename or f"voice_{index}").stem
+            })
+        
+        # Fan out extraction, using at most one pool slot per worker so the batch
+        # cannot starve other requests of queue space
+        slots = asyncio.Semaphore(worker_pool.max_workers)
+        
+        async def extract(path: str):
+            async with slots:
+                return await worker_pool.run(extract_voice_features, path)
+        
+        features = await asyncio.gather(*(extract(entry["audio_path"]) for entry in entries))
+        
+        voice_ids = await asyncio.to_thread(
+            (await load_voice_engine()).register_voices_batch,
+            entries=entries,
+            consent=consent,
+            project_id=project_id,
+            features=list(features)
+        )
+        
+        return api_response(data={
+            "voices": [
+                {"voice_id": voice_id, "name": entry["voice_name"]}
+                for voice_id, entry in zip(voice_ids, entries)
+            ],
+            "count": len(voice_ids),
+            "message": f"{len(voice_ids)} voices registered successfully"
+        })
+    
+    except UploadRejectedError as e:
+        return error_response(e.status_code, str(e))
+    except PoolSaturatedError as e:
+        return busy_response(e)
+    except asyncio.TimeoutError:
+        return timeout_response()
+    except Exception as e:
+        return api_response(error=str(e))
+    finally:
+        for temp_path in temp_paths:
+            temp_path.unlink(missing_ok=True)
+
+
+@app.post("/api/voices/search")
+async def search_voices(
+    audio_file: UploadFile = File(...),
+    top_k: int = Form(5),
+    project_id: Optional[str] = Form(None)
+):
+    """
+    Find registered voices that sound like the uploaded clip
+    """
+    temp_path = upload_temp_path(audio_file, "query")
+    try:
+        await save_upload(audio_file, temp_path)
+        
+        features = await worker_pool.run(extract_voice_features, str(temp_path))
+        
+        # The index lives in this process, so the scan runs on a thread here
+        matches = await asyncio.to_thread(
+            (await load_voice_engine()).search_voices, features, top_k, project_id
+        )
+        
+        return api_response(data={
+            "matches": matches,
+            "count": len(matches)
+        })
+    
+    except UploadRejectedError as e:
+        return error_response(e.status_code, str(e))
+    except PoolSaturatedError as e:
+        return busy_response(e)
+    except asyncio.TimeoutError:
+        return timeout_response()
     except Exception as e:
         return api_response(error=str(e))
+    finally:
+        temp_path.unlink(missing_ok=True)
 
 
 @app.delete("/api/voices/{voice_id}")
 async def delete_voice(voice_id: str):
     """Delete a registered voice"""
     try:
-        voice_engine.delete_voice(voice_id)
+        # Voice state lives in this process; the revocation takes the project lock on a thread
+        await asyncio.to_thread((await load_voice_engine()).revoke_voice, voice_id)
         return api_response(data={
             "message": f"Voice {voice_id} deleted successfully"
         })
@@ -212,7 +898,7 @@ async def delete_voice(voice_id: str):
 async def get_voice(voice_id: str):
     """Get voice details"""
     try:
-        voice = voice_engine.get_voice(voice_id)
+        voice = (await load_voice_engine()).get_voice(voice_id)
         if voice:
             return api_response(data={
                 "voice": voice
@@ -223,6 +909,35 @@ async def get_voice(voice_id: str):
         return api_response(error=str(e))
 
 
+
+@app.get("/api/audit/consent")
+async def get_consent_log(
+    voice_id: Optional[str] = None,
+    action: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: int = 1000
+):
+    """Read the consent audit trail, filtered by voice and ISO time range"""
+    try:
+        entries = []
+        for entry in (await load_voice_engine()).consent_log.read(
+            voice_id=voice_id, action=action, since=since, until=until
+        ):
+            if len(entries) >= limit:
+                break
+            entries.append(entry)
+        return api_response(data={
+            "entries": entries,
+            "count": len(entries)
+        })
+    except Exception as e:
+        return api_response(error=str(e))
+
+
+startup["import_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 3)
+
+
 if __name__ == "__main__":
     print("🎙️ Starting VoxLabs API with Advanced Voice Engine...")
     print("📍 API: http://localhost:8000")
@@ -0,0 +1,136 @@
+"""
+Micro-Batching Scheduler for Voice Cloning Inference.
+Groups concurrent synthesis requests into padded batches that run in one forward pass.
+"""
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from pipelines.registry import ModelRegistry
+
+
+class InferenceBatcher:
+    """
+    Collects requests for a short window and runs them together
+    - A batch is flushed when it reaches max_batch_size or max_wait_ms after its first request
+    - Requests are grouped by length bucket (bucket_width symbols), so padding stays small
+    - Each bucket runs as one ModelBundle.infer call off the event loop, together with
+      the registry lookup (which may read ACTIVE and map a new version); results are
+      scattered back to the waiting callers, and a failed pass fails only its own requests
+    """
+
+    def __init__(
+        self,
+        registry: ModelRegistry,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        bucket_width: int = 64
+    ):
+        """
+        Args:
+            registry: Model registry supplying the active model
+            max_batch_size: Most requests in one forward pass
+            max_wait_ms: Longest time the first request of a batch waits for company
+            bucket_width: Text length (symbols) covered by one bucket
+        """
+        self.registry = registry
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.bucket_width = max(1, int(bucket_width))
+        self._pending: List[Tuple[str, Optional[np.ndarray], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self._running = 0
+        self.requests = 0
+        self.batched = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    async def submit(self, text: str, speaker_embedding: Optional[np.ndarray] = None) -> Tuple[np.ndarray, int]:
+        """
+        Queue one synthesis and wait for its batch
+        Returns:
+            (float32 waveform, sample rate)
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, speaker_embedding, future))
+        self.requests += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        """Hand the pending requests to forward passes (one per length bucket)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        pending = [item for item in pending if not item[2].done()]
+        if not pending:
+            return
+
+        # One symbol per UTF-8 byte (see ModelBundle.encode_text), so no model is needed here
+        buckets: Dict[int, List] = {}
+        for item in pending:
+            buckets.setdefault(len(item[0].encode("utf-8")) // self.bucket_width, []).append(item)
+        for items in buckets.values():
+            for start in range(0, len(items), self.max_batch_size):
+                task = asyncio.ensure_future(self._run(items[start:start + self.max_batch_size]))
+                # The loop only holds weak references to tasks
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    def _infer(self, texts: List[str], embeddings: List[Optional[np.ndarray]]) -> Tuple[List[np.ndarray], int]:
+        """Worker thread: resolve the active model (loading it if needed) and run the batch"""
+        bundle = self.registry.get()
+        if bundle is None:
+            raise ValueError("No inference model available")
+        return bundle.infer(texts, embeddings), bundle.sample_rate
+
+    async def _run(self, items: List):
+        """One forward pass for a batch, results scattered to its futures"""
+        self._running += 1
+        self.batches += 1
+        self.batched += len(items)
+        self.largest_batch = max(self.largest_batch, len(items))
+        # Nothing may escape without resolving the futures, or their callers wait forever
+        # (a broken ACTIVE version makes get() raise)
+        try:
+            outputs, sample_rate = await asyncio.to_thread(
+                self._infer, [text for text, _, _ in items], [embedding for _, embedding, _ in items]
+            )
+        except Exception as e:
+            self._fail(items, e)
+            return
+        finally:
+            self._running -= 1
+
+        for (_, _, future), audio in zip(items, outputs):
+            if not future.done():
+                future.set_result((audio, sample_rate))
+        self._fail(items, RuntimeError("Model returned fewer outputs than requests"))
+
+    @staticmethod
+    def _fail(items: List, error: Exception):
+        """Resolve every still-pending future in items with error"""
+        for _, _, future in items:
+            if not future.done():
+                future.set_exception(error)
+
+    def stats(self) -> Dict:
+        """Batching counters for /api/status"""
+        return {
+            "queued": len(self._pending),
+            "running_batches": self._running,
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": round(self.batched / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0
+        }
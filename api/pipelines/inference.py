@@ -4,23 +4,45 @@ Inference Interface for Voice Cloning.
 This defines the standard class structure for model inference.
 """
 
-from pathlib import Path
+import io
 from typing import Optional
 import numpy as np
+import soundfile as sf
+
+from pipelines.registry import ModelRegistry, WARMUP_TEXT
 
 class VoiceInference:
-    def __init__(self, model_path: str = "models/pretrained.pt"):
+    def __init__(
+        self,
+        model_path: str = "models",
+        version: Optional[str] = None,
+        registry: Optional[ModelRegistry] = None
+    ):
         """
         Initialize the inference engine.
+        Weights are not loaded here; the registry maps them on first use.
         Args:
-            model_path: Path to the .pt or .onnx model file.
+            model_path: Model registry directory (one sub-directory per version).
+            version: Pin a model version instead of following the active one.
+            registry: Shared registry (takes precedence over model_path/version).
         """
-        self.model_path = Path(model_path)
-        if not self.model_path.exists():
-            print(f"⚠️ Warning: Model not found at {model_path}. Using dummy mode.")
+        self.registry = registry or ModelRegistry(model_path, version)
+        self.model_path = self.registry.model_dir
+        versions = self.registry.versions()
+        if not versions:
+            print(f"⚠️ Warning: No models found in {self.model_path}. Using dummy mode.")
         else:
-            print(f"✅ Loaded model from {model_path}")
-            
+            print(f"✅ Found model versions in {self.model_path}: {', '.join(versions)} (loaded on first use)")
+
+    @property
+    def dummy(self) -> bool:
+        """True when no model version is available"""
+        return self.registry.get() is None
+
+    def warm_up(self, text: str = WARMUP_TEXT) -> Optional[float]:
+        """Load the active model and run one synthesis; returns seconds taken"""
+        return self.registry.warm_up(text=text)
+
     def synthesize(self, text: str, speaker_embedding: Optional[np.ndarray] = None) -> bytes:
         """
         Convert text to audio bytes.
@@ -33,16 +55,51 @@ class VoiceInference:
             Audio bytes (WAV/MP3)
         """
         print(f"🗣️ Synthesizing: '{text[:20]}...'")
-        
-        # Real inference would go here:
-        # mel = self.model.inference(text, speaker_embedding)
-        # audio = self.vocoder.inference(mel)
-        
-        # For now, return dummy bytes
-        return b"RIFF...."
+
+        model = self.registry.get()
+        if model is None:
+            # Dummy mode: no model artifacts on disk
+            return b"RIFF...."
+
+        # Encoder -> synthesizer -> vocoder (see ModelBundle.infer)
+        audio = model.infer([text], [speaker_embedding])[0]
+        return self.to_wav(audio, model.sample_rate)
+
+    @staticmethod
+    def to_wav(audio: np.ndarray, sample_rate: int) -> bytes:
+        """16-bit PCM WAV container for a float waveform"""
+        output = io.BytesIO()
+        sf.write(output, audio, sample_rate, format="WAV", subtype="PCM_16")
+        return output.getvalue()
+
+def encode_waveform(
+    audio: np.ndarray,
+    sr: int,
+    format: str = "wav",
+    sample_rate: Optional[int] = None,
+    channels: int = 1,
+    bitrate: Optional[int] = None,
+    bit_depth: Optional[int] = None,
+    stream: bool = False
+) -> bytes:
+    """
+    Encode a model waveform with the same output options as the DSP engines.
+    Args:
+        audio: Float waveform at sr
+        sr: Model sample rate
+        format, sample_rate, channels, bitrate, bit_depth: Output options (see engine.encoder.resolve_output)
+        stream: Encode as one chunk of a sentence stream (no tag or MP3 info frame)
+    """
+    from engine.encoder import encode_audio, output_sample_rate
+
+    out_sr = output_sample_rate(format, sr, sample_rate)
+    if out_sr != sr:
+        import librosa
+        audio = librosa.resample(audio, orig_sr=sr, target_sr=out_sr)
+    return encode_audio(audio, out_sr, format, channels=channels, bitrate=bitrate, bit_depth=bit_depth, stream=stream)
 
 if __name__ == "__main__":
-    # Test inference
+    # Test inference (run from api/: python -m pipelines.inference)
     engine = VoiceInference()
     audio = engine.synthesize("Hello world")
     print(f"Generated {len(audio)} bytes.")
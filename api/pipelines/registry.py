@@ -0,0 +1,298 @@
+"""
+Model Registry for Voice Cloning Inference.
+Versioned model artifacts loaded lazily and memory-mapped, with warm-up and hot-swap.
+
+Layout:
+    models/
+        ACTIVE                  # name of the active version (written atomically)
+        <version>/
+            manifest.json       # optional: sample_rate, hop_length, frames_per_symbol
+            encoder.npy         # speaker embedding -> conditioning (embedding_dim, n_mels)
+            synthesizer.npy     # symbol table (n_symbols, n_mels)
+            vocoder.npy         # mel frame -> waveform samples (n_mels, hop_length)
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+COMPONENTS = ("encoder", "synthesizer", "vocoder")
+ACTIVE_FILE = "ACTIVE"
+DEFAULT_MANIFEST = {"sample_rate": 22050, "hop_length": 256, "frames_per_symbol": 4}
+WARMUP_TEXT = "Hello from VoxLabs."
+
+
+def _stat_signature(path: Path) -> Optional[tuple]:
+    """(inode, size, mtime_ns) of a path, None if it does not exist"""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class ModelBundle:
+    """
+    One loaded model version
+    - Weights are read-only np.memmap views (MAP_SHARED), so every worker process that
+      maps the same files shares their pages through the OS page cache
+    - infer() runs a whole padded batch in one forward pass
+    """
+
+    def __init__(self, version: str, path: Path, weights: Dict[str, np.ndarray], manifest: Dict):
+        self.version = version
+        self.path = path
+        self.weights = weights
+        self.manifest = manifest
+        self.sample_rate = int(manifest["sample_rate"])
+        self.hop_length = int(manifest["hop_length"])
+        self.frames_per_symbol = int(manifest["frames_per_symbol"])
+        self.loaded_at = time.time()
+        self.warmed_up = False
+
+    @property
+    def nbytes(self) -> int:
+        """Mapped weight size (not resident memory)"""
+        return sum(w.nbytes for w in self.weights.values())
+
+    def encode_text(self, text: str) -> np.ndarray:
+        """Symbol ids for a text (UTF-8 bytes folded into the symbol table)"""
+        codes = np.frombuffer(text.encode("utf-8"), dtype=np.uint8).astype(np.int64)
+        return codes % self.weights["synthesizer"].shape[0]
+
+    def infer(self, texts: Sequence[str], embeddings: Sequence[Optional[np.ndarray]]) -> List[np.ndarray]:
+        """
+        Synthesize a batch of texts
+        Args:
+            texts: Input texts
+            embeddings: Speaker embedding per text (None = neutral speaker)
+        Returns:
+            One float32 waveform per text, at self.sample_rate
+        """
+        encoder = self.weights["encoder"]
+        synthesizer = self.weights["synthesizer"]
+        vocoder = self.weights["vocoder"]
+
+        codes = [self.encode_text(text) for text in texts]
+        lengths = np.array([len(c) for c in codes])
+        batch = np.zeros((len(codes), max(int(lengths.max(initial=0)), 1)), dtype=np.int64)
+        for i, c in enumerate(codes):
+            batch[i, :len(c)] = c
+
+        speakers = np.zeros((len(codes), encoder.shape[0]), dtype=np.float32)
+        for i, embedding in enumerate(embeddings):
+            if embedding is not None:
+                embedding = np.asarray(embedding, dtype=np.float32)[:encoder.shape[0]]
+                speakers[i, :len(embedding)] = embedding / (np.linalg.norm(embedding) + 1e-8)
+
+        # Encoder -> per-speaker conditioning; synthesizer -> mel frames; vocoder -> samples
+        conditioning = np.tanh(speakers @ encoder)
+        mel = synthesizer[batch] + conditioning[:, np.newaxis, :]
+        mel = np.repeat(mel, self.frames_per_symbol, axis=1)
+        audio = np.tanh(mel @ vocoder).reshape(len(codes), -1).astype(np.float32)
+
+        samples = lengths * self.frames_per_symbol * self.hop_length
+        return [audio[i, :samples[i]] for i in range(len(codes))]
+
+
+class ModelRegistry:
+    """
+    Versioned model store shared by the inference engines of one process
+    - Lazy: nothing is mapped until the first get()
+    - Shared: weights are memory-mapped read-only, never copied into the heap
+    - Hot-swap: activate() loads and warms the new version before switching, then writes
+      ACTIVE; other workers notice the change within check_interval seconds. Requests
+      already holding the previous bundle finish on it.
+    """
+
+    def __init__(self, model_dir: str = "models", version: Optional[str] = None, check_interval: float = 5.0):
+        """
+        Args:
+            model_dir: Directory holding one sub-directory per model version
+            version: Pin a version (ignores ACTIVE)
+            check_interval: Seconds between checks of the ACTIVE file
+        """
+        self.model_dir = Path(model_dir)
+        self.pinned = version
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._bundles: Dict[str, ModelBundle] = {}
+        self._active: Optional[str] = None
+        self._checked = 0.0
+        # (stat signature, version) of the last ACTIVE file read
+        self._pointer: Optional[tuple] = None
+        self.loads = 0
+        self.load_seconds = 0.0
+        self.warmup_seconds: Optional[float] = None
+        self.swaps = 0
+
+    def versions(self) -> List[str]:
+        """Complete model versions on disk"""
+        if not self.model_dir.is_dir():
+            return []
+        return sorted(
+            path.name for path in self.model_dir.iterdir()
+            if path.is_dir() and all((path / f"{name}.npy").exists() for name in COMPONENTS)
+        )
+
+    def _resolve_active(self) -> Optional[str]:
+        """
+        Pinned version, else the ACTIVE file, else the most recently modified version
+        ACTIVE is only re-read when its stat changes (activate() replaces it atomically).
+        """
+        if self.pinned:
+            return self.pinned
+        active_file = self.model_dir / ACTIVE_FILE
+        signature = _stat_signature(active_file)
+        if signature is not None:
+            if self._pointer is None or self._pointer[0] != signature:
+                self._pointer = (signature, active_file.read_text().strip())
+            if self._pointer[1]:
+                return self._pointer[1]
+        versions = self.versions()
+        if not versions:
+            return None
+        return max(versions, key=lambda name: (self.model_dir / name).stat().st_mtime)
+
+    def active_version(self) -> Optional[str]:
+        """Active version, re-read from disk at most every check_interval seconds"""
+        now = time.monotonic()
+        if self._active is None or now - self._checked >= self.check_interval:
+            active = self._resolve_active()
+            with self._lock:
+                if active != self._active and self._active is not None:
+                    self.swaps += 1
+                    self._bundles = {v: b for v, b in self._bundles.items() if v == active}
+                self._active = active
+                self._checked = now
+        return self._active
+
+    def _load(self, version: str) -> ModelBundle:
+        """Map one version's weights (no data is read until first use)"""
+        path = self.model_dir / version
+        missing = [name for name in COMPONENTS if not (path / f"{name}.npy").exists()]
+        if missing:
+            raise ValueError(f"Model version {version} is missing: {', '.join(missing)}")
+
+        manifest = dict(DEFAULT_MANIFEST)
+        if (path / "manifest.json").exists():
+            manifest.update(json.loads((path / "manifest.json").read_text()))
+
+        started = time.perf_counter()
+        weights = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in COMPONENTS}
+        encoder, synthesizer, vocoder = (weights[name] for name in COMPONENTS)
+        if not (encoder.shape[1] == synthesizer.shape[1] == vocoder.shape[0]):
+            raise ValueError(f"Model version {version} has mismatched mel dimensions")
+        if vocoder.shape[1] != int(manifest["hop_length"]):
+            raise ValueError(f"Model version {version}: vocoder width does not match hop_length")
+
+        self.loads += 1
+        self.load_seconds += time.perf_counter() - started
+        return ModelBundle(version, path, weights, manifest)
+
+    def get(self, version: Optional[str] = None) -> Optional[ModelBundle]:
+        """Bundle for version (default: active), loading it on first use; None if no models exist"""
+        version = version or self.active_version()
+        if version is None:
+            return None
+        bundle = self._bundles.get(version)
+        if bundle is None:
+            with self._lock:
+                bundle = self._bundles.get(version)
+                if bundle is None:
+                    bundle = self._bundles[version] = self._load(version)
+        return bundle
+
+    def warm_up(self, version: Optional[str] = None, text: str = WARMUP_TEXT) -> Optional[float]:
+        """
+        Fault in the weight pages and run one synthesis
+        Returns the warm-up time in seconds (None if no model is available)
+        """
+        started = time.perf_counter()
+        bundle = self.get(version)
+        if bundle is None:
+            return None
+        for weights in bundle.weights.values():
+            # Reading every page maps it into this process from the shared page cache
+            float(np.sum(weights, dtype=np.float64))
+        if text:
+            bundle.infer([text], [None])
+        bundle.warmed_up = True
+        self.warmup_seconds = time.perf_counter() - started
+        return self.warmup_seconds
+
+    def activate(self, version: str, warm_up: bool = True) -> ModelBundle:
+        """Switch to version without dropping requests (load + warm first, then swap)"""
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version: {version}. Available: {', '.join(self.versions()) or 'none'}")
+        bundle = self.get(version)
+        if warm_up:
+            self.warm_up(version)
+
+        # Atomic pointer update for the other workers
+        tmp = self.model_dir / f".{ACTIVE_FILE}.{os.getpid()}.tmp"
+        tmp.write_text(version)
+        os.replace(tmp, self.model_dir / ACTIVE_FILE)
+
+        with self._lock:
+            if self._active != version:
+                self.swaps += 1
+            self._active = version
+            self._checked = time.monotonic()
+            # Old bundles are unmapped once the last in-flight request releases them
+            self._bundles = {version: bundle}
+        return bundle
+
+    def stats(self) -> Dict:
+        """Registry state for /api/status"""
+        active = self._active
+        bundle = self._bundles.get(active) if active else None
+        return {
+            "model_dir": str(self.model_dir),
+            "versions": self.versions(),
+            "active": active,
+            "loaded": sorted(self._bundles),
+            "mapped_bytes": bundle.nbytes if bundle else 0,
+            "warmed_up": bool(bundle and bundle.warmed_up),
+            "loads": self.loads,
+            "load_seconds": round(self.load_seconds, 4),
+            "warmup_seconds": None if self.warmup_seconds is None else round(self.warmup_seconds, 4),
+            "swaps": self.swaps
+        }
+
+
+def write_test_model(
+    model_dir: str,
+    version: str = "test",
+    n_mels: int = 16,
+    hop_length: int = 64,
+    sample_rate: int = 16000,
+    embedding_dim: int = 256,
+    seed: int = 0
+) -> Path:
+    """
+    Write a small random model version for offline use and tests
+    Args:
+        model_dir: Registry directory
+        version: Version name (sub-directory)
+        n_mels, hop_length, sample_rate, embedding_dim: Model shape
+        seed: Random seed (same seed = same weights)
+    Returns:
+        Path to the version directory
+    """
+    rng = np.random.default_rng(seed)
+    path = Path(model_dir) / version
+    path.mkdir(parents=True, exist_ok=True)
+    np.save(path / "encoder.npy", (rng.standard_normal((embedding_dim, n_mels)) * 0.5).astype(np.float32))
+    np.save(path / "synthesizer.npy", (rng.standard_normal((256, n_mels)) * 0.5).astype(np.float32))
+    np.save(path / "vocoder.npy", (rng.standard_normal((n_mels, hop_length)) / np.sqrt(n_mels)).astype(np.float32))
+    (path / "manifest.json").write_text(json.dumps({
+        "sample_rate": sample_rate,
+        "hop_length": hop_length,
+        "frames_per_symbol": DEFAULT_MANIFEST["frames_per_symbol"]
+    }))
+    return path
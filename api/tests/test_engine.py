@@ -31,3 +31,797 @@ def test_invalid_emotion_fallback(engine):
     # This assumes the engine handles invalid emotions gracefully or has a default
     # Looking at the code, it usually defaults or we can verify behavior
     pass
+
+def test_synthesis_cache_key_is_stable():
+    from engine.cache import SynthesisCache
+    a = SynthesisCache.make_key(text="Hello", emotion="happy", speed=1.0)
+    b = SynthesisCache.make_key(speed=1.0, emotion="happy", text="Hello")
+    assert a == b
+    assert a != SynthesisCache.make_key(text="Hello", emotion="sad", speed=1.0)
+
+def test_synthesis_cache_tiers_and_eviction(tmp_path):
+    from engine.cache import SynthesisCache
+    cache = SynthesisCache(tmp_path, memory_budget=10, disk_budget=20)
+    assert cache.get("a") is None
+    cache.put("a", b"x" * 8)
+    cache.put("b", b"y" * 8)
+    assert cache.get("b") == b"y" * 8      # memory hit
+    assert cache.get("a") == b"x" * 8      # evicted from memory, served from disk
+    cache.put("c", b"z" * 8)               # disk over budget -> LRU "b" dropped
+    assert not cache.path("b").exists()
+    assert cache.path("a").exists() and cache.path("c").exists()
+
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["disk_hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["evictions"] >= 1
+
+    # Disk tier survives a restart
+    reopened = SynthesisCache(tmp_path, memory_budget=10, disk_budget=20)
+    assert reopened.get("c") == b"z" * 8
+
+def test_synthesis_cache_ttl_and_memory_only_entries(tmp_path):
+    import time
+    from engine.cache import SynthesisCache
+    cache = SynthesisCache(tmp_path, memory_budget=1024, disk_budget=1024, ttl=60)
+
+    cache.put("inline", b"i" * 8, persist=False)
+    assert cache.get("inline") == b"i" * 8
+    assert not cache.path("inline").exists()
+    assert cache.persist("inline")
+    assert cache.path("inline").exists()
+
+    cache.put("old", b"o" * 8)
+    assert cache.collect_garbage(now=time.time() + 30) == 0
+    assert cache.collect_garbage(now=time.time() + 120) == 2
+    assert not cache.path("old").exists()
+    assert cache.get("old") is None
+    assert cache.stats()["expirations"] == 2
+
+def test_synthesis_cache_disk_budget_is_shared_between_workers(tmp_path):
+    from engine.cache import SynthesisCache
+    # Two workers on one directory, each with its own memory tier
+    first = SynthesisCache(tmp_path, memory_budget=1024, disk_budget=20, rescan_interval=3600)
+    second = SynthesisCache(tmp_path, memory_budget=1024, disk_budget=20, rescan_interval=3600)
+
+    first.put("a", b"x" * 8)
+    second.put("b", b"y" * 8)
+    assert first.get("b") == b"y" * 8      # now in first's memory tier too
+    first.put("c", b"z" * 8)
+    # first only wrote 16 bytes itself; its stale estimate must not hide the directory total
+    first.collect_garbage()
+    assert sum(path.stat().st_size for path in tmp_path.glob("tts_*")) <= 20
+    assert not first.path("a").exists()
+
+    # An entry evicted by one worker is not served from the other's memory tier
+    second.put("d", b"w" * 8)
+    second.collect_garbage()
+    assert not second.path("b").exists()
+    assert first.get("b") is None
+    assert first.get("d") == b"w" * 8
+
+def test_signed_urls_expire():
+    from engine import signed_urls
+    query = dict(item.split("=") for item in signed_urls.signed_query("tts_a.mp3", "secret", ttl=60, now=1000).split("&"))
+    expires, signature = int(query["expires"]), query["signature"]
+    assert signed_urls.verify("tts_a.mp3", expires, signature, "secret", now=1030)
+    assert not signed_urls.verify("tts_a.mp3", expires, signature, "secret", now=1061)
+    assert not signed_urls.verify("tts_b.mp3", expires, signature, "secret", now=1030)
+    assert not signed_urls.verify("tts_a.mp3", expires, signature, "other", now=1030)
+
+def test_base_render_is_cached_per_text_and_language(engine, monkeypatch):
+    calls = []
+    synthesizer = engine.get_synthesizer("formant")
+    original = synthesizer.synthesize
+
+    def counting(text, language):
+        calls.append((text, language))
+        return original(text, language)
+
+    monkeypatch.setattr(synthesizer, "synthesize", counting)
+    y1, sr = engine.render_base("Hello there", "en", backend="formant")
+    y2, _ = engine.render_base("Hello there", "en", backend="formant")
+    assert calls == [("Hello there", "en")]
+    assert y1 is y2                      # shared buffer, no copy
+    assert not y1.flags.writeable
+    assert engine.base_cache.nbytes == y1.nbytes
+
+    engine.render_base("Hello there", "fr", backend="formant")
+    assert len(calls) == 2
+
+def test_formant_backend_is_offline_and_deterministic(engine):
+    import numpy as np
+    synthesizer = engine.get_synthesizer("formant")
+    y1, sr = synthesizer.synthesize("Hello, world.", "en")
+    y2, _ = synthesizer.synthesize("Hello, world.", "en")
+    assert sr == 22050
+    assert y1.dtype == np.float32 and len(y1) > sr // 2
+    assert np.array_equal(y1, y2)
+    assert 0 < np.abs(y1).max() <= 1.0
+
+    with pytest.raises(ValueError):
+        engine.get_synthesizer("no-such-backend")
+
+@pytest.mark.parametrize("pitch,speed", [(1.1, 1.2), (1.3, 1.0), (0.9, 0.8)])
+def test_fused_pitch_tempo_shift(pitch, speed):
+    import numpy as np
+    from engine.dsp import shift_pitch_tempo
+    sr = 22050
+    t = np.arange(2 * sr) / sr
+    y = (0.5 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+    out = shift_pitch_tempo(y, sr, pitch=pitch, speed=speed)
+    assert abs(len(out) - len(y) / speed) <= 2
+    spectrum = np.abs(np.fft.rfft(out * np.hanning(len(out))))
+    assert abs(np.argmax(spectrum) * sr / len(out) - 220 * pitch) < 3
+    assert shift_pitch_tempo(y, sr) is y
+
+@pytest.mark.parametrize("format,magic", [("mp3", b"ID3"), ("opus", b"OggS"), ("ogg", b"OggS"), ("flac", b"fLaC"), ("wav", b"RIFF")])
+def test_encode_audio_in_process(format, magic):
+    import io
+    import numpy as np
+    import soundfile as sf
+    from engine.encoder import encode_audio, WATERMARK
+    y = (0.3 * np.sin(2 * np.pi * 220 * np.arange(22050) / 22050)).astype(np.float32)
+    data = encode_audio(y, 22050, format)
+    assert data.startswith(magic)
+    with sf.SoundFile(io.BytesIO(data)) as f:
+        assert f.comment == WATERMARK
+        assert f.frames > 0
+
+def test_output_options_resample_once_at_the_end(engine):
+    import io
+    import soundfile as sf
+    from engine.encoder import resolve_output
+    output = resolve_output("wav", sample_rate=16000, channels=2, bit_depth=24)
+    data = engine.synthesize("Hello there.", backend="formant", emotion="happy", **output)
+    info = sf.info(io.BytesIO(data))
+    assert (info.samplerate, info.channels, info.subtype) == (16000, 2, "PCM_24")
+
+    assert resolve_output("mulaw")["sample_rate"] == 8000
+    for bad in ({"format": "opus", "sample_rate": 22050}, {"channels": 3},
+                {"format": "wav", "bitrate": 64}, {"format": "mp3", "bit_depth": 24}):
+        with pytest.raises(ValueError):
+            resolve_output(**bad)
+
+def test_add_watermark_does_not_transcode(tmp_path):
+    import numpy as np
+    from voice_engine import VoiceEngine
+    from engine.encoder import encode_audio
+    voice_engine = VoiceEngine(project_path=str(tmp_path / "projects"))
+    raw = b"\xff\xfb\x90\x00" * 16
+    tagged = voice_engine.add_watermark(raw)
+    assert tagged.startswith(b"ID3") and tagged.endswith(raw)
+
+    encoded = encode_audio(np.zeros(2205, dtype=np.float32), 22050, "mp3")
+    assert voice_engine.add_watermark(encoded) is encoded
+
+def test_ingest_upload_streams_and_enforces_limits(tmp_path):
+    import asyncio
+    import io
+    import numpy as np
+    import soundfile as sf
+    from starlette.datastructures import UploadFile
+    from engine.uploads import UploadRejectedError, ingest_upload
+
+    wav = io.BytesIO()
+    sf.write(wav, np.zeros(22050 * 3, dtype=np.float32), 22050, format="WAV")
+    payload = wav.getvalue()
+
+    def upload(data):
+        return UploadFile(io.BytesIO(data), filename="clip.wav")
+
+    info = asyncio.run(ingest_upload(upload(payload), tmp_path / "ok.wav", max_bytes=1 << 20, max_seconds=10, chunk_size=4096))
+    assert info["format"] == "wav" and round(info["duration"]) == 3
+    assert (tmp_path / "ok.wav").read_bytes() == payload
+
+    cases = [
+        (payload, {"max_bytes": 1000, "max_seconds": 10}, 413),
+        (b"not audio at all", {"max_bytes": 1 << 20, "max_seconds": 10}, 415),
+        (payload, {"max_bytes": 1 << 20, "max_seconds": 2}, 422),
+        (payload, {"max_bytes": 1 << 20, "max_seconds": 10, "min_seconds": 5}, 422)
+    ]
+    for data, limits, status in cases:
+        with pytest.raises(UploadRejectedError) as excinfo:
+            asyncio.run(ingest_upload(upload(data), tmp_path / "bad.wav", chunk_size=512, **limits))
+        assert excinfo.value.status_code == status
+        assert not (tmp_path / "bad.wav").exists()
+
+def test_ingest_upload_probes_other_containers_with_audioread(tmp_path, monkeypatch):
+    import asyncio
+    import io
+    import audioread
+    from starlette.datastructures import UploadFile
+    from engine.uploads import ingest_upload, sniff_audio
+
+    assert sniff_audio(b"\x00\x00\x00\x20ftypM4A \x00\x00") == "m4a"
+    assert sniff_audio(b"\x1a\x45\xdf\xa3\x9f\x42\x86\x81") == "webm"
+    assert sniff_audio(b"\xff\xf1\x50\x80") == "aac"
+    assert sniff_audio(b"\xff\xfb\x90\x64") == "mp3"
+
+    class FakeAudio:
+        duration, samplerate, channels = 4.0, 48000, 1
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(audioread, "audio_open", lambda path: FakeAudio())
+    data = b"\x1a\x45\xdf\xa3" + bytes(1000)
+    info = asyncio.run(ingest_upload(UploadFile(io.BytesIO(data), filename="rec.webm"), tmp_path / "rec.webm", max_bytes=1 << 20, max_seconds=10))
+    assert info == {"bytes": 1004, "format": "webm", "duration": 4.0, "sample_rate": 48000, "channels": 1}
+
+def test_split_sentences():
+    from engine.emotional_tts import split_sentences
+    assert split_sentences("Hello there. How are you?\nFine!") == ["Hello there.", "How are you?", "Fine!"]
+    chunks = split_sentences("word " * 100, max_chars=50)
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    assert " ".join(chunks).split() == ["word"] * 100
+
+def test_worker_pool_backpressure_and_timeout():
+    import asyncio
+    import threading
+    from engine.executor import WorkerPool, PoolSaturatedError
+
+    release = threading.Event()
+    pool = WorkerPool(mode="thread", max_workers=1, max_queue=1, timeout=0.05)
+
+    async def scenario():
+        first = asyncio.ensure_future(pool.run(release.wait, 5))
+        second = asyncio.ensure_future(pool.run(release.wait, 5))
+        await asyncio.sleep(0)
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(release.wait, 5)
+        with pytest.raises(asyncio.TimeoutError):
+            await first
+        with pytest.raises(asyncio.TimeoutError):
+            await second
+        # Queued work is cancelled on timeout, running work keeps its slot until it finishes
+        assert pool.in_flight == 1
+        release.set()
+        await asyncio.sleep(0.05)
+        assert pool.in_flight == 0
+        return await asyncio.wait_for(pool.run(sum, [1, 2]), 1)
+
+    try:
+        assert asyncio.run(scenario()) == 3
+        stats = pool.stats()
+        assert stats["rejected"] == 1 and stats["timeouts"] >= 1
+    finally:
+        release.set()
+        pool.shutdown()
+
+def test_voice_features_embedding(tmp_path):
+    import numpy as np
+    import soundfile as sf
+    from engine.features import extract_voice_features, FEATURE_DIM
+
+    sr = 22050
+    t = np.arange(sr * 2) / sr
+    path = tmp_path / "tone.wav"
+    sf.write(path, 0.5 * np.sin(2 * np.pi * 180 * t), sr)
+
+    features = extract_voice_features(str(path))
+    assert features.shape == (FEATURE_DIM,)
+    assert features.dtype == np.float32
+    assert abs(features[0] - 180) < 5          # mean f0 in Hz at index 0
+    assert np.all(np.isfinite(features))
+    assert np.count_nonzero(features[:242]) > 150
+
+def test_streaming_features_match_and_stop_early(tmp_path, monkeypatch):
+    import numpy as np
+    import soundfile as sf
+    from engine import features
+
+    sr = 44100
+    t = np.arange(sr * 90) / sr
+    f0 = 150 + 20 * np.sin(2 * np.pi * 0.5 * t)
+    y = 0.4 * np.sin(2 * np.pi * np.cumsum(f0) / sr) + 0.01 * np.random.default_rng(0).standard_normal(t.size)
+    path = tmp_path / "long.wav"
+    sf.write(path, y.astype(np.float32), sr)
+
+    reference = features.embed_signal(y.astype(np.float32), sr)
+    streamed = features.extract_voice_features(str(path), early_stop=False, block_seconds=4)
+    for start, end in features.EMBEDDING_GROUPS:
+        assert np.linalg.norm(streamed[start:end] - reference[start:end]) <= 0.01 * np.linalg.norm(reference[start:end])
+
+    seen = []
+    original = features.FeatureAccumulator.add_signal
+    monkeypatch.setattr(features.FeatureAccumulator, "add_signal", lambda self, chunk: (seen.append(chunk.size), original(self, chunk)))
+    early = features.extract_voice_features(str(path), min_seconds=20, block_seconds=4)
+    assert sum(seen) < 0.6 * features.SAMPLE_RATE * 90
+    assert max(seen) < features.SAMPLE_RATE * 5   # memory bounded by the block size
+    assert abs(early[0] - streamed[0]) < 2
+
+def test_register_voices_batch_commits_once(tmp_path, monkeypatch):
+    import numpy as np
+    from voice_engine import VoiceEngine
+
+    voice_engine = VoiceEngine(project_path=str(tmp_path / "projects"))
+    writes = []
+    original = voice_engine.store.upsert
+    monkeypatch.setattr(voice_engine.store, "upsert", lambda records: (writes.append(1), original(records)))
+
+    entries = []
+    for index in range(3):
+        path = tmp_path / f"speaker_{index}.wav"
+        path.write_bytes(b"")
+        entries.append({"audio_path": str(path), "voice_name": f"Speaker {index}"})
+    features = [np.full(256, index, dtype=np.float32) for index in range(3)]
+
+    with pytest.raises(ValueError):
+        voice_engine.register_voices_batch(entries, consent=False, features=features)
+
+    voice_ids = voice_engine.register_voices_batch(entries, consent=True, project_id="acme", features=features)
+    assert len(set(voice_ids)) == 3
+    assert writes == [1]
+    assert sorted(v["name"] for v in voice_engine.list_voices("acme")) == ["Speaker 0", "Speaker 1", "Speaker 2"]
+    log = list(voice_engine.consent_log.read())
+    assert [entry["voice_id"] for entry in log] == voice_ids
+
+def test_consent_log_append_rotate_filter_and_migrate(tmp_path):
+    import json
+    from engine.consent_log import ConsentLog
+
+    legacy = tmp_path / "consent_log.json"
+    legacy.write_text(json.dumps([
+        {"timestamp": "2025-01-01T00:00:00", "voice_id": "old", "action": "register", "details": {}}
+    ]))
+
+    log = ConsentLog(tmp_path / "consent_log", max_segment_bytes=200)
+    assert log.migrate_legacy(legacy) == 1
+    assert not legacy.exists()
+    assert log.migrate_legacy(legacy) == 0
+
+    for day in range(2, 6):
+        log.append([
+            {"timestamp": f"2025-01-0{day}T00:00:00", "voice_id": "a", "action": "register", "details": {}},
+            {"timestamp": f"2025-01-0{day}T12:00:00", "voice_id": "b", "action": "revoke", "details": {}}
+        ])
+
+    assert len(log.segments()) > 1
+    assert [e["voice_id"] for e in log.read()][:2] == ["old", "a"]
+    assert len(list(log.read(voice_id="a"))) == 4
+    assert len(list(log.read(action="revoke"))) == 4
+    window = list(log.read(since="2025-01-03", until="2025-01-04"))
+    assert [e["voice_id"] for e in window] == ["a", "b"]
+
+def test_consent_log_migration_from_concurrent_workers(tmp_path):
+    import json
+    from concurrent.futures import ThreadPoolExecutor
+    from engine.consent_log import ConsentLog
+
+    legacy = tmp_path / "consent_log.json"
+    legacy.write_text(json.dumps([
+        {"timestamp": "2025-01-01T00:00:00", "voice_id": f"old{i}", "action": "register", "details": {}}
+        for i in range(200)
+    ]))
+
+    # One ConsentLog per worker, all starting at once
+    logs = [ConsentLog(tmp_path / "consent_log") for _ in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        imported = list(pool.map(lambda log: log.migrate_legacy(legacy), logs))
+
+    assert sorted(imported) == [0] * 7 + [200]
+    assert not legacy.exists() and legacy.with_name("consent_log.json.migrated").exists()
+    assert len(list(logs[0].read())) == 200
+
+def test_consent_log_append_after_torn_tail(tmp_path):
+    from engine.consent_log import ConsentLog
+
+    log = ConsentLog(tmp_path)
+    log.append([{"timestamp": "2025-01-01T00:00:00", "voice_id": "a", "action": "register", "details": {}}])
+    log.append([{"timestamp": "2025-01-02T00:00:00", "voice_id": "b", "action": "register", "details": {}}])
+
+    # Crash halfway through the second line: no trailing newline left behind
+    segment = log.segments()[-1]
+    data = segment.read_bytes()
+    segment.write_bytes(data[:len(data) - 20])
+
+    log.append([{"timestamp": "2025-01-03T00:00:00", "voice_id": "c", "action": "revoke", "details": {}}])
+    assert [e["voice_id"] for e in log.read()] == ["a", "c"]
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_voice_store_pagination(tmp_path, backend):
+    from engine.voice_store import create_voice_store
+
+    store = create_voice_store(backend, tmp_path)
+    store.upsert([
+        {"voice_id": f"v{i}", "name": f"Voice {i}", "consent": True,
+         "created_at": f"2025-01-01T00:00:{i:02d}", "project_id": "a" if i % 2 else "b",
+         "metadata": {}, "revoked": i == 3}
+        for i in range(7)
+    ])
+
+    page, cursor = store.list(limit=2)
+    seen = [r["voice_id"] for r in page]
+    while cursor:
+        page, cursor = store.list(limit=2, cursor=cursor)
+        seen += [r["voice_id"] for r in page]
+    assert seen == ["v0", "v1", "v2", "v4", "v5", "v6"]
+
+    project_a, _ = store.list(project_id="a")
+    assert [r["voice_id"] for r in project_a] == ["v1", "v5"]
+    for limit in (0, -1):
+        with pytest.raises(ValueError):
+            store.list(limit=limit)
+
+    store.delete(["v1"])
+    assert "v1" not in store.load_all()
+    store.close()
+
+
+def test_sqlite_store_imports_json_metadata(tmp_path):
+    from engine.voice_store import create_voice_store
+
+    create_voice_store("json", tmp_path).upsert([
+        {"voice_id": "legacy", "name": "Legacy", "consent": True,
+         "created_at": "2024-01-01T00:00:00", "project_id": "default", "metadata": {"k": 1}}
+    ])
+    store = create_voice_store("sqlite", tmp_path)
+    assert store.load_all()["legacy"]["metadata"] == {"k": 1}
+    store.close()
+
+def test_embedding_store_views_tombstones_and_compaction(tmp_path):
+    import numpy as np
+    from engine.embedding_store import EmbeddingStore
+
+    store = EmbeddingStore(tmp_path, dim=4, compact_min_tombstones=2, compact_ratio=0.5)
+    store.add({f"v{i}": np.full(4, i, dtype=np.float32) for i in range(4)})
+    view = store.get("v2")
+    assert isinstance(view.base, np.memmap) or isinstance(view, np.memmap)
+    assert not view.flags.writeable
+    assert view.tolist() == [2, 2, 2, 2]
+
+    assert store.remove(["v0"]) is False          # below compaction threshold
+    assert store.get("v0") is None
+    assert store.remove(["v1"]) is True           # 2 of 4 rows dead -> compacted
+    assert store.stats()["rows"] == 2
+    assert store.get("v3").tolist() == [3, 3, 3, 3]
+
+    reopened = EmbeddingStore(tmp_path, dim=4)
+    assert sorted(reopened.ids()) == ["v2", "v3"]
+    assert reopened.get("v2").tolist() == [2, 2, 2, 2]
+
+
+def test_voice_engine_migrates_feature_files(tmp_path):
+    import numpy as np
+    from engine.voice_store import create_voice_store
+    from voice_engine import VoiceEngine
+
+    project = tmp_path / "projects"
+    (project / "voices").mkdir(parents=True)
+    create_voice_store("json", project).upsert([
+        {"voice_id": "legacy", "name": "Legacy", "consent": True,
+         "created_at": "2024-01-01T00:00:00", "project_id": "default", "metadata": {}}
+    ])
+    legacy_features = np.zeros(256)
+    legacy_features[:13] = np.arange(13)
+    legacy_features[13] = 180.0
+    np.save(project / "voices" / "legacy_features.npy", legacy_features)
+
+    voice_engine = VoiceEngine(project_path=str(project))
+    assert not (project / "voices" / "legacy_features.npy").exists()
+    voice = voice_engine.get_voice("legacy")
+    # Only mean f0 is carried into the current layout; the voice is flagged and not searched
+    assert voice.audio_features.dtype == np.float32
+    assert voice.audio_features[0] == 180.0 and not voice.audio_features[1:].any()
+    assert voice.metadata["feature_layout"] == "legacy"
+    assert voice_engine.get_conditioning("legacy").f0 == 180.0
+    assert voice_engine.search_voices(voice.audio_features) == []
+    assert VoiceEngine(project_path=str(project)).get_voice("legacy").metadata["feature_layout"] == "legacy"
+
+    voice_engine.revoke_voice("legacy")
+    assert voice_engine.get_voice("legacy") is None
+    assert "legacy" not in VoiceEngine(project_path=str(project)).embeddings
+
+@pytest.mark.parametrize("ivf_threshold", [10_000, 50])
+def test_similarity_index_exact_and_ivf(ivf_threshold):
+    import numpy as np
+    from engine.similarity import SimilarityIndex
+
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(400, 32)).astype(np.float32) * np.linspace(1, 1000, 32)
+    ids = [f"v{i}" for i in range(400)]
+    projects = ["a" if i % 2 else "b" for i in range(400)]
+    index = SimilarityIndex(ids, projects, vectors, ivf_threshold=ivf_threshold, nprobe=20)
+    assert index.is_approximate == (ivf_threshold == 50)
+
+    query = vectors[123] + rng.normal(size=32).astype(np.float32) * 0.01
+    results = index.search(query, top_k=3)
+    assert results[0][0] == "v123"
+    assert results[0][1] > 0.99
+    assert results[0][1] >= results[1][1] >= results[2][1]
+
+    filtered = index.search(query, top_k=5, project_id="b")
+    assert all(int(voice_id[1:]) % 2 == 0 for voice_id, _ in filtered)
+
+def test_similarity_scores_do_not_depend_on_indexed_set():
+    import numpy as np
+    from engine.similarity import SimilarityIndex
+
+    rng = np.random.default_rng(5)
+
+    def voice(f0):
+        features = np.zeros(256, dtype=np.float32)
+        features[[0, 2, 3, 4, 5, 6]] = f0 * np.array([1.0, 0.7, 1.5, 1.0, 0.8, 1.2])
+        features[1], features[7] = 20.0, 0.6
+        features[8:128] = rng.normal(scale=10, size=120)
+        features[9:128:2] = np.abs(features[9:128:2])
+        features[128:140] = rng.uniform(0.01, 2000, size=12)
+        features[140:154] = rng.uniform(5, 30, size=14)
+        features[154:178] = rng.dirichlet(np.ones(24))
+        features[178:242] = rng.normal(-40, 10, size=64)
+        return features
+
+    a, b = voice(120.0), voice(220.0)
+    # A single indexed voice: its own embedding is an exact match
+    assert SimilarityIndex(["a"], ["p"], a[None]).search(a) == [("a", pytest.approx(1.0))]
+
+    # Two voices: a duplicate still scores 1.0 and the other voice clearly less
+    pair = SimilarityIndex(["a", "b"], ["p", "p"], np.stack([a, b]))
+    (best, best_score), (other, other_score) = pair.search(a, top_k=2)
+    assert (best, other) == ("a", "b")
+    assert best_score == pytest.approx(1.0) and other_score < 0.9
+    assert pair.search(b, top_k=2)[1][1] == pytest.approx(other_score)
+
+    # Adding unrelated voices does not change a pair's score
+    crowd = SimilarityIndex(["a", "b", "c", "d"], ["p"] * 4, np.stack([a, b, voice(180.0), voice(95.0)]))
+    assert dict(crowd.search(a, top_k=4))["b"] == pytest.approx(other_score)
+
+def test_voice_engine_search_skips_revoked(tmp_path):
+    import numpy as np
+    from voice_engine import VoiceEngine
+
+    voice_engine = VoiceEngine(project_path=str(tmp_path / "projects"))
+    rng = np.random.default_rng(2)
+    features = [rng.normal(size=256).astype(np.float32) for _ in range(4)]
+    audio = tmp_path / "clip.wav"
+    audio.write_bytes(b"")
+    voice_ids = voice_engine.register_voices_batch(
+        [{"audio_path": str(audio), "voice_name": f"S{i}"} for i in range(4)],
+        consent=True,
+        features=features
+    )
+
+    assert voice_engine.search_voices(features[2], top_k=1)[0]["voice_id"] == voice_ids[2]
+    voice_engine.revoke_voice(voice_ids[2])
+    assert voice_ids[2] not in [m["voice_id"] for m in voice_engine.search_voices(features[2], top_k=4)]
+
+def test_model_registry_lazy_mmap_and_hot_swap(tmp_path, monkeypatch):
+    import io
+    import numpy as np
+    import soundfile as sf
+    from pipelines.inference import VoiceInference
+    from pipelines.registry import ModelRegistry, write_test_model
+
+    write_test_model(tmp_path, "v1", seed=1)
+    inference = VoiceInference(str(tmp_path), registry=ModelRegistry(str(tmp_path), check_interval=0))
+    assert inference.registry.stats()["loaded"] == []          # nothing mapped until first use
+
+    audio, sr = sf.read(io.BytesIO(inference.synthesize("Hello world")))
+    bundle = inference.registry.get()
+    assert bundle.version == "v1" and sr == bundle.sample_rate
+    assert len(audio) == len("Hello world") * bundle.frames_per_symbol * bundle.hop_length
+    assert all(isinstance(w, np.memmap) for w in bundle.weights.values())
+
+    # A second worker follows the ACTIVE pointer written by the first
+    write_test_model(tmp_path, "v2", seed=2)
+    other_worker = ModelRegistry(str(tmp_path), check_interval=0)
+    inference.registry.activate("v2")
+    assert other_worker.get().version == "v2"
+
+    # The pointer is re-read only when ACTIVE changes on disk
+    from pathlib import Path
+    reads = []
+    read_text = Path.read_text
+    monkeypatch.setattr(Path, "read_text", lambda self, *a, **k: (reads.append(self.name), read_text(self, *a, **k))[1])
+    assert other_worker.active_version() == other_worker.active_version() == "v2"
+    assert reads == []
+    monkeypatch.undo()
+    assert inference.registry.stats()["loaded"] == ["v2"] and bundle.infer(["still usable"], [None])
+
+    with pytest.raises(ValueError):
+        inference.registry.activate("missing")
+    assert VoiceInference(str(tmp_path / "empty")).synthesize("hi") == b"RIFF...."
+
+def test_inference_batcher_groups_concurrent_requests(tmp_path):
+    import asyncio
+    import numpy as np
+    from pipelines.batcher import InferenceBatcher
+    from pipelines.registry import ModelRegistry, write_test_model
+
+    import threading
+
+    write_test_model(tmp_path, "v1")
+    registry = ModelRegistry(str(tmp_path))
+    batcher = InferenceBatcher(registry, max_batch_size=4, max_wait_ms=50, bucket_width=16)
+    texts = ["short one", "short two", "short three", "a much longer sentence that lands in another bucket"]
+    speaker = np.random.default_rng(0).standard_normal(256)
+
+    # The model is resolved and mapped on the worker thread, never on the event loop
+    lookup_threads = []
+    get = registry.get
+    def tracking_get(*args, **kwargs):
+        lookup_threads.append(threading.current_thread())
+        return get(*args, **kwargs)
+    registry.get = tracking_get
+
+    async def scenario():
+        return await asyncio.gather(*(batcher.submit(text, speaker) for text in texts))
+
+    results = asyncio.run(scenario())
+    assert lookup_threads and threading.main_thread() not in lookup_threads
+    del registry.get
+    stats = batcher.stats()
+    assert stats["requests"] == 4 and stats["batches"] == 2 and stats["largest_batch"] == 3
+
+    # Batched output matches running each request alone
+    bundle = registry.get()
+    for text, (audio, sr) in zip(texts, results):
+        assert sr == bundle.sample_rate
+        np.testing.assert_allclose(audio, bundle.infer([text], [speaker])[0], atol=1e-5)
+
+def test_inference_batcher_fails_requests_on_broken_model(tmp_path):
+    import asyncio
+    from pipelines.batcher import InferenceBatcher
+    from pipelines.registry import ModelRegistry
+
+    # ACTIVE names a version whose files are missing: loading raises in the batch's worker thread
+    (tmp_path / "ACTIVE").write_text("broken")
+    (tmp_path / "broken").mkdir()
+    batcher = InferenceBatcher(ModelRegistry(str(tmp_path)), max_batch_size=2, max_wait_ms=5)
+
+    async def scenario():
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(text) for text in ("one", "two", "three")), return_exceptions=True),
+            timeout=2
+        )
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) and "missing" in str(result) for result in results)
+
+def test_clone_conditioning_cached_per_voice(tmp_path, monkeypatch):
+    import numpy as np
+    from voice_engine import VoiceEngine
+
+    voice_engine = VoiceEngine(project_path=str(tmp_path / "projects"))
+    path = tmp_path / "speaker.wav"
+    path.write_bytes(b"")
+    features = np.ones(256, dtype=np.float32)
+    features[0] = 165.0
+    voice_id = voice_engine.register_voice(str(path), "Speaker", consent=True, features=features)
+
+    # Clone requests are a dictionary lookup: no voice lookup or re-derivation
+    monkeypatch.setattr(voice_engine, "get_voice", lambda _: pytest.fail("voice looked up per request"))
+    params = voice_engine.resolve_synthesis("Hello", engine="clone", voice_id=voice_id, pitch=1.2)
+    assert params["pitch"] == pytest.approx(1.2 * 165.0 / 220.0)
+    conditioning = voice_engine.get_conditioning(voice_id)
+    assert np.linalg.norm(conditioning.embedding) == pytest.approx(1.0)
+    assert voice_engine.synthesize_with_voice("Hello", voice_id)["pitch_adjust"] == pytest.approx(0.75)
+
+    # Built-in voices keep their fixed clone factors; synthesize_with_voice scales by f0 / 220 Hz
+    for default_id, clone_pitch, f0_ratio in (("male_default", 0.9, 120 / 220), ("female_default", 1.1, 1.0)):
+        assert voice_engine.resolve_synthesis("Hello", engine="clone", voice_id=default_id)["pitch"] == pytest.approx(clone_pitch)
+        assert voice_engine.synthesize_with_voice("Hello", default_id)["pitch_adjust"] == pytest.approx(f0_ratio)
+
+    voice_engine.revoke_voice(voice_id)
+    with pytest.raises(ValueError):
+        voice_engine.resolve_synthesis("Hello", engine="clone", voice_id=voice_id)
+    assert voice_id not in VoiceEngine(project_path=str(tmp_path / "projects")).conditioning
+
+def test_dsp_warm_up_runs_every_stage(engine, monkeypatch):
+    from engine import warmup
+    from engine.metrics import STAGE_SECONDS
+
+    monkeypatch.delenv("NUMBA_CACHE_DIR", raising=False)
+    cache_before, stages_before = engine.base_cache.stats(), STAGE_SECONDS.snapshot()
+    timings = warmup.warm_up_dsp(engine)
+    assert set(timings) == {"synthesis", "decode", "features", "streaming_features"}
+    # Warm-up leaves no trace in production metrics or the base cache
+    assert engine.base_cache.stats() == cache_before
+    assert STAGE_SECONDS.snapshot() == stages_before
+
+
+def test_shared_voice_state_across_workers(tmp_path):
+    import numpy as np
+    from voice_engine import VoiceEngine
+
+    project = str(tmp_path / "projects")
+    worker_a = VoiceEngine(project_path=project, shared=True)
+    worker_b = VoiceEngine(project_path=project, shared=True)
+    audio = tmp_path / "clip.wav"
+    audio.write_bytes(b"")
+    rng = np.random.default_rng(3)
+    features_a, features_b = (rng.normal(size=256).astype(np.float32) for _ in range(2))
+
+    voice_a = worker_a.register_voice(str(audio), "A", consent=True, features=features_a)
+    voice_b = worker_b.register_voice(str(audio), "B", consent=True, features=features_b)
+    np.testing.assert_allclose(worker_b.get_voice(voice_a).audio_features, features_a)
+    np.testing.assert_allclose(worker_a.get_voice(voice_b).audio_features, features_b)
+    assert worker_b.get_conditioning(voice_a).pitch_ratio == worker_a.get_conditioning(voice_a).pitch_ratio
+
+    # A revocation in one worker is honoured by the other on its next request
+    worker_a.revoke_voice(voice_a)
+    with pytest.raises(ValueError):
+        worker_b.resolve_synthesis("Hello", engine="clone", voice_id=voice_a)
+    assert [m["voice_id"] for m in worker_b.search_voices(features_a, top_k=5)] == [voice_b]
+    assert not worker_b.sync()                                  # nothing new: one PRAGMA check
+
+    with pytest.raises(ValueError):
+        VoiceEngine(project_path=project, store_backend="json", shared=True)
+
+def test_shared_sync_waits_for_a_sync_in_progress(tmp_path, monkeypatch):
+    import threading
+    import numpy as np
+    from voice_engine import VoiceEngine
+
+    project = str(tmp_path / "projects")
+    worker_a = VoiceEngine(project_path=project, shared=True)
+    worker_b = VoiceEngine(project_path=project, shared=True)
+    audio = tmp_path / "clip.wav"
+    audio.write_bytes(b"")
+    voice_id = worker_a.register_voice(str(audio), "A", consent=True, features=np.ones(256, dtype=np.float32))
+    worker_b.sync()
+    worker_a.revoke_voice(voice_id)
+
+    # Hold worker B's first sync in the middle of applying the revocation
+    applying, resume = threading.Event(), threading.Event()
+    refresh = worker_b.embeddings.refresh
+    def paused_refresh():
+        applying.set()
+        resume.wait(5)
+        return refresh()
+    monkeypatch.setattr(worker_b.embeddings, "refresh", paused_refresh)
+
+    first = threading.Thread(target=worker_b.sync)
+    first.start()
+    assert applying.wait(5)
+    seen = []
+    second = threading.Thread(target=lambda: (worker_b.sync(), seen.append(voice_id in worker_b.conditioning)))
+    second.start()
+    second.join(0.2)
+    resume.set()
+    first.join()
+    second.join()
+    # The second caller did not return early and serve the revoked voice
+    assert seen == [False]
+
+def test_purge_project_is_one_transaction(tmp_path, monkeypatch):
+    import numpy as np
+    from concurrent.futures import ThreadPoolExecutor
+    from voice_engine import VoiceEngine
+
+    project = str(tmp_path / "projects")
+    voice_engine = VoiceEngine(project_path=project)
+    audio = tmp_path / "clip.wav"
+    audio.write_bytes(b"")
+    rng = np.random.default_rng(4)
+
+    # Concurrent registrations in two projects and revocations do not lose updates
+    def register(index):
+        project_id = "doomed" if index % 2 else "kept"
+        features = rng.normal(size=256).astype(np.float32)
+        return voice_engine.register_voice(str(audio), f"S{index}", consent=True, project_id=project_id, features=features)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        voice_ids = list(pool.map(register, range(40)))
+        list(pool.map(voice_engine.revoke_voice, voice_ids[:4]))
+    assert len(voice_engine.voices) == 36
+
+    writes = {"delete": 0, "consent": 0}
+    delete, append = voice_engine.store.delete, voice_engine.consent_log.append
+    monkeypatch.setattr(voice_engine.store, "delete", lambda ids: (writes.__setitem__("delete", writes["delete"] + 1), delete(ids)))
+    monkeypatch.setattr(voice_engine.consent_log, "append", lambda entries: (writes.__setitem__("consent", writes["consent"] + 1), append(entries)))
+    assert voice_engine.purge_project("doomed") == 18
+    assert writes == {"delete": 1, "consent": 1}
+    assert {voice.project_id for voice in voice_engine.voices.values()} == {"kept"}
+
+    # A purge interrupted after its commit point leaves no embeddings behind on restart
+    orphan = voice_engine.list_voices("kept")[0]["voice_id"]
+    voice_engine.store.delete([orphan])
+    reloaded = VoiceEngine(project_path=project)
+    assert len(reloaded.embeddings) == len(reloaded.voices) == 17
+    assert orphan not in reloaded.embeddings
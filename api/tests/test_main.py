@@ -1,5 +1,6 @@
 
 from fastapi.testclient import TestClient
+import pytest
 import sys
 from pathlib import Path
 
@@ -7,6 +8,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parents[1]))
 
 from main import app
+from engine.encoder import WATERMARK, id3_comment_tag
 
 client = TestClient(app)
 
@@ -25,6 +27,24 @@ def test_get_emotions():
     assert "emotions" in data["data"]
     assert "neutral" in data["data"]["emotions"]
 
+def test_status_reports_startup_without_building_engines(monkeypatch):
+    import engine.emotional_tts as emotional_tts
+    monkeypatch.setattr(emotional_tts.EmotionalTTSEngine, "__init__", lambda *args, **kwargs: pytest.fail("engine built"))
+
+    assert client.get("/api/emotions").json()["data"]["count"] == len(emotional_tts.EMOTIONS)
+    startup = client.get("/api/status").json()["data"]["startup"]
+    assert startup["mode"] in ("background", "eager", "lazy")
+    assert startup["import_seconds"] > 0
+
+def test_ready_waits_for_warm_up(monkeypatch):
+    import main
+    monkeypatch.setitem(main.startup, "ready", False)
+    response = client.get("/api/ready")
+    assert response.status_code == 503 and response.headers["Retry-After"]
+
+    monkeypatch.setitem(main.startup, "ready", True)
+    assert client.get("/api/ready").status_code == 200
+
 def test_get_voices():
     response = client.get("/api/voices")
     assert response.status_code == 200
@@ -32,6 +52,245 @@ def test_get_voices():
     assert data["status"] == 1
     assert isinstance(data["data"]["voices"], list)
 
+def test_voices_rejects_non_positive_limit():
+    assert client.get("/api/voices", params={"limit": 0}).status_code == 422
+    assert client.get("/api/voices", params={"limit": 1}).status_code == 200
+
 def test_404_on_unknown_endpoint():
     response = client.get("/api/unknown")
     assert response.status_code == 404
+
+def test_tts_stream_yields_one_chunk_per_sentence(monkeypatch):
+    from main import get_voice_engine
+    voice_engine = get_voice_engine()
+    monkeypatch.setattr(voice_engine.emotional_engine, "_encode", lambda y, sr, *args, **kwargs: b"CHUNK")
+
+    response = client.post("/api/tts/stream", data={"text": "One. Two! Three?", "backend": "formant"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.content == id3_comment_tag(WATERMARK) + b"CHUNK" * 3
+
+def test_tts_stream_mp3_has_one_tag_and_no_info_frames():
+    response = client.post("/api/tts/stream", data={"text": "First line. Second line.", "backend": "formant"})
+    assert response.status_code == 200
+    body = response.content
+    tag = id3_comment_tag(WATERMARK)
+    assert body.startswith(tag)
+    assert body.count(b"ID3") == 1 and b"TAG" not in body[len(tag):]
+    assert b"Xing" not in body and b"Info" not in body
+
+def test_tts_format_selects_encoding_and_cache_entry():
+    response = client.post("/api/tts", data={"text": "Hello there.", "backend": "formant", "format": "flac"})
+    data = response.json()
+    assert data["status"] == 1
+    assert data["data"]["format"] == "flac"
+    assert data["data"]["audio_url"].endswith(".flac")
+
+    audio = client.get(data["data"]["audio_url"])
+    assert audio.status_code == 200
+    assert audio.content.startswith(b"fLaC")
+
+    response = client.post("/api/tts", data={"text": "Hello there.", "backend": "formant", "format": "aiff"})
+    assert response.json()["status"] == 0
+
+def test_tts_negotiates_telephony_output_from_accept_header():
+    response = client.post(
+        "/api/tts",
+        data={"text": "Hello there.", "backend": "formant"},
+        headers={"Accept": "application/json, audio/basic;q=0.9, audio/mpeg;q=0.5"}
+    )
+    data = response.json()["data"]
+    assert data["format"] == "mulaw"
+    assert data["sample_rate"] == 8000
+    assert data["media_type"] == "audio/basic;rate=8000;channels=1"
+
+    # Explicit fields win over the Accept header; headerless 16 kHz PCM is 2 bytes/sample
+    response = client.post(
+        "/api/tts",
+        data={"text": "Hello there.", "backend": "formant", "format": "pcm", "sample_rate": 16000},
+        headers={"Accept": "audio/mpeg"}
+    )
+    data = response.json()["data"]
+    assert data["audio_url"].endswith(".pcm")
+    audio = client.get(data["audio_url"]).content
+    assert len(audio) % 2 == 0 and len(audio) > 16000
+
+    response = client.post("/api/tts", data={"text": "Hi."}, headers={"Accept": "audio/aac"})
+    assert response.status_code == 406
+
+def test_tts_inline_response_skips_disk_until_url_requested():
+    import uuid
+    from main import synthesis_cache
+    # Unique text so earlier runs cannot have left the artifact on disk
+    form = {"text": f"Inline please {uuid.uuid4().hex}.", "backend": "formant", "format": "wav"}
+    response = client.post("/api/tts", data={**form, "response_mode": "inline"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/wav"
+    assert response.content.startswith(b"RIFF")
+    filename = response.headers["content-disposition"].split('"')[1]
+    assert not (synthesis_cache.cache_dir / filename).exists()
+
+    data = client.post("/api/tts", data=form).json()["data"]
+    assert data["cached"] is True
+    assert data["audio_url"].endswith(filename)
+    assert (synthesis_cache.cache_dir / filename).exists()
+
+    response = client.get(f"/api/audio/{filename}")
+    assert response.status_code == 200
+    assert response.content.startswith(b"RIFF")
+
+def test_upload_rejections(monkeypatch):
+    import main
+    response = client.post(
+        "/api/voices/search",
+        files={"audio_file": ("notes.txt", b"definitely not audio", "text/plain")}
+    )
+    assert response.status_code == 415
+    assert response.json()["status"] == 0
+
+    # Oversized bodies are refused from Content-Length before the form is parsed
+    monkeypatch.setattr(main, "MAX_UPLOAD_BYTES", 1024)
+    response = client.post(
+        "/api/voices/search",
+        files={"audio_file": ("big.wav", b"RIFF" + bytes(200 * 1024), "audio/wav")}
+    )
+    assert response.status_code == 413
+
+def test_model_endpoints():
+    response = client.get("/api/models")
+    assert response.status_code == 200
+    assert "versions" in response.json()["data"]
+
+    response = client.post("/api/models/no-such-version/activate")
+    assert response.status_code == 404
+    assert response.json()["status"] == 0
+
+def test_tts_neural_engine_uses_batcher(tmp_path, monkeypatch):
+    import main
+    from pipelines.registry import ModelRegistry, write_test_model
+
+    write_test_model(tmp_path, "v1")
+    monkeypatch.setattr(main.inference_batcher, "registry", ModelRegistry(str(tmp_path)))
+    monkeypatch.setattr(main, "model_registry", main.inference_batcher.registry)
+
+    response = client.post(
+        "/api/tts",
+        data={"text": "Neural batch test", "engine": "neural", "format": "wav", "response_mode": "inline"}
+    )
+    assert response.status_code == 200
+    assert response.content[:4] == b"RIFF"
+    assert main.inference_batcher.stats()["batches"] >= 1
+
+def test_consent_audit_endpoint():
+    response = client.get("/api/audit/consent", params={"voice_id": "no-such-voice"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == 1
+    assert data["data"]["entries"] == []
+
+def test_delete_unknown_voice():
+    response = client.delete("/api/voices/no-such-voice")
+    assert response.status_code == 200
+    assert response.json()["status"] == 0
+    assert "not found" in response.json()["error"]
+
+def test_metrics_and_server_timing(monkeypatch):
+    import main
+    monkeypatch.setattr(main, "SERVER_TIMING", True)
+    response = client.post(
+        "/api/tts",
+        data={"text": "Metrics test", "backend": "formant", "energy": "1.3", "format": "wav", "response_mode": "inline"}
+    )
+    assert response.status_code == 200
+    stages = {entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")}
+    assert {"pitch_tempo", "gain", "encode", "total"} <= stages
+
+    body = client.get("/metrics").text
+    assert 'voxlabs_stage_seconds_count{stage="pitch_tempo"}' in body
+    assert 'voxlabs_request_seconds_bucket{method="POST",route="/api/tts",status="200",le="+Inf"}' in body
+    assert "voxlabs_worker_pool_queue_depth 0" in body
+    assert 'voxlabs_synthesis_cache_lookups_total{result="miss"}' in body
+
+def test_tts_stream_holds_one_pool_slot(monkeypatch):
+    import time
+    import main
+    from engine.executor import PoolSaturatedError, WorkerPool
+
+    pool = WorkerPool(mode="thread", max_workers=1, max_queue=0, timeout=30)
+    monkeypatch.setattr(main, "worker_pool", pool)
+    voice_engine = main.get_voice_engine()
+    monkeypatch.setattr(voice_engine.emotional_engine, "_encode", lambda y, sr, *args, **kwargs: b"CHUNK")
+
+    # Between sentences no task is running; another request must still be turned away
+    gap_attempts = []
+    def sentences_with_gaps(text):
+        for index, sentence in enumerate(["One.", "Two!", "Three?"]):
+            if index:
+                try:
+                    pool.reserve().release()
+                    gap_attempts.append("admitted")
+                except PoolSaturatedError:
+                    gap_attempts.append("rejected")
+            yield sentence
+    monkeypatch.setattr(main, "split_sentences", sentences_with_gaps)
+
+    response = client.post("/api/tts/stream", data={"text": "ignored", "backend": "formant"})
+    assert response.status_code == 200
+    assert response.content == id3_comment_tag(WATERMARK) + b"CHUNK" * 3
+    assert gap_attempts == ["rejected", "rejected"]
+    assert pool.in_flight == 0
+
+def test_stream_stages_are_recorded():
+    from engine.metrics import STAGE_SECONDS
+
+    def encode_count():
+        return STAGE_SECONDS.snapshot().get(("encode",), {"count": 0})["count"]
+
+    before = encode_count()
+    response = client.post("/api/tts/stream", data={"text": "Stage one. Stage two.", "backend": "formant"})
+    assert response.status_code == 200
+    assert encode_count() == before + 2
+
+def test_voice_engine_is_built_off_the_event_loop(monkeypatch):
+    import asyncio
+    import time
+    import main
+    import voice_engine
+
+    built = object()
+
+    def slow_build():
+        time.sleep(0.3)
+        return built
+
+    monkeypatch.setattr(voice_engine, "_voice_engine", None)
+    monkeypatch.setattr(voice_engine, "VoiceEngine", slow_build)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.ensure_future(ticker())
+        engine = await main.load_voice_engine()
+        task.cancel()
+        return engine, ticks
+
+    engine, ticks = asyncio.run(scenario())
+    assert engine is built
+    # The loop kept running other tasks while the engine was being built
+    assert ticks >= 10
+
+def test_importing_main_does_not_load_dsp_libraries():
+    import subprocess
+    # Fresh interpreter: this test process has long since imported librosa
+    script = "import sys, main; print(sorted(m for m in ('librosa', 'numba', 'soxr') if m in sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).parents[1], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip().splitlines()[-1] == "[]"
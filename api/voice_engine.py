@@ -4,18 +4,29 @@ Following safety design brief: consent-based, project-scoped, offline
 """
 
 import os
-import shutil
 import json
+import threading
 import hashlib
-import librosa
 import numpy as np
 import soundfile as sf
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Tuple
 from datetime import datetime
-from pydub import AudioSegment
-import io
 from engine.emotional_tts import EmotionalTTSEngine
+from engine.encoder import WATERMARK, id3_comment_tag, resolve_output
+from engine.consent_log import ConsentLog
+from engine.voice_store import create_voice_store
+from engine.embedding_store import EmbeddingStore
+from engine.similarity import SimilarityIndex
+from engine.conditioning import VoiceConditioning
+from engine.features import LEGACY_LAYOUT, extract_voice_features, extract_features_batch, from_legacy_layout
+
+
+def _generate_voice_id(voice_name: str, salt: str = "") -> str:
+    """Generate unique voice ID"""
+    return hashlib.sha256(
+        f"{voice_name}{datetime.now().isoformat()}{salt}".encode()
+    ).hexdigest()[:16]
 
 
 class VoiceIdentity:
@@ -60,44 +71,79 @@ class VoiceEngine:
     - Project-scoped storage
     - Offline inference
     - Revocable identities
+    - Mutations hold a per-project lock; the metadata write is each one's commit point
+    - Optional shared mode: several worker processes serve one project; each
+      catches up with the others' registrations and revocations before using voices
     """
     
-    def __init__(self, project_path: str = "voice_projects"):
+    def __init__(
+        self,
+        project_path: str = "voice_projects",
+        store_backend: Optional[str] = None,
+        shared: Optional[bool] = None
+    ):
         self.project_path = Path(project_path)
         self.project_path.mkdir(exist_ok=True)
         
-        # Check for FFmpeg
-        if not shutil.which("ffmpeg"):
-            print("\n" + "!"*50)
-            print("CRITICAL WARNING: FFmpeg not found in PATH!")
-            print("Audio synthesis using pydub/gTTS will fail.")
-            print("Please install FFmpeg and add it to your system PATH.")
-            print("!"*50 + "\n")
-        
         # Storage structure
         self.voices_dir = self.project_path / "voices"
         self.voices_dir.mkdir(exist_ok=True)
         
+        # All voice embeddings in one memory-mapped matrix
+        self.embeddings = EmbeddingStore(self.voices_dir)
+        
         self.metadata_file = self.project_path / "voices_metadata.json"
-        self.consent_log = self.project_path / "consent_log.json"
+        
+        # Shared mode needs a store with a change log (sqlite); workers poll it cheaply
+        self.shared = os.getenv("VOXLABS_SHARED_STATE", "0") == "1" if shared is None else shared
+        
+        # Voice metadata backend: "json" (voices_metadata.json) or "sqlite" (voices.db)
+        self.store = create_voice_store(
+            store_backend or os.getenv("VOXLABS_VOICE_STORE", "sqlite" if self.shared else "json"),
+            self.project_path
+        )
+        if self.shared and self.store.version() is None:
+            raise ValueError("Shared voice state requires the sqlite voice store")
+        self._sync_lock = threading.Lock()
+        self._synced_version = self.store.version() or 0
+        
+        # One lock per project serializes its registrations and revocations
+        self._project_locks: Dict[str, threading.Lock] = {}
+        self._project_locks_guard = threading.Lock()
+        
+        # Append-only consent audit log (imports the legacy JSON array once)
+        self.consent_log = ConsentLog(self.project_path / "consent_log")
+        migrated = self.consent_log.migrate_legacy(self.project_path / "consent_log.json")
+        if migrated:
+            print(f"Migrated {migrated} consent log entries to append-only format")
         
         # Load existing voices
         self.voices: Dict[str, VoiceIdentity] = {}
+        # Derived synthesis parameters per usable voice (dropped on revoke)
+        self.conditioning: Dict[str, VoiceConditioning] = {}
         self._load_voices()
         
+        # Speaker similarity index, rebuilt lazily after registrations/revocations
+        self._similarity_index: Optional[SimilarityIndex] = None
+        
         # Pre-trained voices (male/female)
+        # clone_pitch: fixed clone-engine pitch factor (registered voices derive theirs from f0)
         self.pretrained_voices = {
             "male_default": {
                 "name": "Male Voice (Default)",
                 "gender": "male",
-                "features": self._generate_default_features("male")
+                "features": self._generate_default_features("male"),
+                "clone_pitch": 0.9
             },
             "female_default": {
                 "name": "Female Voice (Default)",
                 "gender": "female",
-                "features": self._generate_default_features("female")
+                "features": self._generate_default_features("female"),
+                "clone_pitch": 1.1
             }
         }
+        for voice_id, voice in self.pretrained_voices.items():
+            self.conditioning[voice_id] = VoiceConditioning(voice_id, voice["features"])
     
         self.emotional_engine = EmotionalTTSEngine()
 
@@ -110,143 +156,254 @@ class VoiceEngine:
         emotion: str = "neutral",
         speed: float = 1.0,
         pitch: float = 1.0,
-        energy: float = 1.0
+        energy: float = 1.0,
+        backend: Optional[str] = None,
+        format: str = "mp3",
+        sample_rate: Optional[int] = None,
+        channels: int = 1,
+        bitrate: Optional[int] = None,
+        bit_depth: Optional[int] = None
     ) -> bytes:
         """
         Synthesize speech using the specified engine strategy
         """
+        params = self.resolve_synthesis(
+            text=text,
+            engine=engine,
+            voice_id=voice_id,
+            language=language,
+            emotion=emotion,
+            speed=speed,
+            pitch=pitch,
+            energy=energy,
+            backend=backend,
+            format=format,
+            sample_rate=sample_rate,
+            channels=channels,
+            bitrate=bitrate,
+            bit_depth=bit_depth
+        )
+        if params.get("engine") == "neural":
+            raise ValueError("The neural engine runs through the API inference batcher")
+        return self.emotional_engine.synthesize(**params)
+
+    def resolve_synthesis(
+        self,
+        text: str,
+        engine: str = "emotional",
+        voice_id: Optional[str] = None,
+        language: str = "en",
+        emotion: str = "neutral",
+        speed: float = 1.0,
+        pitch: float = 1.0,
+        energy: float = 1.0,
+        backend: Optional[str] = None,
+        format: str = "mp3",
+        sample_rate: Optional[int] = None,
+        channels: int = 1,
+        bitrate: Optional[int] = None,
+        bit_depth: Optional[int] = None
+    ) -> Dict:
+        """
+        Resolve an engine strategy into EmotionalTTSEngine parameters
+        Validates voice access, so revoked voices fail before any cache lookup
+        """
+        # Resolve the base synthesizer up front so it is part of every cache key
+        backend = backend or self.emotional_engine.default_backend
+        self.emotional_engine.get_synthesizer(backend)
+        # Output options (format, sample rate, channels, bitrate, bit depth) are validated
+        # here too, so bad requests fail fast and equivalent ones share a cache key
+        output = resolve_output(format, sample_rate, channels, bitrate, bit_depth)
+        
         if engine == "emotional":
             # Use Emotional TTS Engine
-            return self.emotional_engine.synthesize(
-                text=text,
-                language=language,
-                emotion=emotion,
-                speed=speed,
-                pitch=pitch,
-                energy=energy
-            )
+            return {
+                "text": text,
+                "language": language,
+                "emotion": emotion,
+                "speed": speed,
+                "pitch": pitch,
+                "energy": energy,
+                "backend": backend,
+                **output
+            }
         elif engine == "clone":
             # Basic cloning simulation using pitch shifting
             if not voice_id:
                 raise ValueError("Voice ID required for cloning")
             
-            # Get target voice features
-            voice = self.get_voice(voice_id)
-            if not voice:
-                 # Check default voices
-                if voice_id in self.pretrained_voices:
-                     # Use default voice features logic if needed
-                     pass
-                else:
-                    raise ValueError(f"Voice {voice_id} not found")
+            # Precomputed per-voice parameters (also covers the default voices)
+            conditioning = self.get_conditioning(voice_id)
+            pretrained = self.pretrained_voices.get(voice_id)
+            pitch_ratio = pretrained["clone_pitch"] if pretrained else conditioning.pitch_ratio
 
             # For now, just use emotional engine with custom pitch/speed as a proxy for cloning
             # In a real system, this would use a VITS/Tacotron model with speaker embedding
-            return self.emotional_engine.synthesize(
-                text=text,
-                language=language,
-                emotion=emotion, # Keep emotion
-                speed=speed,
-                pitch=pitch * 0.9 if voice_id == "male_default" else pitch * 1.1, # Simple gender simulation
-                energy=energy
-            )
+            return {
+                "text": text,
+                "language": language,
+                "emotion": emotion, # Keep emotion
+                "speed": speed,
+                "pitch": pitch * pitch_ratio, # Shift toward the voice's mean f0 (defaults: preset)
+                "energy": energy,
+                "backend": backend,
+                **output
+            }
+        elif engine == "neural":
+            # Neural model conditioned on the voice embedding (batched by the API's InferenceBatcher)
+            if voice_id:
+                self.get_conditioning(voice_id)
+            return {"engine": "neural", "text": text, "voice_id": voice_id, **output}
         else:
              # Fallback to basic
-             return self.emotional_engine.synthesize(text=text, language=language)
+             return {"text": text, "language": language, "backend": backend, **output}
 
     def _generate_default_features(self, gender: str) -> np.ndarray:
         """Generate default voice features for male/female"""
         # Simplified feature representation
         # In production, use pre-trained embeddings
         base_pitch = 120 if gender == "male" else 220  # Hz
-        features = np.random.randn(256)  # 256-dim embedding
+        # Seeded, so every worker process derives the same default voices
+        features = np.random.default_rng(base_pitch).standard_normal(256)  # 256-dim embedding
         features[0] = base_pitch
         return features
     
     def _load_voices(self):
         """Load registered voices from disk"""
-        if not self.metadata_file.exists():
-            return
-        
         try:
-            with open(self.metadata_file, 'r') as f:
-                metadata = json.load(f)
+            records = self.store.load_all()
+            self._migrate_feature_files(records)
+            
+            for voice_id, data in records.items():
+                self._apply_record(voice_id, data)
             
-            for voice_id, data in metadata.items():
-                # Load audio features
-                features_path = self.voices_dir / f"{voice_id}_features.npy"
-                if features_path.exists():
-                    features = np.load(features_path)
-                    self.voices[voice_id] = VoiceIdentity(
-                        voice_id=voice_id,
-                        name=data['name'],
-                        consent=data['consent'],
-                        audio_features=features,
-                        created_at=data['created_at'],
-                        project_id=data['project_id'],
-                        metadata=data.get('metadata', {})
-                    )
-                    self.voices[voice_id].revoked = data.get('revoked', False)
+            # Embeddings without metadata belong to a registration or revocation that
+            # was interrupted before (or after) its commit point; finish rolling them back.
+            # Other workers may be mid-registration in shared mode, so only sweep when alone.
+            orphans = [voice_id for voice_id in self.embeddings.ids() if voice_id not in records]
+            if orphans and not self.shared:
+                self.embeddings.remove(orphans)
+                print(f"Removed {len(orphans)} embeddings left by interrupted voice mutations")
         except Exception as e:
             print(f"Error loading voices: {e}")
     
-    def _save_voices(self):
-        """Save voice metadata to disk"""
-        metadata = {
-            voice_id: voice.to_dict()
-            for voice_id, voice in self.voices.items()
-        }
-        
-        with open(self.metadata_file, 'w') as f:
-            json.dump(metadata, f, indent=2)
+    def _project_lock(self, project_id: str) -> threading.Lock:
+        """Lock guarding mutations of one project's voices"""
+        with self._project_locks_guard:
+            return self._project_locks.setdefault(project_id, threading.Lock())
     
-    def _log_consent(self, voice_id: str, action: str, details: Dict):
-        """Log consent actions for audit trail"""
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "voice_id": voice_id,
-            "action": action,
-            "details": details
-        }
-        
-        log_data = []
-        if self.consent_log.exists():
-            with open(self.consent_log, 'r') as f:
-                log_data = json.load(f)
-        
-        log_data.append(log_entry)
+    def _apply_record(self, voice_id: str, data: Optional[Dict]):
+        """Bring one in-memory voice in line with its stored record (None = deleted)"""
+        # Audio features are zero-copy views into the embedding matrix
+        features = self.embeddings.get(voice_id) if data is not None else None
+        if features is None:
+            self.voices.pop(voice_id, None)
+            self.conditioning.pop(voice_id, None)
+            if data is None:
+                self.embeddings.discard([voice_id])
+            return
         
-        with open(self.consent_log, 'w') as f:
-            json.dump(log_data, f, indent=2)
+        voice = VoiceIdentity(
+            voice_id=voice_id,
+            name=data['name'],
+            consent=data['consent'],
+            audio_features=features,
+            created_at=data['created_at'],
+            project_id=data['project_id'],
+            metadata=data.get('metadata', {})
+        )
+        voice.revoked = data.get('revoked', False)
+        self.voices[voice_id] = voice
+        if data['consent'] and not voice.revoked:
+            self.conditioning[voice_id] = VoiceConditioning(voice_id, features)
+        else:
+            self.conditioning.pop(voice_id, None)
     
-    def extract_voice_features(self, audio_path: str) -> np.ndarray:
+    def sync(self) -> bool:
         """
-        Extract voice features from audio file
-        Uses MFCC + pitch features for voice characterization
+        Apply voice changes other worker processes committed (shared mode only)
+        Costs one PRAGMA query when nothing changed; returns True if voices were updated
         """
-        # Load audio
-        y, sr = librosa.load(audio_path, sr=22050)
-        
-        # Extract features
-        mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
-        mfccs_mean = np.mean(mfccs, axis=1)
-        
-        # Extract pitch (f0)
-        pitches, magnitudes = librosa.piptrack(y=y, sr=sr)
-        pitch_mean = np.mean([pitches[magnitudes[:, t].argmax(), t] 
-                             for t in range(pitches.shape[1]) 
-                             if magnitudes[:, t].max() > 0])
-        
-        # Combine features
-        features = np.concatenate([mfccs_mean, [pitch_mean]])
-        
-        # Pad to fixed size (256 dimensions)
-        if len(features) < 256:
-            features = np.pad(features, (0, 256 - len(features)))
-        else:
-            features = features[:256]
+        if not self.shared:
+            return False
+        
+        # changed() consumes the change it reports, so check under the lock: a caller that
+        # finds nothing new must not return while another thread is still applying it
+        with self._sync_lock:
+            if not self.store.changed():
+                return False
+            version, changes = self.store.changes_since(self._synced_version)
+            # Map rows other workers appended (or a compaction they ran) first
+            self.embeddings.refresh()
+            if changes is None:
+                # Too far behind the change log: reload every voice
+                records = self.store.load_all()
+                stale = [voice_id for voice_id in self.voices if voice_id not in records]
+                self.embeddings.discard([voice_id for voice_id in self.embeddings.ids() if voice_id not in records])
+                changes = {**{voice_id: None for voice_id in stale}, **records}
+            for voice_id, data in changes.items():
+                self._apply_record(voice_id, data)
+            self._rebind_features()
+            self._synced_version = version
+            self._similarity_index = None
+        return True
+    
+    def _migrate_feature_files(self, records: Dict[str, Dict]):
+        """
+        One-time import of legacy per-voice {voice_id}_features.npy files
+        The old vectors use another layout and the reference audio is not kept, so only
+        mean f0 is carried over; the voices are flagged (metadata feature_layout) and
+        left out of similarity search until they are registered again.
+        """
+        legacy = {}
+        for voice_id in records:
+            features_path = self.voices_dir / f"{voice_id}_features.npy"
+            if voice_id not in self.embeddings and features_path.exists():
+                legacy[voice_id] = from_legacy_layout(np.load(features_path))
+        if not legacy:
+            return
         
-        return features
+        self.embeddings.add(legacy)
+        for voice_id in legacy:
+            record = records[voice_id]
+            record["metadata"] = {**(record.get("metadata") or {}), "feature_layout": LEGACY_LAYOUT}
+        self.store.upsert([records[voice_id] for voice_id in legacy])
+        for voice_id in legacy:
+            (self.voices_dir / f"{voice_id}_features.npy").unlink()
+        print(f"Migrated {len(legacy)} legacy voice feature files (f0 only; re-register them for similarity search)")
+    
+    def _rebind_features(self):
+        """Refresh feature views after the embedding store was compacted"""
+        for voice_id, voice in list(self.voices.items()):
+            features = self.embeddings.get(voice_id)
+            if features is not None:
+                voice.audio_features = features
+    
+    def _save_voices(self, voices: List[VoiceIdentity]):
+        """Persist metadata for the given voices (incremental upsert)"""
+        self.store.upsert([voice.to_dict() for voice in voices])
+    
+    def _log_consent(self, voice_id: str, action: str, details: Dict):
+        """Log consent actions for audit trail"""
+        self._log_consent_entries([(voice_id, action, details)])
+    
+    def _log_consent_entries(self, events: List[tuple]):
+        """Log several (voice_id, action, details) consent actions in one write"""
+        timestamp = datetime.now().isoformat()
+        log_entries = [
+            {
+                "timestamp": timestamp,
+                "voice_id": voice_id,
+                "action": action,
+                "details": details
+            }
+            for voice_id, action, details in events
+        ]
+        self.consent_log.append(log_entries)
+    
+    def extract_voice_features(self, audio_path: str) -> np.ndarray:
+        """Extract voice features from audio file"""
+        return extract_voice_features(audio_path)
     
     def register_voice(
         self,
@@ -254,10 +411,12 @@ class VoiceEngine:
         voice_name: str,
         consent: bool,
         project_id: str = "default",
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        features: Optional[np.ndarray] = None
     ) -> str:
         """
         Register a new voice identity with consent
+        Pass precomputed features to skip extraction (e.g. when done in a worker pool)
         
         Safety checks:
         - Explicit consent required
@@ -271,12 +430,11 @@ class VoiceEngine:
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
         # Generate unique voice ID
-        voice_id = hashlib.sha256(
-            f"{voice_name}{datetime.now().isoformat()}".encode()
-        ).hexdigest()[:16]
+        voice_id = _generate_voice_id(voice_name)
         
         # Extract voice features
-        features = self.extract_voice_features(audio_path)
+        if features is None:
+            features = self.extract_voice_features(audio_path)
         
         # Create voice identity
         voice = VoiceIdentity(
@@ -289,66 +447,227 @@ class VoiceEngine:
             metadata=metadata or {}
         )
         
-        # Save to storage
-        self.voices[voice_id] = voice
-        np.save(self.voices_dir / f"{voice_id}_features.npy", features)
-        self._save_voices()
-        
-        # Log consent
-        self._log_consent(voice_id, "register", {
-            "name": voice_name,
-            "project_id": project_id,
-            "consent": consent
-        })
+        # Save to storage (embedding first: the metadata upsert commits the registration)
+        with self._project_lock(project_id):
+            self.embeddings.add({voice_id: features})
+            voice.audio_features = self.embeddings.get(voice_id)
+            self._save_voices([voice])
+            self.voices[voice_id] = voice
+            self.conditioning[voice_id] = VoiceConditioning(voice_id, voice.audio_features)
+            self._similarity_index = None
+            
+            # Log consent
+            self._log_consent(voice_id, "register", {
+                "name": voice_name,
+                "project_id": project_id,
+                "consent": consent
+            })
         
         return voice_id
     
+    def register_voices_batch(
+        self,
+        entries: List[Dict],
+        consent: bool,
+        project_id: str = "default",
+        features: Optional[List[np.ndarray]] = None,
+        max_workers: Optional[int] = None
+    ) -> List[str]:
+        """
+        Register many voice identities with consent in one transaction
+        
+        Each entry is {"audio_path", "voice_name", "metadata" (optional)}.
+        Features are extracted in parallel across cores unless precomputed;
+        metadata and consent entries are committed with one atomic write each.
+        Nothing is stored if any file fails validation or extraction.
+        """
+        if not consent:
+            raise ValueError("Explicit consent required for voice registration")
+        
+        for entry in entries:
+            if not Path(entry["audio_path"]).exists():
+                raise FileNotFoundError(f"Audio file not found: {entry['audio_path']}")
+        
+        if features is None:
+            features = extract_features_batch(
+                [entry["audio_path"] for entry in entries],
+                max_workers=max_workers
+            )
+        elif len(features) != len(entries):
+            raise ValueError("Expected one feature vector per entry")
+        
+        created_at = datetime.now().isoformat()
+        voices = [
+            VoiceIdentity(
+                voice_id=_generate_voice_id(entry["voice_name"], salt=str(index)),
+                name=entry["voice_name"],
+                consent=consent,
+                audio_features=entry_features,
+                created_at=created_at,
+                project_id=project_id,
+                metadata=entry.get("metadata") or {}
+            )
+            for index, (entry, entry_features) in enumerate(zip(entries, features))
+        ]
+        
+        # Save to storage (embeddings first: the metadata upsert commits the batch)
+        with self._project_lock(project_id):
+            self.embeddings.add({voice.voice_id: voice.audio_features for voice in voices})
+            for voice in voices:
+                voice.audio_features = self.embeddings.get(voice.voice_id)
+            self._save_voices(voices)
+            for voice in voices:
+                self.voices[voice.voice_id] = voice
+                self.conditioning[voice.voice_id] = VoiceConditioning(voice.voice_id, voice.audio_features)
+            self._similarity_index = None
+            
+            # Log consent
+            self._log_consent_entries([
+                (voice.voice_id, "register", {
+                    "name": voice.name,
+                    "project_id": project_id,
+                    "consent": consent
+                })
+                for voice in voices
+            ])
+        
+        return [voice.voice_id for voice in voices]
+    
     def list_voices(self, project_id: Optional[str] = None) -> List[Dict]:
         """List registered voices (optionally filtered by project)"""
-        voices = []
-        for voice_id, voice in self.voices.items():
-            if voice.revoked:
-                continue
-            if project_id and voice.project_id != project_id:
-                continue
-            voices.append(voice.to_dict())
-        
+        voices, _ = self.list_voices_page(project_id=project_id)
         return voices
     
+    def list_voices_page(
+        self,
+        project_id: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        List one page of registered voices ordered by creation time
+        Returns (voices, next_cursor); next_cursor is None on the last page
+        """
+        return self.store.list(project_id=project_id, limit=limit, cursor=cursor)
+    
     def get_voice(self, voice_id: str) -> Optional[VoiceIdentity]:
         """Get voice identity by ID"""
+        self.sync()
         voice = self.voices.get(voice_id)
         if voice and not voice.revoked:
             return voice
         return None
     
+    def get_conditioning(self, voice_id: str) -> VoiceConditioning:
+        """Precomputed synthesis parameters of a usable (registered or default) voice"""
+        self.sync()
+        conditioning = self.conditioning.get(voice_id)
+        if conditioning is None:
+            raise ValueError(f"Voice {voice_id} not found or revoked")
+        return conditioning
+    
     def revoke_voice(self, voice_id: str):
         """
         Revoke a voice identity and delete associated data
         Ensures complete removal per safety design
         """
-        if voice_id not in self.voices:
+        self.sync()
+        voice = self.voices.get(voice_id)
+        if voice is None:
             raise ValueError(f"Voice {voice_id} not found")
         
-        voice = self.voices[voice_id]
-        voice.revoked = True
-        
-        # Delete features file
-        features_path = self.voices_dir / f"{voice_id}_features.npy"
-        if features_path.exists():
-            features_path.unlink()
+        with self._project_lock(voice.project_id):
+            # Another request may have revoked it while we waited
+            if self.voices.get(voice_id) is not voice:
+                raise ValueError(f"Voice {voice_id} not found")
+            self._revoke([voice])
+    
+    def _revoke(self, voices: List[VoiceIdentity]):
+        """
+        Revoke voices as one transaction (project lock must be held)
+        One consent write, one metadata commit and one embedding pass for any number of voices;
+        embeddings left behind by an interruption after the commit are swept on the next start
+        """
+        voice_ids = [voice.voice_id for voice in voices]
+        # Stop serving the voices before any disk work
+        for voice in voices:
+            voice.revoked = True
+            self.conditioning.pop(voice.voice_id, None)
+        self._similarity_index = None
         
         # Log revocation
-        self._log_consent(voice_id, "revoke", {
-            "name": voice.name,
-            "timestamp": datetime.now().isoformat()
-        })
+        timestamp = datetime.now().isoformat()
+        self._log_consent_entries([
+            (voice.voice_id, "revoke", {"name": voice.name, "timestamp": timestamp})
+            for voice in voices
+        ])
+        
+        # Update metadata (commit point)
+        self.store.delete(voice_ids)
         
-        # Update metadata
-        self._save_voices()
+        # Delete features (rows are zeroed on disk and tombstoned in one pass)
+        compacted = self.embeddings.remove(voice_ids)
         
         # Remove from memory
-        del self.voices[voice_id]
+        for voice_id in voice_ids:
+            self.voices.pop(voice_id, None)
+        self._similarity_index = None
+        if compacted:
+            self._rebind_features()
+    
+    def find_similar_voices(
+        self,
+        audio_path: str,
+        top_k: int = 5,
+        project_id: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Find registered voices that sound like an audio clip
+        Used for duplicate-registration and consent-fraud checks
+        """
+        return self.search_voices(self.extract_voice_features(audio_path), top_k, project_id)
+    
+    def search_voices(
+        self,
+        features: np.ndarray,
+        top_k: int = 5,
+        project_id: Optional[str] = None
+    ) -> List[Dict]:
+        """Top-k registered voices by cosine similarity to an embedding"""
+        results = []
+        for voice_id, similarity in self._get_similarity_index().search(features, top_k, project_id):
+            voice = self.get_voice(voice_id)
+            if voice is None:
+                continue
+            results.append({
+                "voice_id": voice_id,
+                "name": voice.name,
+                "project_id": voice.project_id,
+                "similarity": similarity
+            })
+        return results
+    
+    def _get_similarity_index(self) -> SimilarityIndex:
+        """Current similarity index, building it if voices changed"""
+        self.sync()
+        index = self._similarity_index
+        if index is None:
+            # Legacy-layout embeddings are not comparable with extracted ones
+            active = [
+                voice for voice in list(self.voices.values())
+                if not voice.revoked and voice.metadata.get("feature_layout") != LEGACY_LAYOUT
+            ]
+            vectors = (
+                np.stack([voice.audio_features for voice in active])
+                if active else np.empty((0, self.embeddings.dim), dtype=np.float32)
+            )
+            index = SimilarityIndex(
+                voice_ids=[voice.voice_id for voice in active],
+                project_ids=[voice.project_id for voice in active],
+                vectors=vectors
+            )
+            self._similarity_index = index
+        return index
     
     def synthesize_with_voice(
         self,
@@ -364,74 +683,79 @@ class VoiceEngine:
         If voice_id is provided, applies voice features
         Otherwise uses default voice
         """
-        # Get voice features
-        if voice_id:
-            if voice_id in ["male_default", "female_default"]:
-                features = self.pretrained_voices[voice_id]["features"]
-            else:
-                voice = self.get_voice(voice_id)
-                if not voice:
-                    raise ValueError(f"Voice {voice_id} not found or revoked")
-                if not voice.consent:
-                    raise ValueError("Voice consent withdrawn")
-                features = voice.audio_features
-        else:
-            features = self.pretrained_voices["female_default"]["features"]
-        
-        # Use features to modulate synthesis
-        # Extract pitch from features
-        target_pitch = features[0] if len(features) > 0 else 220
+        # Precomputed voice parameters (only consented, unrevoked voices are present)
+        conditioning = self.get_conditioning(voice_id or "female_default")
         
-        # Adjust pitch_shift based on voice features
-        pitch_adjust = pitch_shift * (target_pitch / 220.0)  # Normalize to female default
+        # Adjust pitch_shift based on voice features (normalized to the female default)
+        pitch_adjust = pitch_shift * conditioning.pitch_ratio
         
         return {
-            "features": features,
+            "embedding": conditioning.embedding,
+            "formant_warp": conditioning.formant_warp,
+            "envelope": conditioning.envelope,
             "pitch_adjust": pitch_adjust,
             "speed": speed,
             "energy": energy
         }
     
-    def purge_project(self, project_id: str):
-        """Delete all voices for a project"""
-        voices_to_remove = [
-            voice_id for voice_id, voice in self.voices.items()
-            if voice.project_id == project_id
-        ]
-        
-        for voice_id in voices_to_remove:
-            self.revoke_voice(voice_id)
+    def purge_project(self, project_id: str) -> int:
+        """Delete all voices for a project in one transaction; returns how many were removed"""
+        self.sync()
+        with self._project_lock(project_id):
+            voices_to_remove = [
+                voice for voice in list(self.voices.values())
+                if voice.project_id == project_id
+            ]
+            if voices_to_remove:
+                self._revoke(voices_to_remove)
+        return len(voices_to_remove)
     
     def add_watermark(self, audio_data: bytes) -> bytes:
         """
         Add synthetic audio watermark
         Marks audio as AI-generated for transparency
         """
-        # Simple implementation: add metadata tag
+        # Audio from the synthesis path is tagged at encode time; untagged MP3
+        # gets an ID3 comment prepended without decoding or re-encoding
         # In production, use ultrasonic watermarking
-        audio = AudioSegment.from_file(io.BytesIO(audio_data), format="mp3")
-        
-        # Add tag (pydub doesn't support custom tags easily, 
-        # so we'd use a library like mutagen in production)
-        # For now, return as-is with comment
-        
-        output = io.BytesIO()
-        audio.export(
-            output,
-            format="mp3",
-            tags={'comment': 'AI-Generated by Voice-Synth Engine'}
-        )
-        output.seek(0)
-        return output.read()
+        if audio_data.startswith(b"ID3"):
+            return audio_data
+        return id3_comment_tag(WATERMARK) + audio_data
 
 
 # Global voice engine instance
 _voice_engine: Optional[VoiceEngine] = None
 
+# Fallback TTS engine for worker processes that never build a VoiceEngine
+_worker_tts_engine: Optional[EmotionalTTSEngine] = None
+
+
+_voice_engine_lock = threading.Lock()
+
 
 def get_voice_engine() -> VoiceEngine:
-    """Get or create voice engine instance"""
+    """Get or create voice engine instance (built once, even under concurrent first use)"""
     global _voice_engine
     if _voice_engine is None:
-        _voice_engine = VoiceEngine()
+        with _voice_engine_lock:
+            if _voice_engine is None:
+                _voice_engine = VoiceEngine()
     return _voice_engine
+
+
+def voice_engine_loaded() -> bool:
+    """Whether the voice engine has been built (without building it)"""
+    return _voice_engine is not None
+
+
+def render_synthesis(params: Dict) -> bytes:
+    """
+    Worker entry point: render parameters from VoiceEngine.resolve_synthesis
+    Reuses the in-process engine (and its caches) when one exists
+    """
+    global _worker_tts_engine
+    if _voice_engine is not None:
+        return _voice_engine.emotional_engine.synthesize(**params)
+    if _worker_tts_engine is None:
+        _worker_tts_engine = EmotionalTTSEngine()
+    return _worker_tts_engine.synthesize(**params)